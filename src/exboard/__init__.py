@@ -2,7 +2,17 @@
 # coding:utf-8
 # Version: 1.0.12
 
+import importlib
+import os
+import pkgutil
+
+# 可选后端, 也可以通过环境变量 EXBOARD_BACKEND 指定
+# sim 为不依赖硬件的模拟器后端, 只能通过 EXBOARD_BACKEND=sim 选择
+BACKENDS = ("jetson", "rk3390", "sim")
+
+
 def get_linux_distribution():
+    distribution_id = distribution_name = None
     try:
         with open("/etc/os-release") as f:
             for line in f:
@@ -10,13 +20,76 @@ def get_linux_distribution():
                     distribution_id = line.strip().split("=")[1].strip('"')
                 elif line.startswith("NAME="):
                     distribution_name = line.strip().split("=")[1].strip('"')
-        return distribution_id, distribution_name
     except FileNotFoundError:
-        return None, None
+        pass
+    return distribution_id, distribution_name
+
+
+def get_backend_name():
+    """
+    返回当前使用的后端名称：优先使用 EXBOARD_BACKEND，否则根据系统判断
+    (debian 为 rk3390, 其他为 jetson)。
+    """
+    backend = os.environ.get("EXBOARD_BACKEND")
+    if backend:
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"EXBOARD_BACKEND={backend!r} 无效, 可选: {', '.join(BACKENDS)}"
+            )
+        return backend
+    distribution_id, distribution_name = get_linux_distribution()
+    if distribution_id == "debian":
+        return "rk3390"
+    return "jetson"
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    导入并返回后端模块 (exboard.jetson、exboard.rk3390 或 exboard.sim)。
+    后端模块的硬件依赖在各个类第一次使用时才导入。
+    """
+    global _backend
+    if _backend is None:
+        _backend = importlib.import_module("." + get_backend_name(), __name__)
+    return _backend
+
+
+_submodules = None
+
+
+def _is_submodule(name):
+    # 子模块由导入系统加载，不能在这里触发后端导入，否则
+    # "from . import metrics" 会在后端模块初始化到一半时再次导入后端
+    global _submodules
+    if _submodules is None:
+        _submodules = frozenset(module.name for module in pkgutil.iter_modules(__path__))
+    return name in _submodules
+
+
+def _public_names(backend):
+    # 各后端用 __all__ 列出驱动接口；模拟器后端导出它所模拟的板子的接口，
+    # 不导出模拟器自身和后端导入的模块
+    board = getattr(backend, "BOARD", None)
+    if board is not None:
+        backend = importlib.import_module("." + board, __name__)
+    return list(backend.__all__)
+
+
+def __getattr__(name):
+    # PEP 562: 访问 exboard.ADC 等属性时才加载后端
+    if (name.startswith("__") and name != "__all__") or _is_submodule(name):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    backend = get_backend()
+    if name == "__all__":
+        return _public_names(backend)
+    try:
+        return getattr(backend, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
-distribution_id, distribution_name = get_linux_distribution()
 
-if distribution_id is not None and distribution_id == "debian":
-    from .rk3390 import *
-else:
-    from .jetson import *
+def __dir__():
+    return sorted(set(globals()) | set(__getattr__("__all__")))
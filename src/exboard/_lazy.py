@@ -0,0 +1,26 @@
+import importlib
+
+
+class LazyModule:
+    """
+    第一次访问属性时才导入的模块代理，使各个类只在首次使用时加载自己的依赖。
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def bind(self, module):
+        """
+        绑定到给定的模块对象 (例如模拟器提供的替身)，之后不再导入真实模块。
+        """
+        self._module = module
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
@@ -0,0 +1,46 @@
+import functools
+import threading
+
+_executors = {}  # 资源键 -> 单线程执行器
+_lock = threading.Lock()
+
+
+def executor(key):
+    """
+    获取资源对应的单线程执行器。同一总线/串口/引脚上的异步调用都提交到同一个线程，
+    因此按提交顺序串行执行，不会相互竞争。
+
+    :param key: 资源键，例如 ("i2c", 7)、("serial", "/dev/ttyUSB0")、("gpio", 5)
+    """
+    with _lock:
+        pool = _executors.get(key)
+        if pool is None:
+            # 延迟导入，concurrent.futures 会导入 logging
+            from concurrent.futures import ThreadPoolExecutor
+
+            pool = ThreadPoolExecutor(max_workers=1)
+            _executors[key] = pool
+        return pool
+
+
+async def run_on(key, func, *args, **kwargs):
+    """
+    在资源对应的执行器中运行阻塞调用，事件循环不会被阻塞。
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor(key), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown(wait=True):
+    """
+    关闭所有执行器。
+    """
+    with _lock:
+        pools = list(_executors.values())
+        _executors.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
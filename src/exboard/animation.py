@@ -0,0 +1,190 @@
+import colorsys
+import math
+import threading
+import time
+
+# 0~255 的正弦亮度表 (0 -> 最暗, 128 -> 最亮)
+SINE_TABLE = [(1 - math.cos(2 * math.pi * i / 256)) / 2 for i in range(256)]
+# 伽马校正表，使亮度变化在人眼看来更均匀
+GAMMA_TABLE = bytes(int((i / 255) ** 2.2 * 255 + 0.5) for i in range(256))
+# 色轮表，256 个色相的 (r, g, b)
+WHEEL_TABLE = [
+    bytes(int(c * 255 + 0.5) for c in colorsys.hsv_to_rgb(i / 256, 1, 1))
+    for i in range(256)
+]
+
+
+class Effect:
+    """
+    预先计算好的一段动画：frames 中每一项是一整帧颜色数据 (bytes)。
+    """
+
+    def __init__(self, frames, loop=True):
+        """
+        :param frames: 帧列表，每帧长度为 彩灯数量 * 3
+        :param loop: 是否循环播放，否则停在最后一帧
+        """
+        self.frames = frames
+        self.loop = loop
+
+    def frame(self, index):
+        if self.loop:
+            return self.frames[index % len(self.frames)]
+        return self.frames[min(index, len(self.frames) - 1)]
+
+
+def fade(count, fps, start, end, duration=1.0):
+    """
+    从颜色 start 渐变到 end，播放一次后保持 end。
+    """
+    steps = max(1, int(duration * fps))
+    frames = []
+    for i in range(steps + 1):
+        k = i / steps
+        color = bytes(GAMMA_TABLE[int(a + (b - a) * k + 0.5)] for a, b in zip(start, end))
+        frames.append(color * count)
+    return Effect(frames, loop=False)
+
+
+def chase(count, fps, color, width=3, speed=12.0, background=(0, 0, 0)):
+    """
+    一段长度为 width 的光点沿灯环移动。
+
+    :param speed: 每秒移动的彩灯数
+    """
+    color = bytes(color)
+    background = bytes(background)
+    steps = max(1, int(count * fps / speed))
+    frames = []
+    for i in range(steps):
+        head = int(i * count / steps)
+        frame = bytearray(background * count)
+        for j in range(width):
+            offset = (head - j) % count * 3
+            frame[offset:offset + 3] = color
+        frames.append(bytes(frame))
+    return Effect(frames)
+
+
+def gradient(count, fps, period=4.0):
+    """
+    沿灯环分布的彩虹色带，每 period 秒旋转一圈。
+    """
+    steps = max(1, int(period * fps))
+    frames = []
+    for i in range(steps):
+        shift = int(i * 256 / steps)
+        frames.append(
+            b"".join(WHEEL_TABLE[(j * 256 // count + shift) % 256] for j in range(count))
+        )
+    return Effect(frames)
+
+
+def breathe(count, fps, color, period=2.0):
+    """
+    单色呼吸灯，每 period 秒一次明暗循环。
+    """
+    steps = max(1, int(period * fps))
+    frames = []
+    for i in range(steps):
+        level = SINE_TABLE[i * 256 // steps]
+        frames.append(bytes(GAMMA_TABLE[int(c * level)] for c in color) * count)
+    return Effect(frames)
+
+
+class AnimationEngine:
+    """
+    在独立线程中以固定帧率播放动画，适用于 jetson.RGB (I2C) 和 rk3390.RGB (UART)。
+    每一帧根据启动以来的时间选取，总线跟不上时直接丢弃过期的帧而不是排队补发。
+
+    用法：
+        engine = AnimationEngine(RGB(), fps=30)
+        engine.play(engine.breathe((0, 0, 255)))
+        engine.start()
+    """
+
+    def __init__(self, rgb, fps=30):
+        """
+        :param rgb: 带 set_pixels()/show() 的 RGB 实例
+        :param fps: 目标帧率
+        """
+        self.rgb = rgb
+        self.fps = fps
+        self.count = len(rgb.pixels) // 3
+        self.effect = None
+        self.shown = 0  # 内容有变化、实际发送的帧数
+        self.dropped = 0  # 因总线跟不上而丢弃的帧数
+        self.achieved_fps = 0.0  # 最近一秒实际播放的帧率
+        self._epoch = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    def fade(self, start, end, duration=1.0):
+        return fade(self.count, self.fps, start, end, duration)
+
+    def chase(self, color, width=3, speed=12.0, background=(0, 0, 0)):
+        return chase(self.count, self.fps, color, width, speed, background)
+
+    def gradient(self, period=4.0):
+        return gradient(self.count, self.fps, period)
+
+    def breathe(self, color, period=2.0):
+        return breathe(self.count, self.fps, color, period)
+
+    def play(self, effect):
+        """
+        切换到新的动画，从第一帧开始播放。
+        """
+        with self._lock:
+            self.effect = effect
+            self._epoch = time.monotonic()
+
+    def stats(self):
+        return {"fps": self.achieved_fps, "shown": self.shown, "dropped": self.dropped}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        period = 1.0 / self.fps
+        window_start = time.monotonic()
+        window_frames = 0
+        last_index = None
+        while self._running:
+            with self._lock:
+                effect = self.effect
+                epoch = self._epoch
+            now = time.monotonic()
+            if effect is not None:
+                index = int((now - epoch) * self.fps)
+                if last_index is not None and index > last_index + 1:
+                    self.dropped += index - last_index - 1
+                last_index = index
+                self.rgb.set_pixels(effect.frame(index))
+                if self.rgb.show():
+                    self.shown += 1
+                window_frames += 1
+                next_due = epoch + (index + 1) * period
+            else:
+                last_index = None
+                next_due = now + period
+
+            now = time.monotonic()
+            if now - window_start >= 1.0:
+                self.achieved_fps = window_frames / (now - window_start)
+                window_start = now
+                window_frames = 0
+            delay = next_due - now
+            if delay > 0:
+                time.sleep(delay)
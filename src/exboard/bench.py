@@ -0,0 +1,305 @@
+"""
+基于模拟器 (exboard.sim) 的性能基准：统计每个高层操作的总线事务数、传输字节数、系统调用次数和
+p50/p99 耗时，jetson 与 rk3390 两个后端分别测量。结果可以保存为 JSON，用于比较两个版本。
+
+用法：
+    python -m exboard.bench                              # 打印表格
+    python -m exboard.bench --json result.json           # 同时保存 JSON
+    python -m exboard.bench --latency i2c=0.0002,serial=0.002
+    python -m exboard.bench --compare base.json result.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+
+from . import sim
+from .sim import KINDS
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_WARMUP = 5
+
+CARD_UID = [0x12, 0x34, 0x56, 0x78]
+CARD_BLOCK = 4
+TRIGGER_PIN = 4
+ECHO_PIN = 5
+ECHO_CM = 50
+
+
+class Operation:
+    """
+    一个被测操作。run(i) 为计时部分，setup(i) 在每次计时前执行，不计入统计。
+    """
+
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+
+
+def _jetson_operations(simulator, card):
+    from . import jetson
+
+    adc = jetson.ADC(3)
+    rgb = jetson.RGB()
+    rc522 = jetson.RC522()
+    ultrasound = jetson.Ultrasound(TRIGGER_PIN, ECHO_PIN)
+    servos = jetson.Servos()
+    return _common_operations(simulator, card, adc, rgb, rc522, ultrasound) + [
+        # 交替两个目标位置，避免与上一次相同
+        Operation(
+            "Servos.move_to_absolute_position",
+            lambda i: servos.move_to_absolute_position(Y=(i % 2) * 10, Z=0),
+        ),
+    ], [adc.close, rgb.close, rc522.close, servos.close]
+
+
+def _rk3390_operations(simulator, card):
+    from . import rk3390
+
+    adc = rk3390.ADC(3)
+    rgb = rk3390.RGB()
+    rc522 = rk3390.RC522()
+    ultrasound = rk3390.Ultrasound(TRIGGER_PIN, ECHO_PIN)
+    servos = rk3390.Servos()
+    return _common_operations(simulator, card, adc, rgb, rc522, ultrasound) + [
+        # PWM 云台没有绝对位置命令，update(x, y) 是对应的操作
+        Operation("Servos.update", lambda i: servos.update((i % 2) * 10, 0)),
+    ], [adc.i2c.close, rgb.close, servos.close]
+
+
+def _common_operations(simulator, card, adc, rgb, rc522, ultrasound):
+    colors = [[(255, 0, 0)] * 24, [(0, 0, 255)] * 24]
+    scanned = {}
+
+    def select_card(i):
+        # 卡片重新进入射频场，每次都从 IDLE 状态开始
+        card.reset()
+
+    def scan_card(i):
+        card.reset()
+        scanned["uid"] = rc522.scan()[1]
+
+    return [
+        Operation("ADC.read", lambda i: adc.read()),
+        Operation("RGB.set", lambda i: rgb.set(colors[i % 2])),
+        Operation("RC522.scan", lambda i: rc522.scan(), select_card),
+        Operation("RC522.read", lambda i: rc522.read(scanned["uid"], CARD_BLOCK), scan_card),
+        Operation("Ultrasound.read", lambda i: ultrasound.read()),
+    ]
+
+
+def _percentile(samples, q):
+    # 最近秩法，samples 已排序
+    index = max(0, min(len(samples) - 1, int(round(q / 100 * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+
+def measure(simulator, operation, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+    """
+    测量一个操作。
+
+    :return: {"iterations", "errors", "per_call", "by_kind", "latency_us"}
+    """
+    for i in range(warmup):
+        if operation.setup is not None:
+            operation.setup(i)
+        operation.run(i)
+
+    totals = {kind: dict.fromkeys(("transactions", "bytes", "syscalls"), 0) for kind in KINDS}
+    samples = []
+    errors = 0
+    for i in range(warmup, warmup + iterations):
+        if operation.setup is not None:
+            operation.setup(i)
+        before = simulator.snapshot()
+        start = time.perf_counter()
+        try:
+            operation.run(i)
+        except Exception:
+            errors += 1
+            continue
+        samples.append(time.perf_counter() - start)
+        after = simulator.snapshot()
+        for kind in KINDS:
+            for key, value in after[kind].items():
+                totals[kind][key] += value - before[kind][key]
+
+    count = max(len(samples), 1)
+    by_kind = {
+        kind: {key: round(value / count, 3) for key, value in values.items()}
+        for kind, values in totals.items()
+        if any(values.values())
+    }
+    per_call = {
+        key: round(sum(values[key] for values in totals.values()) / count, 3)
+        for key in ("transactions", "bytes", "syscalls")
+    }
+    samples.sort()
+    latency = {}
+    if samples:
+        latency = {
+            "p50": round(_percentile(samples, 50) * 1e6, 1),
+            "p99": round(_percentile(samples, 99) * 1e6, 1),
+            "mean": round(sum(samples) / len(samples) * 1e6, 1),
+            "min": round(samples[0] * 1e6, 1),
+            "max": round(samples[-1] * 1e6, 1),
+        }
+    return {
+        "iterations": len(samples),
+        "errors": errors,
+        "per_call": per_call,
+        "by_kind": by_kind,
+        "latency_us": latency,
+    }
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+
+        return version("exboard")
+    except Exception:
+        return None
+
+
+def run(backends=("jetson", "rk3390"), iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+        latency=None, operations=None):
+    """
+    在模拟器上运行基准。
+
+    :param backends: 要测量的后端
+    :param latency: 模拟器每次事务的延迟，见 Simulator.set_latency()
+    :param operations: 只运行名称包含其中任一字符串的操作，None 表示全部
+    :return: 可直接序列化为 JSON 的结果
+    """
+    simulator = sim.simulator
+    if latency is not None:
+        simulator.set_latency(latency)
+    card = simulator.place_card(sim.VirtualCard(CARD_UID, data={CARD_BLOCK: b"exboard bench"}))
+    simulator.echo(TRIGGER_PIN, ECHO_PIN, ECHO_CM)
+    factories = {"jetson": _jetson_operations, "rk3390": _rk3390_operations}
+
+    results = []
+    # 传感器类会打印提示信息，避免混入输出
+    with simulator, contextlib.redirect_stdout(io.StringIO()):
+        for backend in backends:
+            ops, closers = factories[backend](simulator, card)
+            try:
+                for operation in ops:
+                    if operations and not any(name in operation.name for name in operations):
+                        continue
+                    result = measure(simulator, operation, iterations, warmup)
+                    results.append(dict(backend=backend, operation=operation.name, **result))
+            finally:
+                for close in closers:
+                    close()
+    simulator.remove_card(card)
+
+    return {
+        "exboard_version": _version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "iterations": iterations,
+        "latency": dict(simulator.latency),
+        "results": results,
+    }
+
+
+def compare(base, new, threshold=0.25):
+    """
+    比较两次基准结果。
+
+    I2C 和 PWM 的事务数/字节数/系统调用次数是确定的，任何增加都视为退化；
+    轮询 GPIO 的次数、后台线程读取的串口应答和 p50 耗时随时间波动，增加超过 threshold 才视为退化。
+
+    :return: [(backend, operation, 指标, 旧值, 新值, 是否退化)]
+    """
+    old = {(r["backend"], r["operation"]): r for r in base["results"]}
+    rows = []
+    for result in new["results"]:
+        previous = old.get((result["backend"], result["operation"]))
+        if previous is None:
+            continue
+        for kind in KINDS:
+            a_values = previous["by_kind"].get(kind, {})
+            b_values = result["by_kind"].get(kind, {})
+            if not (a_values or b_values):
+                continue
+            tolerance = threshold if kind in ("gpio", "serial") else 0.0
+            for key in ("transactions", "bytes", "syscalls"):
+                a, b = a_values.get(key, 0), b_values.get(key, 0)
+                rows.append(
+                    (result["backend"], result["operation"], f"{kind}.{key}", a, b, b > a * (1 + tolerance))
+                )
+        a = previous["latency_us"].get("p50")
+        b = result["latency_us"].get("p50")
+        if a is not None and b is not None:
+            rows.append((result["backend"], result["operation"], "p50_us", a, b, b > a * (1 + threshold)))
+    return rows
+
+
+def format_results(report):
+    lines = [
+        f"{'backend':<8} {'operation':<34} {'txn':>8} {'bytes':>9} {'syscalls':>9} {'p50 us':>10} {'p99 us':>10}"
+    ]
+    for r in report["results"]:
+        latency = r["latency_us"]
+        lines.append(
+            f"{r['backend']:<8} {r['operation']:<34} {r['per_call']['transactions']:>8} "
+            f"{r['per_call']['bytes']:>9} {r['per_call']['syscalls']:>9} "
+            f"{latency.get('p50', '-'):>10} {latency.get('p99', '-'):>10}"
+            + (f"  ({r['errors']} errors)" if r["errors"] else "")
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    lines = [f"{'backend':<8} {'operation':<34} {'metric':<20} {'base':>10} {'new':>10}"]
+    for backend, operation, key, a, b, regressed in rows:
+        mark = "  REGRESSION" if regressed else ""
+        lines.append(f"{backend:<8} {operation:<34} {key:<20} {a:>10} {b:>10}{mark}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exboard.bench", description="exboard 模拟器基准")
+    parser.add_argument("--backend", choices=("jetson", "rk3390", "all"), default="all")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--latency", default="", help='"0.0002" 或 "i2c=0.0002,serial=0.002"')
+    parser.add_argument("--operation", action="append", help="只运行名称包含该字符串的操作，可重复")
+    parser.add_argument("--json", metavar="PATH", help="保存 JSON 结果，- 表示输出到标准输出")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="比较两个 JSON 结果")
+    parser.add_argument("--threshold", type=float, default=0.25, help="p50 耗时、GPIO 和串口统计允许增加的比例")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        rows = compare(base, new, args.threshold)
+        print(format_comparison(rows))
+        return 1 if any(row[-1] for row in rows) else 0
+
+    backends = ("jetson", "rk3390") if args.backend == "all" else (args.backend,)
+    report = run(backends, args.iterations, args.warmup, sim.parse_latency(args.latency), args.operation)
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 0
+    print(format_results(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
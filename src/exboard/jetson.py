@@ -1,18 +1,137 @@
-import Jetson.GPIO as JetsonGPIO
-import serial
-import serial.tools.list_ports
-from smbus import SMBus
+import bisect
+import functools
+import sys
+import threading
 import time
-import smbus
-import smbus2
+from array import array
+from collections import deque
+from ._lazy import LazyModule
+from .aio import run_on
+from .metrics import counter, now_ns, op
+
+# from exboard import * 导出的驱动接口
+__all__ = [
+    "MFRC522",
+    "RC522",
+    "RGB",
+    "Ultrasound",
+    "ADC",
+    "ADCBank",
+    "GPIO",
+    "LED",
+    "PhotosensitiveSensor",
+    "SoilMoistureSensor",
+    "WaterDepthSensor",
+    "RotaryPotentionmeter",
+    "SoundSensor",
+    "FlameSensor",
+    "MQGasSensor",
+    "ViscaError",
+    "Servos",
+]
+
+# 硬件相关依赖在第一次使用时才导入
+JetsonGPIO = LazyModule("Jetson.GPIO")
+# concurrent.futures 会导入 logging，只有 Servos 需要
+futures = LazyModule("concurrent.futures")
+serial = LazyModule("serial")
+list_ports = LazyModule("serial.tools.list_ports")
+smbus2 = LazyModule("smbus2")
+periphery = LazyModule("periphery")
+
+
+class I2CBus:
+    """
+    共享的 I2C 总线句柄。同一总线编号在进程内只打开一个 smbus2.SMBus，
+    通过 acquire()/release() 进行引用计数，最后一个使用者释放时关闭文件描述符。
+    """
+
+    _buses = {}  # 总线编号 -> I2CBus
+    _registry_lock = threading.Lock()
+
+    def __init__(self, number):
+        self.number = number
+        self.bus = smbus2.SMBus(number)
+        self.lock = threading.RLock()  # 多步事务 (如 MFRC522 选卡/认证/读写) 期间独占总线
+        self.refcount = 0
+
+    @classmethod
+    def acquire(cls, number):
+        """
+        获取指定编号总线的共享句柄，引用计数加一。
+        """
+        with cls._registry_lock:
+            handle = cls._buses.get(number)
+            if handle is None:
+                handle = cls(number)
+                cls._buses[number] = handle
+            handle.refcount += 1
+            return handle
+
+    def release(self):
+        """
+        释放一次引用，引用计数归零时关闭总线。
+        """
+        with I2CBus._registry_lock:
+            if self.refcount <= 0:
+                return
+            self.refcount -= 1
+            if self.refcount == 0:
+                I2CBus._buses.pop(self.number, None)
+                self.bus.close()
+
+    def read_byte_data(self, addr, register):
+        return self.bus.read_byte_data(addr, register)
+
+    def write_byte_data(self, addr, register, value):
+        self.bus.write_byte_data(addr, register, value)
+
+    def read_word_data(self, addr, register):
+        return self.bus.read_word_data(addr, register)
 
-JetsonGPIO.setwarnings(False)
+    def read_i2c_block_data(self, addr, register, length):
+        return self.bus.read_i2c_block_data(addr, register, length)
+
+    def write_i2c_block_data(self, addr, register, data):
+        self.bus.write_i2c_block_data(addr, register, data)
+
+    def i2c_rdwr(self, *msgs):
+        self.bus.i2c_rdwr(*msgs)
+
+
+def _crc_a_table():
+    """Precomputes the reflected CRC-16/CCITT (0x8408) lookup table"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x01:
+                crc = (crc >> 1) ^ 0x8408
+            else:
+                crc >>= 1
+        table.append(crc)
+    return table
+
+
+def _holdsBusLock(method):
+    """Runs a multi-step register sequence while holding the shared bus lock"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.i2cBus.lock:
+            # Lets a caller that released the lock in between notice that
+            # the reader was used by someone else meanwhile
+            self.operations += 1
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class MFRC522:
     # Define register values from datasheet
     COMMANDREG = 0x01  # Start and stops command execution
     COMIENREG = 0x02  # Enable and disable interrupt request control bits
+    DIVIENREG = 0x03  # Enable and disable interrupt request control bits
     COMIRQREG = 0x04  # Interrupt request bits
     DIVIRQREG = 0x05  # Interrupt request bits
     ERRORREG = 0x06  # Error bits showing the error status of the last command
@@ -21,6 +140,7 @@ class MFRC522:
     FIFOLEVELREG = 0x0A  # Number of bytes stored in the FIFO buffer
     CONTROLREG = 0x0C  # Miscellaneous control register
     BITFRAMINGREG = 0x0D  # Adjustments for bit-oriented frames
+    COLLREG = 0x0E  # Bit position of the first bit-collision detected
     MODEREG = 0x11  # Defines general modes for transmitting and receiving
     TXCONTROLREG = 0x14  # Controls the logical behavior of the antenna pins
     TXASKREG = 0x15  # Controls the setting of the transmission modulation
@@ -50,6 +170,8 @@ class MFRC522:
     MIFARE_SELECTCL1 = [0x93, 0x70]
     MIFARE_ANTICOLCL2 = [0x95, 0x20]
     MIFARE_SELECTCL2 = [0x95, 0x70]
+    MIFARE_ANTICOLCL3 = [0x97, 0x20]
+    MIFARE_SELECTCL3 = [0x97, 0x70]
     MIFARE_HALT = [0x50, 0x00]
     MIFARE_AUTHKEY1 = [0x60]
     MIFARE_AUTHKEY2 = [0x61]
@@ -403,14 +525,111 @@ class MFRC522:
     MIFARE_OK = 0
     MIFARE_NOTAGERR = 1
     MIFARE_ERR = 2
+    # Several cards answered with different bits, only the bits before the
+    # first collision are valid
+    MIFARE_COLLERR = 3
 
     MAX_LEN = 16
 
-    def __init__(self, Bus, Address):
-        self.i2cBus = SMBus(Bus)
+    # Registers only the host changes, kept in a write-through shadow cache.
+    # Volatile registers the chip updates itself (COMMANDREG, COMIRQREG,
+    # DIVIRQREG, ERRORREG, STATUS2REG, FIFODATAREG, FIFOLEVELREG,
+    # CONTROLREG, CRCRESULTREG*) are always read from the bus
+    SHADOWED_REGS = frozenset(
+        [
+            DIVIENREG,
+            COMIENREG,
+            BITFRAMINGREG,
+            MODEREG,
+            TXCONTROLREG,
+            TXASKREG,
+            TMODEREG,
+            TPRESCALERREG,
+            TRELOADREGH,
+            TRELOADREGL,
+        ]
+    )
+
+    # Polling watchdog and IRQ pin timeout (seconds) for card commands
+    IRQ_POLL_COUNT = 2000
+    IRQ_TIMEOUT = 0.1
+
+    # Largest payload of a single SMBus i2c block transfer
+    I2C_BLOCK_MAX = 32
+
+    # ISO/IEC 14443-3 CRC_A, same result as the MFRC522 CalcCRC command
+    # with CRCPreset 0x6363
+    CRC_A_TABLE = _crc_a_table()
+    CRC_A_PRESET = 0x6363
+
+    def __init__(self, Bus, Address, hostCRC=True, irqPin=None):
+        """hostCRC: compute CRC_A on the host instead of the CRC coprocessor
+        irqPin: GPIO wired to the MFRC522 IRQ line, waits on its edge instead
+        of polling COMIRQREG over i2c
+        """
+        self.i2cBus = I2CBus.acquire(Bus)
         self.i2cAddress = Address
+        self.hostCRC = hostCRC
+        self.operations = 0  # Locked sequences run so far, see _holdsBusLock
+        self.__shadow = {}
+        # Per register helper latency histograms, only bus accesses are recorded
+        labels = {"bus": Bus, "addr": hex(Address)}
+        self.__readStats = op("MFRC522.read", **labels)
+        self.__writeStats = op("MFRC522.write", **labels)
+        self.__readFIFOStats = op("MFRC522.readFIFO", **labels)
+        self.__writeFIFOStats = op("MFRC522.writeFIFO", **labels)
+        self.irqPin = irqPin
+        if irqPin is not None:
+            # IRqInv is always set in COMIENREG, so the IRQ line is active low
+            self.__irqEvent = threading.Event()
+            self.__irqGPIO = GPIO(irqPin, "in")
+            self.__irqGPIO.add_event_detect("falling", self.__onIRq)
         self.__MFRC522_init()
 
+    def close(self):
+        """Releases the shared i2c bus"""
+        if self.irqPin is not None:
+            self.__irqGPIO.remove_event_detect()
+        self.i2cBus.release()
+
+    def __onIRq(self, channel):
+        self.__irqEvent.set()
+
+    def __waitForIRq(self, waitIRq):
+        """Waits until one of the waitIRq bits is set in COMIRQREG
+
+        Returns the last COMIRQREG value and whether the wait succeeded
+        """
+        if self.irqPin is None:
+            i = self.IRQ_POLL_COUNT
+            while True:
+                comIRqReg = self.__MFRC522_read(self.COMIRQREG)
+                if comIRqReg & waitIRq:
+                    return (comIRqReg, True)
+                if i == 0:
+                    # Watchdog expired
+                    return (comIRqReg, False)
+                i -= 1
+
+        deadline = time.monotonic() + self.IRQ_TIMEOUT
+        while True:
+            # The line is shared by all enabled sources and only a new
+            # falling edge wakes the wait, so check whether it is already
+            # held low before blocking
+            self.__irqEvent.clear()
+            if not self.__irqGPIO.read():
+                comIRqReg = self.__MFRC522_read(self.COMIRQREG)
+                if comIRqReg & waitIRq:
+                    return (comIRqReg, True)
+                # Other enabled sources fired first, clear them to release
+                # the IRQ line so the next request gives a new edge
+                self.__MFRC522_write(self.COMIRQREG, comIRqReg & 0x7F & ~waitIRq)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.__irqEvent.wait(remaining):
+                # No edge seen, the command may still have finished
+                comIRqReg = self.__MFRC522_read(self.COMIRQREG)
+                return (comIRqReg, bool(comIRqReg & waitIRq))
+
     def getReaderVersion(self):
         version = None
 
@@ -423,6 +642,7 @@ class MFRC522:
 
         return version
 
+    @_holdsBusLock
     def scan(self):
         """Scans for a card and returns the UID"""
         status = None
@@ -437,6 +657,30 @@ class MFRC522:
 
         (status, backData, backBits) = self.__transceiveCard(buffer)
 
+        # Cards with different ATQA answered at the same time
+        if status == self.MIFARE_COLLERR:
+            status = self.MIFARE_OK
+
+        if (status != self.MIFARE_OK) | (backBits != 0x10):
+            status = self.MIFARE_ERR
+
+        return (status, backData, backBits)
+
+    @_holdsBusLock
+    def wakeup(self):
+        """Wakes up the cards in the field, including halted ones"""
+        # None bits of the last byte
+        self.__MFRC522_write(self.BITFRAMINGREG, 0x07)
+
+        buffer = []
+        buffer.extend(self.MIFARE_WAKEUP)
+
+        (status, backData, backBits) = self.__transceiveCard(buffer)
+
+        # Cards with different ATQA answered at the same time
+        if status == self.MIFARE_COLLERR:
+            status = self.MIFARE_OK
+
         if (status != self.MIFARE_OK) | (backBits != 0x10):
             status = self.MIFARE_ERR
 
@@ -455,6 +699,7 @@ class MFRC522:
         else:
             return True
 
+    @_holdsBusLock
     def identify(self):
         """Receives the serial number of the card"""
         status = None
@@ -477,27 +722,217 @@ class MFRC522:
 
         return (status, backData, backBits)
 
+    @_holdsBusLock
+    def selectCascade(self):
+        """Selects one card through all cascade levels
+
+        Runs the bit oriented anticollision loop on every cascade level and
+        resolves collisions towards the 1 branch, so repeated calls with
+        halt() in between enumerate every card in the field.
+        Returns (status, uid, sak) with the complete 4, 7 or 10 byte UID
+        """
+        uid = []
+
+        # No collision detected or its position is out of range
+        CollPosNotValid = 0x20
+        # All received bits are cleared after a bit-collision
+        ValuesAfterColl = 0x80
+        # SAK bit telling that the UID is not complete yet
+        CascadeBit = 0x04
+
+        self.__MFRC522_clearBitMask(self.COLLREG, ValuesAfterColl)
+
+        levels = [
+            (self.MIFARE_ANTICOLCL1, self.MIFARE_SELECTCL1),
+            (self.MIFARE_ANTICOLCL2, self.MIFARE_SELECTCL2),
+            (self.MIFARE_ANTICOLCL3, self.MIFARE_SELECTCL3),
+        ]
+        for anticol, select in levels:
+            # 4 UID bytes (or cascade tag and 3 UID bytes) and the BCC
+            serialNumber = [0, 0, 0, 0, 0]
+            knownBits = 0
+            while True:
+                byteCount = knownBits // 8
+                bitCount = knownBits % 8
+
+                buffer = [anticol[0], anticol[1] + (byteCount << 4) + bitCount]
+                buffer.extend(serialNumber[: byteCount + (1 if bitCount else 0)])
+
+                # RxAlign and TxLastBits both point at the first unknown bit
+                self.__MFRC522_write(self.BITFRAMINGREG, (bitCount << 4) | bitCount)
+
+                (status, backData, backBits) = self.__transceiveCard(buffer)
+                if status not in (self.MIFARE_OK, self.MIFARE_COLLERR) or not backData:
+                    return (self.MIFARE_NOTAGERR, uid, None)
+
+                # The first received byte completes the partially known byte
+                mask = (0xFF << bitCount) & 0xFF
+                for i, value in enumerate(backData[: 5 - byteCount]):
+                    if i == 0:
+                        value = (serialNumber[byteCount] & ~mask) | (value & mask)
+                    serialNumber[byteCount + i] = value
+
+                if status != self.MIFARE_COLLERR:
+                    break
+
+                collReg = self.__MFRC522_read(self.COLLREG)
+                if collReg & CollPosNotValid:
+                    return (self.MIFARE_ERR, uid, None)
+                collPos = collReg & 0x1F
+                if collPos == 0:
+                    collPos = 32
+                if collPos <= knownBits:
+                    return (self.MIFARE_ERR, uid, None)
+
+                # Continue with the cards that answered 1 at the collision
+                knownBits = collPos
+                serialNumber[(collPos - 1) // 8] |= 1 << ((collPos - 1) % 8)
+
+            if not self.__serialNumberValid(serialNumber):
+                return (self.MIFARE_ERR, uid, None)
+
+            # All bits of the last byte
+            self.__MFRC522_write(self.BITFRAMINGREG, 0x00)
+
+            buffer = []
+            buffer.extend(select)
+            buffer.extend(serialNumber)
+            buffer.extend(self.__calculateCRC(buffer))
+
+            (status, backData, backBits) = self.__transceiveCard(buffer)
+            if status != self.MIFARE_OK or backBits != 0x18:
+                return (self.MIFARE_ERR, uid, None)
+
+            sak = backData[0]
+            if not sak & CascadeBit:
+                uid.extend(serialNumber[0:4])
+                return (self.MIFARE_OK, uid, sak)
+            # Skip the cascade tag
+            uid.extend(serialNumber[1:4])
+
+        return (self.MIFARE_ERR, uid, None)
+
+    @_holdsBusLock
+    def selectUID(self, uid):
+        """Selects a card by its complete 4, 7 or 10 byte UID
+
+        Wakes up the field first, so cards halted by inventory() answer too,
+        then sends SELECT on every cascade level without anticollision.
+        Returns (status, sak)
+        """
+        uid = list(uid)
+        if len(uid) not in (4, 7, 10):
+            return (self.MIFARE_ERR, None)
+
+        # A card that is still selected drops back to IDLE on the first WUPA
+        # without answering (other halted cards may answer instead), so the
+        # whole sequence is tried twice
+        status = self.MIFARE_NOTAGERR
+        for attempt in range(2):
+            (status, backData, backBits) = self.wakeup()
+            if status != self.MIFARE_OK:
+                status = self.MIFARE_NOTAGERR
+                continue
+            (status, sak) = self.__selectLevels(uid)
+            if status == self.MIFARE_OK:
+                return (status, sak)
+        return (status, None)
+
+    def __selectLevels(self, uid):
+        """Sends SELECT with the known UID on every cascade level"""
+        # Precedes the first 3 UID bytes on every level but the last
+        CascadeTag = 0x88
+        # SAK bit telling that the UID is not complete yet
+        CascadeBit = 0x04
+
+        levels = [self.MIFARE_SELECTCL1, self.MIFARE_SELECTCL2, self.MIFARE_SELECTCL3]
+        lastLevel = len(uid) // 3 - 1
+        for level, select in enumerate(levels[: lastLevel + 1]):
+            if level == lastLevel:
+                serialNumber = uid[level * 3 : level * 3 + 4]
+            else:
+                serialNumber = [CascadeTag] + uid[level * 3 : level * 3 + 3]
+            serialNumber.append(
+                serialNumber[0] ^ serialNumber[1] ^ serialNumber[2] ^ serialNumber[3]
+            )
+
+            # All bits of the last byte
+            self.__MFRC522_write(self.BITFRAMINGREG, 0x00)
+
+            buffer = []
+            buffer.extend(select)
+            buffer.extend(serialNumber)
+            buffer.extend(self.__calculateCRC(buffer))
+
+            (status, backData, backBits) = self.__transceiveCard(buffer)
+            if status != self.MIFARE_OK or backBits != 0x18:
+                return (self.MIFARE_ERR, None)
+
+            sak = backData[0]
+            if not sak & CascadeBit:
+                if level != lastLevel:
+                    return (self.MIFARE_ERR, None)
+                return (self.MIFARE_OK, sak)
+
+        return (self.MIFARE_ERR, None)
+
+    @_holdsBusLock
+    def halt(self):
+        """Sets the selected card to the HALT state"""
+        self.__MFRC522_write(self.BITFRAMINGREG, 0x00)
+
+        buffer = []
+        buffer.extend(self.MIFARE_HALT)
+        buffer.extend(self.__calculateCRC(buffer))
+
+        # A halted card does not answer, the timeout is expected
+        self.__transceiveCard(buffer)
+
+    @_holdsBusLock
+    def inventory(self, maxCards=16):
+        """Finds every card in the field
+
+        Each card is selected through all cascade levels and halted, so the
+        next request is only answered by the cards not found yet.
+        Returns a list of (uid, sak)
+        """
+        cards = []
+        while len(cards) < maxCards:
+            (status, backData, backBits) = self.scan()
+            if status != self.MIFARE_OK:
+                break
+            (status, uid, sak) = self.selectCascade()
+            if status != self.MIFARE_OK or any(uid == card[0] for card in cards):
+                break
+            cards.append((uid, sak))
+            self.halt()
+        return cards
+
+    @_holdsBusLock
     def __transceiveCard(self, data):
         """Transceives data trough the reader/writer from and to the card"""
         status = None
         backData = []
         backBits = None
 
+        # The timer has decrement the value in TCounterValReg register to zero
+        TimerIRq = 0x01
+        # The receiver has detected the end of a valid data stream
+        RxIRq = 0x20
+        # A command was terminated or unknown command is started
+        IdleIRq = 0x10
+        waitIRq = TimerIRq | RxIRq | IdleIRq
+
+        # Only the awaited sources drive the IRQ line, the enable bits have
+        # the same positions as the request bits
         IRqInv = 0x80  # Signal on pin IRQ is inverted
-        TxIEn = 0x40  # Allow the transmitter to interrupt requests
-        RxIEn = 0x20  # Allow the receiver to interrupt requests
-        IdleIEn = 0x10  # Allow the idle interrupt request
-        LoAlertIEn = 0x04  # Allow the low Alert interrupt request
-        ErrIEn = 0x02  # Allow the error interrupt request
-        TimerIEn = 0x01  # Allow the timer interrupt request
-        self.__MFRC522_write(
-            self.COMIENREG,
-            (IRqInv | TxIEn | RxIEn | IdleIEn | LoAlertIEn | ErrIEn | TimerIEn),
-        )
+        self.__MFRC522_write(self.COMIENREG, IRqInv | waitIRq)
 
         # Indicates that the bits in the ComIrqReg register are set
         Set1 = 0x80
         self.__MFRC522_clearBitMask(self.COMIRQREG, Set1)
+        if self.irqPin is not None:
+            self.__irqEvent.clear()
 
         # Immediatly clears the internal FIFO buffer's read and write pointer
         # and ErrorReg register's BufferOvfl bit
@@ -508,8 +943,7 @@ class MFRC522:
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_IDLE)
 
         # Write data in FIFO register
-        for i in range(0, len(data)):
-            self.__MFRC522_write(self.FIFODATAREG, data[i])
+        self.__MFRC522_writeFIFO(data)
 
         # Countinously repeat the transmission of data from the FIFO buffer and
         # the reception of data from the RF field.
@@ -520,36 +954,14 @@ class MFRC522:
         StartSend = 0x80
         self.__MFRC522_setBitMask(self.BITFRAMINGREG, StartSend)
 
-        # The timer has decrement the value in TCounterValReg register to zero
-        TimerIRq = 0x01
-        # The receiver has detected the end of a valid data stream
-        RxIRq = 0x20
-        # A command was terminated or unknown command is started
-        IdleIRq = 0x10
-
         # Wait for an interrupt
-        i = 2000
-        while True:
-            comIRqReg = self.__MFRC522_read(self.COMIRQREG)
-            if comIRqReg & TimerIRq:
-                # Timeout
-                break
-            if comIRqReg & RxIRq:
-                # Valid data available in FIFO
-                break
-            if comIRqReg & IdleIRq:
-                # Command terminate
-                break
-            if i == 0:
-                # Watchdog expired
-                break
-            i -= 1
+        (comIRqReg, completed) = self.__waitForIRq(waitIRq)
 
         # Clear the StartSend bit in BitFramingReg register
         self.__MFRC522_clearBitMask(self.BITFRAMINGREG, StartSend)
 
         # Retrieve data from FIFODATAREG
-        if i != 0:
+        if completed:
             # The host or a MFRC522's internal state machine tries to write
             # data to the FIFO buffer even though it is already full
             BufferOvfl = 0x10
@@ -563,15 +975,16 @@ class MFRC522:
             errorTest = BufferOvfl | ColErr | ParityErr | ProtocolErr
             errorReg = self.__MFRC522_read(self.ERRORREG)
 
-            # Test if any of the errors above happend
-            if ~(errorReg & errorTest):
+            # Test if any of the errors above happend. A collision alone is
+            # reported as MIFARE_COLLERR with the bits received before it,
+            # the anticollision loop continues from the collision position
+            if not (errorReg & errorTest & ~ColErr):
                 status = self.MIFARE_OK
+                if errorReg & ColErr:
+                    status = self.MIFARE_COLLERR
 
-                # Indicates any error bit in thr ErrorReg register is set
-                ErrIRq = 0x02
-
-                # Test if the timer expired and an error occured
-                if comIRqReg & TimerIRq & ErrIRq:
+                # The timer expired before anything was received
+                if comIRqReg & TimerIRq and not comIRqReg & RxIRq:
                     status = self.MIFARE_NOTAGERR
 
                 fifoLevelReg = self.__MFRC522_read(self.FIFOLEVELREG)
@@ -583,7 +996,7 @@ class MFRC522:
                     fifoLevelReg = self.MAX_LEN
 
                 # Indicates the number of valid bits in the last received byte
-                RxLastBits = 0x08
+                RxLastBits = 0x07
 
                 lastBits = self.__MFRC522_read(self.CONTROLREG) & RxLastBits
 
@@ -593,15 +1006,30 @@ class MFRC522:
                     backBits = fifoLevelReg * 8
 
                 # Read data from FIFO register
-                for i in range(0, fifoLevelReg):
-                    backData.append(self.__MFRC522_read(self.FIFODATAREG))
+                backData.extend(self.__MFRC522_readFIFO(fifoLevelReg))
 
             else:
-                status.MIFARE_ERR
+                status = self.MIFARE_ERR
 
         return (status, backData, backBits)
 
+    @classmethod
+    def calculateCRC_A(cls, data):
+        """Calculates the CRC_A of a frame on the host, LSB first"""
+        crc = cls.CRC_A_PRESET
+        table = cls.CRC_A_TABLE
+        for byte in data:
+            crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+        return [crc & 0xFF, crc >> 8]
+
     def __calculateCRC(self, data):
+        """Calculates the CRC of a frame on the host or the reader/writer"""
+        if self.hostCRC:
+            return self.calculateCRC_A(data)
+        return self.__calculateReaderCRC(data)
+
+    @_holdsBusLock
+    def __calculateReaderCRC(self, data):
         """Uses the reader/writer to calculate CRC"""
         # Clear the bit that indicates taht the CalcCRC command is active
         # and all data is processed
@@ -614,10 +1042,7 @@ class MFRC522:
         self.__MFRC522_setBitMask(self.FIFOLEVELREG, FlushBuffer)
 
         # Write data to FIFO
-        i = 0
-        while i < len(data):
-            self.__MFRC522_write(self.FIFODATAREG, data[i])
-            i = i + 1
+        self.__MFRC522_writeFIFO(data)
 
         # Execute CRC calculation
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_CALCCRC)
@@ -639,6 +1064,7 @@ class MFRC522:
 
         return crc
 
+    @_holdsBusLock
     def select(self, serialNumber):
         """Selects a card with a given serial number"""
         status = None
@@ -660,6 +1086,7 @@ class MFRC522:
 
         return (status, backData, backBits)
 
+    @_holdsBusLock
     def authenticate(self, mode, blockAddr, key, serialNumber):
         """Authenticates the card"""
         status = None
@@ -680,6 +1107,7 @@ class MFRC522:
 
         return (status, backData, backBits)
 
+    @_holdsBusLock
     def deauthenticate(self):
         """Deauthenticates the card"""
         # Indicates that the MIFARE Crypto1 unit is switched on and
@@ -689,19 +1117,30 @@ class MFRC522:
         MFCrypto1On = 0x08
         self.__MFRC522_clearBitMask(self.STATUS2REG, MFCrypto1On)
 
+    @_holdsBusLock
     def __authenticateCard(self, data):
         status = None
         backData = []
         backBits = None
 
+        # The timer has decrement the value in TCounterValReg register to zero
+        TimerIRq = 0x01
+        # The receiver has detected the end of a valid data stream
+        RxIRq = 0x20
+        # A command was terminated or unknown command is started
+        IdleIRq = 0x10
+        waitIRq = TimerIRq | RxIRq | IdleIRq
+
+        # Only the awaited sources drive the IRQ line. When the card does
+        # not answer MFAuthent only ends with TimerIRq
         IRqInv = 0x80  # Signal on pin IRQ is inverted
-        IdleIEn = 0x10  # Allow the idle interrupt request
-        ErrIEn = 0x02  # Allow the error interrupt request
-        self.__MFRC522_write(self.COMIENREG, (IRqInv | IdleIEn | ErrIEn))
+        self.__MFRC522_write(self.COMIENREG, IRqInv | waitIRq)
 
         # Indicates that the bits in the ComIrqReg register are set
         Set1 = 0x80
         self.__MFRC522_clearBitMask(self.COMIRQREG, Set1)
+        if self.irqPin is not None:
+            self.__irqEvent.clear()
 
         # Immedialty clears the interl FIFO buffer's read and write pointer
         # and ErrorReg register's BufferOvfl bit
@@ -712,46 +1151,21 @@ class MFRC522:
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_IDLE)
 
         # Write data in FIFO register
-        i = 0
-        while i < len(data):
-            self.__MFRC522_write(self.FIFODATAREG, data[i])
-            i = i + 1
+        self.__MFRC522_writeFIFO(data)
 
         # This command manages MIFARE authentication to anable a secure
         # communication to any MIFARE card
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_MFAUTHENT)
 
-        # The timer has decrement the value in TCounterValReg register to zero
-        TimerIRq = 0x01
-        # The receiver has detected the end of a valid data stream
-        RxIRq = 0x20
-        # A command was terminated or unknown command is started
-        IdleIRq = 0x10
-
         # Wait for an interrupt
-        i = 2000
-        while True:
-            comIRqReg = self.__MFRC522_read(self.COMIRQREG)
-            if comIRqReg & TimerIRq:
-                # Timeout
-                break
-            if comIRqReg & RxIRq:
-                # Valid data available in FIFO
-                break
-            if comIRqReg & IdleIRq:
-                # Command terminate
-                break
-            if i == 0:
-                # Watchdog expired
-                break
-            i -= 1
+        (comIRqReg, completed) = self.__waitForIRq(waitIRq)
 
         # Clear the StartSend bit in BitFramingReg register
         StartSend = 0x80
         self.__MFRC522_clearBitMask(self.BITFRAMINGREG, StartSend)
 
         # Retrieve data from FIFODATAREG
-        if i != 0:
+        if completed:
             # The host or a MFRC522's internal state machine tries to write
             # data to the FIFO buffer even though it is already full
             BufferOvfl = 0x10
@@ -766,14 +1180,12 @@ class MFRC522:
             errorReg = self.__MFRC522_read(self.ERRORREG)
 
             # Test if any of the errors above happend
-            if ~(errorReg & errorTest):
+            if not (errorReg & errorTest):
                 status = self.MIFARE_OK
 
-                # Indicates any error bit in thr ErrorReg register is set
-                ErrIRq = 0x02
-
-                # Test if the timer expired and an error occured
-                if comIRqReg & TimerIRq & ErrIRq:
+                # The timer expired without the command finishing, the card
+                # did not answer the authentication
+                if comIRqReg & TimerIRq and not comIRqReg & IdleIRq:
                     status = self.MIFARE_NOTAGERR
 
             else:
@@ -781,6 +1193,7 @@ class MFRC522:
 
         return (status, backData, backBits)
 
+    @_holdsBusLock
     def read(self, blockAddr):
         """Reads data from the card"""
         status = None
@@ -798,8 +1211,13 @@ class MFRC522:
 
         return (status, backData, backBits)
 
+    @_holdsBusLock
     def write(self, blockAddr, data):
-        """Writes data to the card"""
+        """Writes data to the card
+
+        The card answers both phases with a 4 bit ACK, a NAK or no answer
+        is reported as MIFARE_ERR
+        """
         status = None
         backData = []
         backBits = None
@@ -812,6 +1230,8 @@ class MFRC522:
         buffer.extend(crc)
 
         (status, backData, backBits) = self.__transceiveCard(buffer)
+        if status == self.MIFARE_OK and not self.__isAck(backData, backBits):
+            status = self.MIFARE_ERR
 
         if status == self.MIFARE_OK:
 
@@ -822,9 +1242,16 @@ class MFRC522:
             buffer.extend(crc)
 
             (status, backData, backBits) = self.__transceiveCard(buffer)
+            if status == self.MIFARE_OK and not self.__isAck(backData, backBits):
+                status = self.MIFARE_ERR
 
         return (status, backData, backBits)
 
+    def __isAck(self, backData, backBits):
+        """Tests for the 4 bit ACK of the card"""
+        ACK = 0x0A
+        return backBits == 4 and len(backData) == 1 and backData[0] & 0x0F == ACK
+
     def __MFRC522_antennaOn(self):
         """Activates the reader/writer antenna"""
         value = self.__MFRC522_read(self.TXCONTROLREG)
@@ -838,7 +1265,10 @@ class MFRC522:
     def __MFRC522_reset(self):
         """Resets the reader/writer"""
         self.__MFRC522_write(self.COMMANDREG, self.MFRC522_SOFTRESET)
+        # Soft reset restores every register to its reset value
+        self.__shadow.clear()
 
+    @_holdsBusLock
     def __MFRC522_init(self):
         """Initialization sequence"""
         self.__MFRC522_reset()
@@ -878,23 +1308,70 @@ class MFRC522:
             self.MODEREG, ((ResetVal & FeatureMask) | TxWaitRF | PolMFin | CRCPreset)
         )
 
+        if self.irqPin is not None:
+            # Drive the IRQ pin as a standard CMOS output
+            IRQPushPull = 0x80
+            self.__MFRC522_write(self.DIVIENREG, IRQPushPull)
+
         # Activate antenna
         self.__MFRC522_antennaOn()
 
     def __MFRC522_read(self, address):
         """Read data from an address on the i2c bus"""
-        value = self.i2cBus.read_byte_data(self.i2cAddress, address)
+        value = self.__shadow.get(address)
+        if value is not None:
+            return value
+        value = self.__readStats.call(
+            self.i2cBus.read_byte_data, self.i2cAddress, address
+        )
+        if address in self.SHADOWED_REGS:
+            self.__shadow[address] = value
         return value
 
     def __MFRC522_write(self, address, value):
         """Write data on an address on the i2c bus"""
-        self.i2cBus.write_byte_data(self.i2cAddress, address, value)
+        self.__writeStats.call(
+            self.i2cBus.write_byte_data, self.i2cAddress, address, value
+        )
+        if address in self.SHADOWED_REGS:
+            self.__shadow[address] = value & 0xFF
 
+    def __MFRC522_writeFIFO(self, data):
+        """Write data to the FIFO with i2c block transfers
+
+        The MFRC522 does not increment the register address during a
+        multi-byte i2c access, so every byte of a block lands in the FIFO.
+        """
+        for i in range(0, len(data), self.I2C_BLOCK_MAX):
+            self.__writeFIFOStats.call(
+                self.i2cBus.write_i2c_block_data,
+                self.i2cAddress,
+                self.FIFODATAREG,
+                data[i:i + self.I2C_BLOCK_MAX],
+            )
+
+    def __MFRC522_readFIFO(self, length):
+        """Read length bytes from the FIFO with i2c block transfers"""
+        data = []
+        while len(data) < length:
+            count = min(length - len(data), self.I2C_BLOCK_MAX)
+            data.extend(
+                self.__readFIFOStats.call(
+                    self.i2cBus.read_i2c_block_data,
+                    self.i2cAddress,
+                    self.FIFODATAREG,
+                    count,
+                )
+            )
+        return data
+
+    @_holdsBusLock
     def __MFRC522_setBitMask(self, address, mask):
         """Set bits according to a mask on a address on the i2c bus"""
         value = self.__MFRC522_read(address)
         self.__MFRC522_write(address, value | mask)
 
+    @_holdsBusLock
     def __MFRC522_clearBitMask(self, address, mask):
         """Resets bits according to a mask on a address on the i2c bus"""
         value = self.__MFRC522_read(address)
@@ -908,29 +1385,34 @@ class RC522:
         self.MFRC522Reader = MFRC522(i2cBus, i2cAddress)
 
     def scan(self):
-        (status, backData, tagType) = self.MFRC522Reader.scan()
-        if status == self.MFRC522Reader.MIFARE_OK:
-            print(f"Card detected, Type: {tagType}")
-
-            # Get UID of the card
-            (status, uid, backBits) = self.MFRC522Reader.identify()
+        with self.MFRC522Reader.i2cBus.lock:
+            (status, backData, tagType) = self.MFRC522Reader.scan()
             if status == self.MFRC522Reader.MIFARE_OK:
-                return (tagType, uid)
-            else:
-                return (tagType, None)
+                print(f"Card detected, Type: {tagType}")
+
+                # Get UID of the card
+                (status, uid, backBits) = self.MFRC522Reader.identify()
+                if status == self.MFRC522Reader.MIFARE_OK:
+                    return (tagType, uid)
+                else:
+                    return (tagType, None)
 
         return (None, None)
 
     def read(self, uid: list, blockAddr: int):
+        # 选卡、认证和读取之间不允许其他线程访问读卡器
+        with self.MFRC522Reader.i2cBus.lock:
+            return self._read(uid, blockAddr)
+
+    def _read(self, uid, blockAddr):
         # Select the scanned card
-        (status, backData, backBits) = self.MFRC522Reader.select(uid)
-        if status == self.MFRC522Reader.MIFARE_OK:
+        if self._select(uid):
             # Authenticate
             (status, backData, backBits) = self.MFRC522Reader.authenticate(
                 self.MFRC522Reader.MIFARE_AUTHKEY1,
                 blockAddr,
                 self.MFRC522Reader.MIFARE_KEY,
-                uid,
+                self._auth_uid(uid),
             )
             if status == self.MFRC522Reader.MIFARE_OK:
                 # Read data from card
@@ -946,6 +1428,148 @@ class RC522:
         else:
             print("read: card miss")
 
+    @staticmethod
+    def _sectors(card="1K"):
+        """
+        按扇区尾块布局把数据块分组，返回 [(扇区尾块地址, [数据块地址, ...]), ...]
+        """
+        if card == "4K":
+            trailers = MFRC522.MIFARE_4K_SECTORTRAILER
+            datablocks = MFRC522.MIFARE_4K_DATABLOCK
+        else:
+            trailers = MFRC522.MIFARE_1K_SECTORTRAILER
+            datablocks = MFRC522.MIFARE_1K_DATABLOCK
+        sectors = [(trailer, []) for trailer in trailers]
+        for block in datablocks:
+            sectors[bisect.bisect_left(trailers, block)][1].append(block)
+        return sectors
+
+    def _select(self, uid):
+        """
+        选卡。scan() 得到的 5 字节卡号 (一级卡号 + BCC) 直接选卡；
+        inventory() 得到的 4/7/10 字节完整卡号先唤醒再逐级选卡，HALT 状态的卡也能选中。
+
+        :return: 是否选中
+        """
+        reader = self.MFRC522Reader
+        if len(uid) == 5:
+            (status, backData, backBits) = reader.select(uid)
+        else:
+            reader.deauthenticate()
+            (status, sak) = reader.selectUID(uid)
+        return status == reader.MIFARE_OK
+
+    @staticmethod
+    def _auth_uid(uid):
+        """
+        认证使用的 4 字节卡号：5 字节卡号取前 4 字节，7/10 字节卡号取最后 4 字节。
+        """
+        return list(uid[:4]) if len(uid) == 5 else list(uid[-4:])
+
+    def _reselect(self, uid):
+        """
+        认证失败或其他调用方用过读卡器后，重新唤醒并选卡。
+        """
+        reader = self.MFRC522Reader
+        with reader.i2cBus.lock:
+            reader.deauthenticate()
+            if len(uid) == 5:
+                # 仍处于选中状态的卡收到第一次 REQA 时不应答，回到空闲状态
+                for attempt in range(2):
+                    (status, backData, tagType) = reader.scan()
+                    if status == reader.MIFARE_OK:
+                        break
+            return self._select(uid)
+
+    def inventory(self, maxCards: int = 16):
+        """
+        一次性读取场内所有卡片的完整卡号 (支持 4/7/10 字节 UID)，读到的卡会被置为 HALT 状态。
+        返回的卡号可以直接传给 read()、dump()、iter_blocks() 和 write_many()。
+
+        :return: [(uid, sak), ...]
+        """
+        return self.MFRC522Reader.inventory(maxCards)
+
+    def iter_blocks(self, uid: list, card: str = "1K", key: list = None):
+        """
+        逐块读取整张卡的数据块，每个扇区只选卡/认证一次。
+        每个扇区的选卡、认证和读取期间持有总线锁，整个扇区读完后再产出。
+        两个扇区之间其他调用方用过读卡器时，先重新选卡再认证。
+
+        :param uid: scan() 或 inventory() 得到的卡号
+        :param card: "1K" 或 "4K"
+        :param key: 扇区密钥 A，默认 MIFARE_KEY
+        :return: 生成器，产出 (blockAddr, bytes)，读取失败的块为 (blockAddr, None)
+        """
+        reader = self.MFRC522Reader
+        if key is None:
+            key = reader.MIFARE_KEY
+        operations = None  # 上一个扇区读完时的 reader.operations，None 表示还没有选卡
+        try:
+            for trailer, blocks in self._sectors(card):
+                with reader.i2cBus.lock:
+                    if operations is None:
+                        selected = self._select(uid)
+                    elif operations != reader.operations:
+                        selected = self._reselect(uid)
+                    if not selected:
+                        print("dump: card miss")
+                        return
+                    (sector, selected) = self._read_sector(uid, trailer, blocks, key)
+                    operations = reader.operations
+                yield from sector
+                if not selected:
+                    print("dump: card miss")
+                    return
+        finally:
+            reader.deauthenticate()
+
+    def _read_sector(self, uid, trailer, blocks, key):
+        """
+        认证并读取一个扇区的数据块。
+
+        :return: ([(blockAddr, bytes 或 None), ...], 卡片是否仍处于选中状态)
+        """
+        reader = self.MFRC522Reader
+        (status, backData, backBits) = reader.authenticate(
+            reader.MIFARE_AUTHKEY1, trailer, key, self._auth_uid(uid)
+        )
+        if status != reader.MIFARE_OK:
+            print(f"dump: Authenticate error, sector trailer {trailer}")
+            return ([(block, None) for block in blocks], self._reselect(uid))
+        sector = []
+        for block in blocks:
+            (status, backData, backBits) = reader.read(block)
+            if status == reader.MIFARE_OK:
+                sector.append((block, bytes(backData[:16])))
+            else:
+                print(f"dump: read error, block {block}")
+                sector.append((block, None))
+        return (sector, True)
+
+    def dump(self, uid: list, card: str = "1K", key: list = None):
+        """
+        读取整张卡的全部数据块，按 MIFARE_1K_DATABLOCK / MIFARE_4K_DATABLOCK 的顺序
+        拼接为一个缓冲区，每块 16 字节，读取失败的块填 0。
+
+        :return: memoryview，选卡失败时返回 None
+        """
+        datablocks = (
+            MFRC522.MIFARE_4K_DATABLOCK if card == "4K" else MFRC522.MIFARE_1K_DATABLOCK
+        )
+        buffer = bytearray(16 * len(datablocks))
+        offset = {block: i * 16 for i, block in enumerate(datablocks)}
+        found = False
+        # 整张卡读完之前不允许其他线程访问读卡器
+        with self.MFRC522Reader.i2cBus.lock:
+            for block, data in self.iter_blocks(uid, card, key):
+                found = True
+                if data is not None:
+                    buffer[offset[block]:offset[block] + len(data)] = data
+        if not found:
+            return None
+        return memoryview(buffer)
+
     def write(
         self,
         blockAddr: int,
@@ -958,11 +1582,168 @@ class RC522:
         """
         return self.MFRC522Reader.write(blockAddr, data)
 
+    def write_many(
+        self,
+        uid: list,
+        blocks: dict,
+        key: list = None,
+        verify: bool = False,
+        allow_trailers: bool = False,
+        allow_manufacturer: bool = False,
+    ):
+        """
+        批量写入多个数据块：按扇区分组，每个扇区只认证一次，可选在同一会话中回读校验。
+
+        扇区尾块保存密钥和访问控制位，写错会使整个扇区无法再认证，块 0 为厂商块，
+        默认都拒绝写入。
+
+        :param uid: scan() 或 inventory() 得到的卡号
+        :param blocks: {blockAddr: bytes/list}，数据块不超过 16 字节，不足补 0；尾块和块 0 必须正好 16 字节
+        :param key: 扇区密钥 A，默认 MIFARE_KEY
+        :param verify: 写入后回读并比较
+        :param allow_trailers: 允许写入扇区尾块 (3、7、…)
+        :param allow_manufacturer: 允许写入块 0
+        :return: {blockAddr: MIFARE_OK / MIFARE_ERR / MIFARE_NOTAGERR}
+        """
+        reader = self.MFRC522Reader
+        if key is None:
+            key = reader.MIFARE_KEY
+        # 4K 的扇区尾块表同时覆盖 1K 卡的全部块
+        trailers = MFRC522.MIFARE_4K_SECTORTRAILER
+        payloads = {}
+        for block, data in blocks.items():
+            if not 0 <= block <= trailers[-1]:
+                raise ValueError(f"block {block}: 超出范围 0-{trailers[-1]}")
+            data = list(data)
+            if block == 0 or block in trailers:
+                if block == 0 and not allow_manufacturer:
+                    raise ValueError("block 0: 厂商块默认不可写，需要 allow_manufacturer=True")
+                if block in trailers and not allow_trailers:
+                    raise ValueError(f"block {block}: 扇区尾块默认不可写，需要 allow_trailers=True")
+                if len(data) != 16:
+                    raise ValueError(f"block {block}: 必须正好 16 字节")
+            elif len(data) > 16:
+                raise ValueError(f"block {block}: 每块最多 16 字节")
+            payloads[block] = data + [0] * (16 - len(data))
+
+        sectors = {}
+        for block in sorted(payloads):
+            trailer = trailers[bisect.bisect_left(trailers, block)]
+            sectors.setdefault(trailer, []).append(block)
+
+        result = {block: reader.MIFARE_NOTAGERR for block in payloads}
+        # 整个批量写入期间不允许其他线程访问读卡器
+        with reader.i2cBus.lock:
+            if not self._select(uid):
+                print("write_many: card miss")
+                return result
+            try:
+                for trailer, sector_blocks in sectors.items():
+                    (status, backData, backBits) = reader.authenticate(
+                        reader.MIFARE_AUTHKEY1, trailer, key, self._auth_uid(uid)
+                    )
+                    if status != reader.MIFARE_OK:
+                        print(f"write_many: Authenticate error, sector trailer {trailer}")
+                        for block in sector_blocks:
+                            result[block] = reader.MIFARE_ERR
+                        if not self._reselect(uid):
+                            print("write_many: card miss")
+                            return result
+                        continue
+                    for block in sector_blocks:
+                        (status, backData, backBits) = reader.write(block, payloads[block])
+                        if status == reader.MIFARE_OK and verify:
+                            (status, backData, backBits) = reader.read(block)
+                            if status == reader.MIFARE_OK and backData[:16] != payloads[block]:
+                                print(f"write_many: verify error, block {block}")
+                                status = reader.MIFARE_ERR
+                        result[block] = status
+            finally:
+                reader.deauthenticate()
+        return result
+
+    def close(self):
+        self.MFRC522Reader.close()
+
+    def _bus_key(self):
+        return ("i2c", self.MFRC522Reader.i2cBus.number)
+
+    async def ascan(self):
+        return await run_on(self._bus_key(), self.scan)
+
+    async def aread(self, uid: list, blockAddr: int):
+        return await run_on(self._bus_key(), self.read, uid, blockAddr)
+
+    async def awrite(self, blockAddr: int, data: list = [0] * 16):
+        return await run_on(self._bus_key(), self.write, blockAddr, data)
+
 
 class RGB:
+    """
+    24 颗彩灯的帧缓冲。set_pixel()/fill() 只修改缓冲区，show() 仅在内容变化时发送，
+    set() 等价于整体写入缓冲区后调用 show()。
+    """
+
+    SUBLINE = 7  # 固定的总线编号
+    SUBPIN = 0x24  # 固定的设备地址
+    LENGTH = 24  # 彩灯数量
+    FRAME_START = 200
+    FRAME_END = 99
 
     def __init__(self):
-        pass
+        self.bus = I2CBus.acquire(RGB.SUBLINE)
+        # 预分配完整报文 [200] + colors + [99]，颜色数据原地修改
+        self._frame = bytearray(RGB.LENGTH * 3 + 2)
+        self._frame[0] = RGB.FRAME_START
+        self._frame[-1] = RGB.FRAME_END
+        self.pixels = memoryview(self._frame)[1:-1]
+        self.dirty = True  # 上电后彩灯状态未知，首帧必须发送
+        labels = {"bus": RGB.SUBLINE, "addr": hex(RGB.SUBPIN)}
+        self._set_stats = op("RGB.set", **labels)
+        self._show_stats = op("RGB.show", **labels)
+
+    def set_pixel(self, index, color):
+        """
+        修改单颗彩灯的颜色 (不立即发送)。
+
+        :param index: 彩灯序号 0~23
+        :param color: (r, g, b)
+        """
+        offset = index * 3
+        color = bytes(color)
+        if self.pixels[offset:offset + 3] != color:
+            self.pixels[offset:offset + 3] = color
+            self.dirty = True
+
+    def fill(self, color):
+        """
+        将所有彩灯设为同一颜色 (不立即发送)。
+        """
+        self.set_pixels(bytes(color) * RGB.LENGTH)
+
+    def show(self, force=False):
+        """
+        缓冲区有变化时发送整帧。
+
+        :param force: 为 True 时无论是否变化都发送
+        :return: 是否实际发送
+        """
+        if not (self.dirty or force):
+            return False
+        msg = smbus2.i2c_msg.write(RGB.SUBPIN, self._frame)
+        self._show_stats.call(self.bus.i2c_rdwr, msg)
+        self.dirty = False
+        return True
+
+    def set_pixels(self, data):
+        """
+        整体写入颜色数据 (不立即发送)。
+
+        :param data: 长度为 LENGTH * 3 的 bytes，按 r, g, b 顺序排列
+        """
+        if self.pixels != data:
+            self.pixels[:] = data
+            self.dirty = True
 
     def set(self, data):
         """
@@ -971,21 +1752,33 @@ class RGB:
          or
          [255, 0, 0, 0, 255, 0, 0, 0, 255]
         """
+        start = now_ns()
         flattened_list = []
         for tup in data:
             try:
                 flattened_list.extend(tup)
             except:
                 flattened_list.append(tup)
-        flattened_list = flattened_list + [0] * (24 * 3 - len(flattened_list))
-        with smbus2.SMBus(7) as bus:
-            msg = smbus2.i2c_msg.write(0x24, [200] + flattened_list + [99])
-            bus.i2c_rdwr(msg)
+        # 多余的数据超出帧长度，直接截断
+        flattened_list = flattened_list[: RGB.LENGTH * 3]
+        flattened_list = flattened_list + [0] * (RGB.LENGTH * 3 - len(flattened_list))
+        self.set_pixels(bytes(flattened_list))
+        self.show()
+        self._set_stats.observe(now_ns() - start)
+
+    async def aset(self, data):
+        """
+        set() 的异步版本，与同一总线上的其他异步调用串行执行。
+        """
+        return await run_on(("i2c", RGB.SUBLINE), self.set, data)
 
     def close(self):
-        with smbus2.SMBus(7) as bus:
-            msg = smbus2.i2c_msg.write(0x24, [200] + [0, 0, 0] * 24 + [99])
-            bus.i2c_rdwr(msg)
+        """
+        熄灭所有彩灯并释放共享总线。
+        """
+        self.fill((0, 0, 0))
+        self.show(force=True)
+        self.bus.release()
 
 
 class Ultrasound:
@@ -993,15 +1786,108 @@ class Ultrasound:
     最大测距理论值小于343
     """
 
-    def __init__(self, trigger_pin=4, echo_pin=5, max_cm=None, timeout=0.2,debug=False):
+    def __init__(self, trigger_pin=4, echo_pin=5, max_cm=None, timeout=0.2,debug=False, edge=False, echo_line=None):
+        """
+        :param edge: 为 True 时按回声的上升/下降沿事件计时，不再忙等轮询
+        :param echo_line: 回声引脚对应的 GPIO 字符设备线，例如 ("/dev/gpiochip0", 105)。
+                          给出时 edge 模式使用内核记录的边沿时间戳 (需要 python-periphery)，与 rk3390 相同。
+
+        Jetson.GPIO 不提供边沿的内核时间戳，也没有公开的 BCM 编号到字符设备线的映射。
+        不给出 echo_line 时，edge 模式的时间取自 Jetson.GPIO 事件线程中的 time.perf_counter()，
+        包含回调线程的调度延迟，读数会偏大且抖动，所以默认仍使用轮询。
+        """
         # set GPIO Pins
         self.trigger = GPIO(trigger_pin, "out")
-        self.echo = GPIO(echo_pin, "in")
+        self.echo_pin = echo_pin
+        if edge and echo_line is not None:
+            path, offset = echo_line
+            self.echo = periphery.GPIO(path, offset, "in", edge="both")
+        else:
+            self.echo = GPIO(echo_pin, "in")
+        self.echo_line = echo_line
         self.max_cm = max_cm
         self.timeout = timeout  # 超时时间（秒）
         self.debug = debug
+        self.edge = edge
+        self.timeouts = counter(
+            "exboard_ultrasound_timeouts_total",
+            "Ultrasound.read calls that timed out and returned 0",
+            echo_pin=echo_pin,
+        )
+        if edge and echo_line is None:
+            self._edges = []
+            self._echo_done = threading.Event()
+            self.echo.add_event_detect("both", self._on_echo_edge)
+
+    def _on_echo_edge(self, channel):
+        # 在 Jetson.GPIO 的事件线程中执行，依次记录上升沿和下降沿的时间。
+        # 记录的是回调开始执行的时间而不是边沿发生的时间
+        self._edges.append(time.perf_counter())
+        if len(self._edges) >= 2:
+            self._echo_done.set()
+
+    def _read_edge(self):
+        self._edges = []
+        self._echo_done.clear()
+        self.trigger.write(True)
+        time.sleep(0.00001)
+        self.trigger.write(False)
+
+        if not self._echo_done.wait(self.timeout):
+            if self._edges and self.max_cm is not None:
+                # 回声持续时间超过最大量程
+                return self.max_cm
+            if self.debug:
+                print("未检测到回声" if not self._edges else "能检测到回声信号，但是滞后超时")
+            self.timeouts.inc()
+            return 0
+
+        return self._distance(self._edges[1] - self._edges[0])
+
+    def _read_line_events(self):
+        # 丢弃上一次测量残留的事件
+        while self.echo.poll(0):
+            self.echo.read_event()
+
+        self.trigger.write(True)
+        time.sleep(0.00001)
+        self.trigger.write(False)
+
+        deadline = time.monotonic() + self.timeout
+        rise = None
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.echo.poll(remaining):
+                if rise is not None and self.max_cm is not None:
+                    # 回声持续时间超过最大量程
+                    return self.max_cm
+                if self.debug:
+                    print("未检测到回声" if rise is None else "能检测到回声信号，但是滞后超时")
+                self.timeouts.inc()
+                return 0
+            event = self.echo.read_event()
+            if event.edge == "rising":
+                rise = event.timestamp
+            elif rise is not None:
+                fall = event.timestamp
+                break
+
+        # 内核时间戳单位为纳秒
+        return self._distance((fall - rise) / 1e9)
+
+    def _distance(self, TimeElapsed):
+        if self.max_cm is not None and TimeElapsed > self.max_cm * 2 / 34300:
+            return self.max_cm
+        distance = round(TimeElapsed * 34300 / 2, 2)  # 保留2位小数
+        distance = max(distance, 1.0)  # 设置最小距离为1厘米
+        return distance
 
     def read(self):
+        if self.edge:
+            if self.echo_line is not None:
+                return self._read_line_events()
+            return self._read_edge()
+
         # set Trigger to HIGH
         # GPIO.output(GPIO_TRIGGER, True)
         self.trigger.write(True)
@@ -1021,6 +1907,7 @@ class Ultrasound:
             if time.time() - start_time > self.timeout:  # 检查是否超时
                 if self.debug:
                     print("未检测到回声")
+                self.timeouts.inc()
                 return 0
         # save time of arrival
         while self.echo.read() == 1:
@@ -1031,6 +1918,7 @@ class Ultrasound:
             if time.time() - start_time > self.timeout:  # 检查是否超时
                 if self.debug:
                     print("能检测到回声信号，但是滞后超时")
+                self.timeouts.inc()
                 return 0
 
         # time difference between start and arrival
@@ -1042,6 +1930,12 @@ class Ultrasound:
         time.sleep(0.01)
         return distance
 
+    async def aread(self):
+        """
+        read() 的异步版本，在该测距模块专用的线程中等待回声。
+        """
+        return await run_on(("gpio", self.echo_pin), self.read)
+
 
 class ADC:
     """
@@ -1052,6 +1946,8 @@ class ADC:
     SUBPIN = 0x24  # 固定的设备地址
     BASE_ADDR = 0x10  # 基地址
     DEFAULT_FUNCTION = 1  # 默认的功能码 (读取 ADC 原始数据)
+    CHANNELS = 8  # 通道数量 A0~A7
+    _read_all_stats = op("ADC.read_all", bus=SUBLINE, addr=hex(SUBPIN))
 
     def __init__(self, channel, function=DEFAULT_FUNCTION):
         """
@@ -1059,14 +1955,84 @@ class ADC:
         :param channel: 引脚序号 (0 表示 A0, 1 表示 A1, ... 7 表示 A7)
         :param function: 功能码 (默认是 1 表示读取 ADC 原始数据, 可选值: 1 表示读取 ADC 原始数据, 2 表示读取输入电压, 3 表示读取输入输出电压比)
         """
+        self.channel = channel
+        self.function = function
         self.adcpin = (ADC.BASE_ADDR + channel) + (function - 1) * 16
-        self.bus = smbus.SMBus(ADC.SUBLINE)
+        self.bus = I2CBus.acquire(ADC.SUBLINE)
+        self._read_stats = op(
+            "ADC.read", bus=ADC.SUBLINE, addr=hex(ADC.SUBPIN), channel=channel
+        )
 
     def read(self):
         """
         读取 ADC 的当前值。
         """
-        return self.bus.read_word_data(ADC.SUBPIN, self.adcpin)
+        return self._read_stats.call(self.bus.read_word_data, ADC.SUBPIN, self.adcpin)
+
+    def read_all(self):
+        """
+        在一次 I2C 事务中读取 A0~A7 全部通道（使用本实例的功能码）。
+
+        :return: array('H')，下标即通道号
+        """
+        return ADC._read_block(self.bus, self.function)
+
+    async def aread(self):
+        """
+        read() 的异步版本，与同一总线上的其他异步调用串行执行。
+        """
+        return await run_on(("i2c", ADC.SUBLINE), self.read)
+
+    async def aread_all(self):
+        return await run_on(("i2c", ADC.SUBLINE), self.read_all)
+
+    @staticmethod
+    def _read_block(bus, function):
+        # 写入起始寄存器后连续读取 8 个 16 位小端字，依赖扩展板寄存器地址自动递增
+        start = ADC.BASE_ADDR + (function - 1) * 16
+        write = smbus2.i2c_msg.write(ADC.SUBPIN, [start])
+        read = smbus2.i2c_msg.read(ADC.SUBPIN, ADC.CHANNELS * 2)
+        ADC._read_all_stats.call(bus.i2c_rdwr, write, read)
+        values = array("H", bytes(read))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def close(self):
+        """
+        释放共享总线。
+        """
+        self.bus.release()
+
+
+class ADCBank:
+    """
+    一次性读取全部 8 路模拟通道，避免逐通道发起 I2C 往返。
+    """
+
+    def __init__(self, function=ADC.DEFAULT_FUNCTION):
+        """
+        :param function: 功能码 (1 表示读取 ADC 原始数据, 2 表示读取输入电压, 3 表示读取输入输出电压比)
+        """
+        self.function = function
+        self.bus = I2CBus.acquire(ADC.SUBLINE)
+
+    def read(self):
+        """
+        读取 A0~A7 的当前值。
+
+        :return: array('H')，下标即通道号
+        """
+        return ADC._read_block(self.bus, self.function)
+
+    async def aread(self):
+        return await run_on(("i2c", ADC.SUBLINE), self.read)
+
+    def close(self):
+        """
+        释放共享总线。
+        """
+        self.bus.release()
 
 
 class GPIO:
@@ -1088,6 +2054,9 @@ class GPIO:
         :param initial: 初始值 (仅适用于输出引脚)
         """
         self.channel = channel
+        self._read_stats = op("GPIO.read", pin=channel)
+        self._write_stats = op("GPIO.write", pin=channel)
+        JetsonGPIO.setwarnings(False)
         self.direction = JetsonGPIO.OUT if direction == "out" else JetsonGPIO.IN
         JetsonGPIO.setmode(JetsonGPIO.BCM)  # 默认使用 BOARD 模式
         if initial is not None and self.direction == JetsonGPIO.OUT:
@@ -1102,8 +2071,10 @@ class GPIO:
         :param value: 布尔值 (True 或 False)
         """
         if self.direction == JetsonGPIO.OUT:
-            JetsonGPIO.output(
-                self.channel, JetsonGPIO.HIGH if value else JetsonGPIO.LOW
+            self._write_stats.call(
+                JetsonGPIO.output,
+                self.channel,
+                JetsonGPIO.HIGH if value else JetsonGPIO.LOW,
             )
         else:
             raise ValueError("Can't write to an input GPIO")
@@ -1114,7 +2085,24 @@ class GPIO:
 
         :return: 布尔值 (True 或 False)
         """
-        return JetsonGPIO.input(self.channel) == JetsonGPIO.HIGH
+        return self._read_stats.call(JetsonGPIO.input, self.channel) == JetsonGPIO.HIGH
+
+    def add_event_detect(self, edge, callback):
+        """
+        注册边沿事件回调，由内核边沿中断唤醒，不占用 CPU 轮询。
+
+        :param edge: 'rising'、'falling' 或 'both'
+        :param callback: 回调函数，参数为引脚编号
+        """
+        edges = {
+            "rising": JetsonGPIO.RISING,
+            "falling": JetsonGPIO.FALLING,
+            "both": JetsonGPIO.BOTH,
+        }
+        JetsonGPIO.add_event_detect(self.channel, edges[edge], callback=callback)
+
+    def remove_event_detect(self):
+        JetsonGPIO.remove_event_detect(self.channel)
 
     def cleanup(self):
         """
@@ -1165,6 +2153,9 @@ class SoundSensor:
         value = self.adc.read()
         signal = value > SoundSensor.THRESHOLD
         return signal, value
+
+    async def aread(self):
+        return await run_on(("i2c", ADC.SUBLINE), self.read)
 class FlameSensor:
     def __init__(self, analog_pin=2, digital_pin=24):
 
@@ -1176,6 +2167,9 @@ class FlameSensor:
         value = self.adc.read()
         return signal, value
 
+    async def aread(self):
+        return await run_on(("i2c", ADC.SUBLINE), self.read)
+
 
 class MQGasSensor:
     THRESHOLD = 200  # MQ气体传感器的阈值
@@ -1193,6 +2187,88 @@ class MQGasSensor:
         signal = value > MQGasSensor.THRESHOLD
         return signal, value
 
+    async def aread(self):
+        return await run_on(("i2c", ADC.SUBLINE), self.read)
+
+
+class ViscaError(Exception):
+    """
+    摄像机返回的VISCA错误应答 (y0 6z ee FF)。
+    """
+
+    MESSAGES = {
+        0x01: "消息长度错误",
+        0x02: "语法错误",
+        0x03: "命令缓冲区已满",
+        0x04: "命令已取消",
+        0x05: "无效的socket",
+        0x41: "当前无法执行该命令",
+    }
+
+    def __init__(self, code, reply):
+        self.code = code
+        self.reply = reply
+        super().__init__(
+            f"VISCA error 0x{code:02X}: {self.MESSAGES.get(code, '未知错误')}"
+        )
+
+
+class ViscaReplyParser:
+    """
+    按 0xFF 结束符切分串口数据，解析出 ACK (y0 4z FF)、完成 (y0 5z ... FF) 和错误 (y0 6z ee FF) 应答。
+    """
+
+    KINDS = {0x40: "ack", 0x50: "completion", 0x60: "error"}
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """
+        输入串口收到的字节。
+
+        返回:
+        replies (list): 完整应答的列表，每项为 (类型, socket编号, 原始字节)。
+        """
+        self._buffer += data
+        replies = []
+        while True:
+            end = self._buffer.find(0xFF)
+            if end < 0:
+                break
+            frame = bytes(self._buffer[: end + 1])
+            del self._buffer[: end + 1]
+            # 应答首字节为 y0 (y = 摄像机地址 + 8)
+            if len(frame) < 3 or frame[0] & 0x8F != 0x80:
+                continue
+            kind = self.KINDS.get(frame[1] & 0xF0)
+            if kind is not None:
+                replies.append((kind, frame[1] & 0x0F, frame))
+        return replies
+
+
+class ViscaRequest:
+    """
+    一条已排队的VISCA命令。ack 在摄像机确认收到后完成，completion 在命令执行完毕后完成，
+    结果为收到的全部应答字节；收到错误应答时两者都抛出 ViscaError。
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self.ack = futures.Future()
+        self.completion = futures.Future()
+        self.socket = None
+        self.replies = bytearray()
+        self.superseded = False
+
+    def _resolve(self, future, result=None, exception=None):
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
 
 class Servos:
     # VISCA命令集
@@ -1212,36 +2288,232 @@ class Servos:
         "reset": "81010605FF",
     }
 
+    # 不含位置参数的命令按 (命令键, vv, ww) 缓存编码结果
+    _command_cache = {}
+
+    ACK_TIMEOUT = 0.2  # 等待ACK的超时时间（秒），超时后继续发送下一条命令
+
     def __init__(self, device="/dev/ttyUSB0"):
         self.device = device
         self.y = 0
         self.z = 0
-
-    def send_visca_command(self, command):
+        # 位置命令的可复用缓冲区：8x 01 06 0p vv ww Y1-Y4 Z1-Z4 FF
+        self._position_buffers = {
+            "absolute_position": bytearray.fromhex("81010602" + "00" * 10 + "FF"),
+            "relative_position": bytearray.fromhex("81010603" + "00" * 10 + "FF"),
+        }
+        # 串口只打开一次，由后台写线程独占，读线程解析应答
+        self._serial = None
+        self._parser = ViscaReplyParser()
+        self._queue = deque()  # 待发送的 ViscaRequest
+        self._queue_cond = threading.Condition()
+        self._awaiting_ack = deque()  # 已发送、等待ACK的请求
+        self._executing = {}  # socket编号 -> 执行中的请求
+        self._reply_lock = threading.Lock()
+        self._writer = None
+        self._reader = None
+        self._running = False
+        self._command_stats = op("Servos.send_visca_command", device=device)
+        self._ack_stats = op("Servos.ack", device=device)
+
+    def send_visca_command(self, command, wait="ack", timeout=None):
         """
         通过串口向摄像机发送VISCA命令。
 
         参数:
-        command (str): 要发送的VISCA命令，格式为十六进制字符串。
+        command (str | bytes): 要发送的VISCA命令，十六进制字符串或字节。
+        wait (str): "ack" 等待摄像机确认收到，"completion" 等待执行完毕，None 不等待。
+        timeout (float): 最长等待时间（秒），None 表示一直等待，超时抛出 TimeoutError。
 
         返回:
-        response (bytes): 从摄像机接收到的响应。
+        response (bytes): 到目前为止从摄像机接收到的应答。被更新的绝对位置命令取代时返回 None。
         """
+        start = now_ns()
+        request = self.post_visca_command(command)
+        if wait is None:
+            return b""
+        future = request.completion if wait == "completion" else request.ack
         try:
-            ser = serial.Serial(self.device, 9600, timeout=1)  # 初始化串口
-            command_bytes = bytearray.fromhex(command)  # 将命令转换为字节
-            ser.write(command_bytes)  # 发送命令
-            response = ser.read_all()  # 读取响应
-            ser.close()  # 关闭串口
-            return response
-        except:
-            ports_list = list(serial.tools.list_ports.comports())
+            future.result(timeout)
+        except ViscaError:
+            self._command_stats.error()
+        except futures.TimeoutError:
+            self._command_stats.error()
+            self._command_stats.observe(now_ns() - start)
+            raise TimeoutError(
+                f"VISCA命令 {request.command.hex()} 在 {timeout} 秒内没有收到{'完成' if wait == 'completion' else 'ACK'}应答"
+            ) from None
+        self._command_stats.observe(now_ns() - start)
+        if request.superseded:
+            return None
+        return bytes(request.replies)
+
+    def post_visca_command(self, command):
+        """
+        将VISCA命令放入发送队列后立即返回，可用于流水线发送多条命令。
+        队列中尚未发送的绝对位置命令会被新的绝对位置命令取代。
+
+        参数:
+        command (str | bytes): 十六进制字符串或字节形式的VISCA命令。
+
+        返回:
+        request (ViscaRequest): 通过 request.ack / request.completion 等待应答。
+        """
+        if isinstance(command, str):
+            command = bytes.fromhex(command)  # 将命令转换为字节
+        request = ViscaRequest(command)
+        with self._queue_cond:
+            if self._writer is None:
+                self._running = True
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+            if self._is_absolute_position(command):
+                for i, pending in enumerate(self._queue):
+                    if self._is_absolute_position(pending.command):
+                        # 被新的目标位置取代，不再发送
+                        del self._queue[i]
+                        pending.superseded = True
+                        pending._resolve(pending.ack)
+                        pending._resolve(pending.completion)
+                        break
+            self._queue.append(request)
+            self._queue_cond.notify()
+        return request
+
+    @staticmethod
+    def _is_absolute_position(command):
+        # 8x 01 06 02 ...：x 为摄像机地址
+        return command[1:4] == b"\x01\x06\x02"
+
+    def _open(self):
+        try:
+            # 读线程每0.1秒检查一次是否需要退出
+            self._serial = serial.Serial(self.device, 9600, timeout=0.1)  # 初始化串口
+        except Exception:
+            self._serial = None
+            ports_list = list(list_ports.comports())
             if len(ports_list) <= 0:
                 print("未发现端口")
             else:
                 for comport in ports_list:
                     if "USB" in str(comport):
                         print("发现USB端口：", comport.device, comport.description)
+            return None
+        self._reader = threading.Thread(
+            target=self._read_loop, args=(self._serial,), daemon=True
+        )
+        self._reader.start()
+        return self._serial
+
+    def _write_loop(self):
+        while True:
+            with self._queue_cond:
+                while self._running and not self._queue:
+                    self._queue_cond.wait()
+                if not self._running:
+                    break
+                request = self._queue.popleft()
+            if self._serial is None and self._open() is None:
+                request._resolve(request.ack)
+                request._resolve(request.completion)
+                continue
+            with self._reply_lock:
+                self._awaiting_ack.append(request)
+            start = now_ns()
+            try:
+                self._serial.write(request.command)  # 发送命令
+            except Exception:
+                # 串口异常（如USB拔出）时关闭，下一条命令重新打开
+                self._close_serial()
+            # 摄像机只有两个socket，收到ACK后再发送下一条，避免缓冲区溢出
+            try:
+                request.ack.result(self.ACK_TIMEOUT)
+                self._ack_stats.observe(now_ns() - start)
+            except ViscaError:
+                self._ack_stats.observe(now_ns() - start)
+            except futures.TimeoutError:
+                # 设备没有应答，不再等待
+                self._ack_stats.error()
+                with self._reply_lock:
+                    if request in self._awaiting_ack:
+                        self._awaiting_ack.remove(request)
+                request._resolve(request.ack)
+                request._resolve(request.completion, bytes(request.replies))
+        # 退出前通知仍在等待的调用方
+        with self._queue_cond:
+            while self._queue:
+                request = self._queue.popleft()
+                request._resolve(request.ack)
+                request._resolve(request.completion)
+
+    def _read_loop(self, ser):
+        while self._running and ser is self._serial:
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except Exception:
+                break
+            if data:
+                for kind, socket, frame in self._parser.feed(data):
+                    self._dispatch(kind, socket, frame)
+
+    def _dispatch(self, kind, socket, frame):
+        with self._reply_lock:
+            request = None
+            if kind == "ack":
+                if self._awaiting_ack:
+                    request = self._awaiting_ack.popleft()
+                    request.socket = socket
+                    self._executing[socket] = request
+            elif socket:
+                request = self._executing.pop(socket, None)
+            if request is None and kind != "ack" and self._awaiting_ack:
+                # 查询命令和被拒绝的命令没有ACK，直接对应最早发送的请求
+                request = self._awaiting_ack.popleft()
+        if request is None:
+            return
+        request.replies += frame
+        if kind == "ack":
+            request._resolve(request.ack, frame)
+        elif kind == "completion":
+            request._resolve(request.ack, frame)
+            request._resolve(request.completion, bytes(request.replies))
+        else:
+            error = ViscaError(frame[2], frame)
+            request._resolve(request.ack, exception=error)
+            request._resolve(request.completion, exception=error)
+
+    def _close_serial(self):
+        ser, self._serial = self._serial, None
+        if ser is not None:
+            ser.close()
+        with self._reply_lock:
+            pending = list(self._awaiting_ack) + list(self._executing.values())
+            self._awaiting_ack.clear()
+            self._executing.clear()
+        for request in pending:
+            request._resolve(request.ack)
+            request._resolve(request.completion, bytes(request.replies))
+
+    def close(self):
+        """
+        停止后台读写线程并关闭串口。
+        """
+        with self._queue_cond:
+            self._running = False
+            self._queue_cond.notify()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self._close_serial()
+        if self._reader is not None:
+            self._reader.join()
+            self._reader = None
+
+    async def asend_visca_command(self, command):
+        """
+        send_visca_command() 的异步版本，同一串口上的命令按顺序执行。
+        """
+        return await run_on(("serial", self.device), self.send_visca_command, command)
 
     @staticmethod
     def calculate_pan_speed_bytes(pan_speed_value):
@@ -1258,7 +2530,7 @@ class Servos:
         return f"{pan_speed_value:02X}"  # 转为2位16进制
 
     @staticmethod
-    def calculate_pan_position_bytes(pan_pos_value, axis_type):
+    def position_nibbles(pan_pos_value, axis_type):
         """
         计算轴（旋转）的位置字节。
 
@@ -1267,30 +2539,29 @@ class Servos:
         axis_type (str): 轴的类型 ('y' or 'Y' for Y-axis, others for Z-axis)
 
         返回:
-        pan_step_str (str): 计算得到的平移位置字节，格式为十六进制字符串。
+        nibbles (bytes): 4个字节，每字节为16位补码步长的一位十六进制数 (0p 0q 0r 0s)。
         """
         if axis_type.lower() == "y":
             pan_pos_value = max(-177.5, min(pan_pos_value, 177.5))  # 限制取值范围
         else:
             pan_pos_value = max(-21, min(pan_pos_value, 21))  # 限制取值范围
 
-        pan_pos_value = int(pan_pos_value * 25)  # 将角度转换为步长
-        pan_direction = "-" if pan_pos_value < 0 else "+"  # 设定旋转方向
-        pan_pos_value = abs(pan_pos_value)  # 取绝对值
+        steps = int(pan_pos_value * 25) & 0xFFFF  # 将角度转换为步长，负数取16位补码
+        return bytes(((steps >> 12) & 0xF, (steps >> 8) & 0xF, (steps >> 4) & 0xF, steps & 0xF))
 
-        HEX_VALUES = [4096, 256, 16, 1]  # 定义常量
-        pan_pos_ints = []
-        for i, value in enumerate(HEX_VALUES):
-            if pan_direction == "+":
-                pan_pos_ints.append(pan_pos_value // value)
-            else:  # 异或操作
-                pan_pos_ints.append((pan_pos_value // value) ^ 0xF)
-                if i == 3:  # 最后一个数字，取反后加1
-                    pan_pos_ints[-1] = pan_pos_ints[-1] + 1
-            pan_pos_value %= value
+    @staticmethod
+    def calculate_pan_position_bytes(pan_pos_value, axis_type):
+        """
+        计算轴（旋转）的位置字节。
 
-        pan_pos_strs = [f"{i:02X}" for i in pan_pos_ints]  # 转换为2位16进制字符串
-        return "".join(pan_pos_strs)
+        参数:
+        pan_pos_value (int): 位置值，
+        axis_type (str): 轴的类型 ('y' or 'Y' for Y-axis, others for Z-axis)
+
+        返回:
+        pan_step_str (str): 计算得到的平移位置字节，格式为十六进制字符串。
+        """
+        return Servos.position_nibbles(pan_pos_value, axis_type).hex().upper()
 
     def create_command(self, command_key, vv=10, ww=10, Y=None, Z=None):
         """
@@ -1325,34 +2596,76 @@ class Servos:
             ww=self.calculate_pan_speed_bytes(ww),
         )
 
+    def encode_command(self, command_key, vv=10, ww=10, Y=None, Z=None):
+        """
+        与 create_command() 参数相同，直接返回命令字节。
+        固定命令从缓存中取出，位置命令在可复用的缓冲区中原地编码。
+
+        返回:
+        command (bytes): VISCA命令字节。
+        """
+        buffer = self._position_buffers.get(command_key)
+        if buffer is not None:
+            if Y is None or Z is None:
+                raise ValueError("Y和Z为位置命令,必须提供")
+            buffer[4] = max(0, min(vv, 16))
+            buffer[5] = max(0, min(ww, 16))
+            buffer[6:10] = self.position_nibbles(Y, "y")
+            buffer[10:14] = self.position_nibbles(Z, "z")
+            return bytes(buffer)
+        key = (command_key, vv, ww)
+        command = self._command_cache.get(key)
+        if command is None:
+            command = bytes.fromhex(self.create_command(command_key, vv, ww))
+            self._command_cache[key] = command
+        return command
+
     # 控制函数
     def turn_stop(self, vv=0, ww=0):
-        return self.send_visca_command(self.create_command("stop", vv, ww))
+        return self.send_visca_command(self.encode_command("stop", vv, ww))
 
     def turn_left(self, vv=10, ww=10):
-        return self.send_visca_command(self.create_command("left", vv, ww))
+        return self.send_visca_command(self.encode_command("left", vv, ww))
 
     def turn_right(self, vv=10, ww=10):
-        return self.send_visca_command(self.create_command("right", vv, ww))
+        return self.send_visca_command(self.encode_command("right", vv, ww))
 
     def turn_up(self, vv=10, ww=10):
-        return self.send_visca_command(self.create_command("up", vv, ww))
+        return self.send_visca_command(self.encode_command("up", vv, ww))
 
     def turn_down(self, vv=10, ww=10):
-        return self.send_visca_command(self.create_command("down", vv, ww))
+        return self.send_visca_command(self.encode_command("down", vv, ww))
 
     def move_home(self):
-        return self.send_visca_command(self.create_command("home"))
+        return self.send_visca_command(self.encode_command("home"))
 
-    def move_to_absolute_position(self, vv=10, ww=10, Y=0, Z=0):
+    def move_to_absolute_position(self, vv=10, ww=10, Y=0, Z=0, wait="ack", timeout=None):
+        """
+        wait: "ack"、"completion" 或 None，见 send_visca_command()。
+        timeout: 最长等待时间（秒），None 表示一直等待，超时抛出 TimeoutError。
+        """
         return self.send_visca_command(
-            self.create_command("absolute_position", vv, ww, Y, Z)
+            self.encode_command("absolute_position", vv, ww, Y, Z), wait, timeout
         )
 
+    async def amove_to_absolute_position(self, vv=10, ww=10, Y=0, Z=0):
+        return await self.asend_visca_command(
+            self.encode_command("absolute_position", vv, ww, Y, Z)
+        )
+
+    def update(self, x, y, wait=None, timeout=None):
+        """
+        用一条绝对位置命令同时更新水平和垂直角度，供 TrajectoryPlanner 按控制频率调用。
+        默认不等待应答，尚未发送的旧位置会被新位置取代。
+        """
+        self.y = x
+        self.z = y
+        return self.move_to_absolute_position(Y=x, Z=y, wait=wait, timeout=timeout)
+
     def update_x(self, degree):
         self.move_to_absolute_position(Y=degree, Z=self.z)
-        self.y += degree
+        self.y = degree
 
     def update_y(self, degree):
         self.move_to_absolute_position(Y=self.y, Z=degree)
-        self.z += degree
\ No newline at end of file
+        self.z = degree
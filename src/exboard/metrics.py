@@ -0,0 +1,285 @@
+"""
+底层访问的计数器和耗时直方图 (ADC、MFRC522 寄存器、RGB、GPIO、VISCA 串口等)。
+
+记录时不加锁，每种操作的桶在创建时一次性分配，热路径上只有一次 bisect 和两次数组自增。
+在 CPython 中并发更新同一个桶时极少数情况下可能丢失一次计数，对监控用途没有影响。
+
+用法：
+    from exboard import metrics
+    metrics.query(op="ADC.read")      # [{"labels": {...}, "count": ..., "p99": ...}, ...]
+    print(metrics.prometheus())      # Prometheus 文本格式
+"""
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+# 直方图上界 (秒)，覆盖单次 I2C 读写到串口往返
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+_BUCKETS_NS = tuple(int(bound * 1e9) for bound in BUCKETS)
+
+OP_METRIC = "exboard_op_duration_seconds"
+OP_HELP = "Latency of exboard low-level operations"
+ERROR_METRIC = "exboard_op_errors_total"
+ERROR_HELP = "Failed exboard low-level operations"
+
+now_ns = time.perf_counter_ns
+
+
+class OpStats:
+    """
+    一种操作 (带标签) 的耗时直方图和错误次数。
+
+    用法：
+        stats = metrics.op("ADC.read", bus=7)
+        value = stats.call(bus.read_word_data, 0x24, 0x10)
+    """
+
+    __slots__ = ("name", "labels", "_buckets", "_totals")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        # 最后一个桶为 +Inf
+        self._buckets = array("Q", [0]) * (len(_BUCKETS_NS) + 1)
+        self._totals = array("Q", [0, 0])  # [耗时总和 (纳秒), 错误次数]
+
+    def observe(self, elapsed_ns):
+        """
+        :param elapsed_ns: 耗时 (纳秒)
+        """
+        self._buckets[bisect_left(_BUCKETS_NS, elapsed_ns)] += 1
+        self._totals[0] += elapsed_ns
+
+    def error(self):
+        self._totals[1] += 1
+
+    def call(self, func, *args):
+        """
+        调用 func(*args) 并记录耗时，抛出异常时同时记一次错误。
+        """
+        start = now_ns()
+        try:
+            return func(*args)
+        except Exception:
+            self._totals[1] += 1
+            raise
+        finally:
+            elapsed = now_ns() - start
+            self._buckets[bisect_left(_BUCKETS_NS, elapsed)] += 1
+            self._totals[0] += elapsed
+
+    @property
+    def count(self):
+        return sum(self._buckets)
+
+    @property
+    def errors(self):
+        return self._totals[1]
+
+    @property
+    def sum(self):
+        """
+        :return: 耗时总和 (秒)
+        """
+        return self._totals[0] / 1e9
+
+    def quantile(self, q):
+        """
+        按桶线性插值估计分位数 (与 Prometheus histogram_quantile 相同)。
+
+        :param q: 0~1
+        :return: 秒，没有数据时返回 None
+        """
+        buckets = list(self._buckets)
+        total = sum(buckets)
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(buckets):
+            if seen + count >= rank and count:
+                if i == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (BUCKETS[i] - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+    def as_dict(self):
+        count = self.count
+        return {
+            "labels": dict(self.labels),
+            "count": count,
+            "errors": self.errors,
+            "sum": self.sum,
+            "mean": self.sum / count if count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+    def reset(self):
+        for i in range(len(self._buckets)):
+            self._buckets[i] = 0
+        self._totals[0] = self._totals[1] = 0
+
+
+class Counter:
+    """
+    单调递增的计数器，例如超声波测距超时次数。
+    """
+
+    __slots__ = ("name", "labels", "_value")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self._value = array("Q", [0])
+
+    def inc(self, amount=1):
+        self._value[0] += amount
+
+    @property
+    def value(self):
+        return self._value[0]
+
+    def as_dict(self):
+        return {"labels": dict(self.labels), "value": self.value}
+
+    def reset(self):
+        self._value[0] = 0
+
+
+class Registry:
+    """
+    所有指标的注册表。同名同标签的指标只创建一次，创建时加锁，记录时不加锁。
+    """
+
+    def __init__(self):
+        self._ops = {}  # 标签 -> OpStats
+        self._counters = {}  # (名称, 标签) -> Counter
+        self._help = {}  # 计数器名称 -> 说明
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def op(self, op, **labels):
+        """
+        获取操作的直方图，通常在对象初始化时获取一次并保存。
+
+        :param op: 操作名，例如 "ADC.read"
+        :param labels: 其他标签，例如 bus=7, addr="0x24"
+        """
+        labels = self._key(dict(labels, op=op))
+        stats = self._ops.get(labels)
+        if stats is None:
+            with self._lock:
+                stats = self._ops.setdefault(labels, OpStats(op, labels))
+        return stats
+
+    def counter(self, name, help="", **labels):
+        key = (name, self._key(labels))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter(name, key[1]))
+                if help:
+                    self._help.setdefault(name, help)
+        return counter
+
+    def query(self, op=None, **labels):
+        """
+        查询操作的统计。
+
+        :param op: 操作名，None 表示全部
+        :param labels: 只返回带有这些标签的操作
+        :return: [{"labels", "count", "errors", "sum", "mean", "p50", "p99"}]，耗时单位为秒
+        """
+        wanted = self._key(labels)
+        result = []
+        for stats in list(self._ops.values()):
+            if op is not None and stats.name != op:
+                continue
+            if not set(wanted) <= set(stats.labels):
+                continue
+            result.append(stats.as_dict())
+        return result
+
+    def counters(self, name=None):
+        """
+        :return: [{"name", "labels", "value"}]
+        """
+        return [
+            dict(counter.as_dict(), name=counter.name)
+            for counter in list(self._counters.values())
+            if name is None or counter.name == name
+        ]
+
+    def prometheus(self):
+        """
+        :return: Prometheus 文本格式 (0.0.4) 的全部指标
+        """
+        lines = []
+        ops = sorted(self._ops.values(), key=lambda stats: stats.labels)
+        if ops:
+            lines.append(f"# HELP {OP_METRIC} {OP_HELP}")
+            lines.append(f"# TYPE {OP_METRIC} histogram")
+            for stats in ops:
+                buckets = list(stats._buckets)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), buckets):
+                    cumulative += count
+                    le = bound if isinstance(bound, str) else repr(bound)
+                    lines.append(f"{OP_METRIC}_bucket{_labels(stats.labels, le=le)} {cumulative}")
+                lines.append(f"{OP_METRIC}_sum{_labels(stats.labels)} {stats.sum!r}")
+                lines.append(f"{OP_METRIC}_count{_labels(stats.labels)} {cumulative}")
+            lines.append(f"# HELP {ERROR_METRIC} {ERROR_HELP}")
+            lines.append(f"# TYPE {ERROR_METRIC} counter")
+            for stats in ops:
+                lines.append(f"{ERROR_METRIC}{_labels(stats.labels)} {stats.errors}")
+
+        by_name = {}
+        for counter in list(self._counters.values()):
+            by_name.setdefault(counter.name, []).append(counter)
+        for name in sorted(by_name):
+            lines.append(f"# HELP {name} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for counter in sorted(by_name[name], key=lambda counter: counter.labels):
+                lines.append(f"{name}{_labels(counter.labels)} {counter.value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """
+        清零所有指标 (已获取的指标对象仍然有效)。
+        """
+        for stats in list(self._ops.values()):
+            stats.reset()
+        for counter in list(self._counters.values()):
+            counter.reset()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+REGISTRY = Registry()
+
+op = REGISTRY.op
+counter = REGISTRY.counter
+query = REGISTRY.query
+counters = REGISTRY.counters
+prometheus = REGISTRY.prometheus
+reset = REGISTRY.reset
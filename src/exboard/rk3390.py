@@ -8,8 +8,38 @@
 
 # Version: 1.0.1
 
-import periphery
+import os
+import sys
 import time
+from array import array
+from ._lazy import LazyModule
+from .aio import run_on
+from .metrics import counter, now_ns, op
+
+# from exboard import * 导出的驱动接口
+__all__ = ['GPIO', 'LED', 'ADC', 'ADCBank', 'RC522', 'RGB', 'Ultrasound',
+           'SoundSensor', 'PhotosensitiveSensor', 'SoilMoistureSensor', 'WaterDepthSensor',
+           'FlameSensor', 'RotaryPotentionmeter', 'MQGasSensor', 'Servo', 'Servos']
+
+# 第一次使用时才导入
+periphery = LazyModule('periphery')
+mfrc522_i2c = LazyModule('mfrc522_i2c')
+
+# PWM 的 sysfs 目录, 模拟器会指向临时目录
+PWM_SYSFS = '/sys/class/pwm'
+
+class SysfsFile:
+    ''' 保持打开的 sysfs 属性文件, 每次写入只需一次pwrite
+    模拟器会替换为统计访问次数的子类
+    '''
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_WRONLY)
+
+    def write(self, data):
+        os.pwrite(self.fd, data, 0)
+
+    def close(self):
+        os.close(self.fd)
 
 pin_map = {
 
@@ -73,22 +103,62 @@ class LED:
 
 
 class ADC:
-    def __init__(self, pin):
+    CHANNELS = 8
+
+    def __init__(self, pin, function=1):
+        ''' function: 1 原始值, 2 电压, 3 电压比 (与 jetson.ADC 相同)
+        '''
         self.i2c = periphery.I2C("/dev/i2c-6")
         self.pin = pin
+        self.function = function
+        self._read_stats = op('ADC.read', bus=6, addr='0x24', channel=pin)
 
     def read(self):
-        msgs = [periphery.I2C.Message([0x10+self.pin]), periphery.I2C.Message([0x00, 0x00], read=True)]
-        self.i2c.transfer(0x24, msgs)
+        msgs = [periphery.I2C.Message([0x10 + self.pin + (self.function - 1) * 16]),
+                periphery.I2C.Message([0x00, 0x00], read=True)]
+        self._read_stats.call(self.i2c.transfer, 0x24, msgs)
         return (msgs[1].data[1] << 8) + msgs[1].data[0]
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
+    def read_all(self):
+        ''' 一次transfer读取A0~A7, 使用本实例的功能码
+        '''
+        return _read_adc_block(self.i2c, self.function)
+
+_read_all_stats = op('ADC.read_all', bus=6, addr='0x24')
+
+def _read_adc_block(i2c, function=1):
+    # 起始寄存器后连续读取8个16位小端字
+    msgs = [periphery.I2C.Message([0x10 + (function - 1) * 16]),
+            periphery.I2C.Message(bytearray(ADC.CHANNELS * 2), read=True)]
+    _read_all_stats.call(i2c.transfer, 0x24, msgs)
+    values = array('H', bytes(msgs[1].data))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+class ADCBank:
+    def __init__(self, function=1):
+        self.i2c = periphery.I2C("/dev/i2c-6")
+        self.function = function
+
+    def read(self):
+        return _read_adc_block(self.i2c, self.function)
+
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
+    def close(self):
+        self.i2c.close()
+
 class RC522:
     def __init__(self):
         # 参考代码：https://github.com/cpranzl/mfrc522_i2c/tree/main/examples
-        from mfrc522_i2c import MFRC522
         i2cBus = 6
         i2cAddress = 0x28
-        self.MFRC522Reader = MFRC522(i2cBus, i2cAddress)
+        self.MFRC522Reader = mfrc522_i2c.MFRC522(i2cBus, i2cAddress)
 
     def scan(self):
         (status, backData, tagType) = self.MFRC522Reader.scan()
@@ -104,6 +174,9 @@ class RC522:
         
         return (None, None)
 
+    async def ascan(self):
+        return await run_on(('i2c', 6), self.scan)
+
     def read (self, uid, blockAddr):
         # Select the scanned card
         (status, backData, backBits) = self.MFRC522Reader.select(uid)
@@ -129,10 +202,13 @@ class RC522:
         else:
             print("read: card miss")
 
+    async def aread(self, uid, blockAddr):
+        return await run_on(('i2c', 6), self.read, uid, blockAddr)
+
 class RGB:
-    def __init__(self):
+    def __init__(self, lenth=24):
         self.type='ws2812_rgb'
-        self.lenth = 24
+        self.lenth = lenth
         self.frame_start = [0xDD, 0x55, 0xEE]
         self.frame_group_addr = [0x00, 0x00]
         self.frame_device_addr = [0x00, 0x01]
@@ -147,52 +223,151 @@ class RGB:
         # self.frame_color_red = [0xFF, 0x00, 0x00]
         self.frame_end = [0xAA, 0xBB]
 
+        # 预先生成整帧模板, 颜色数据通过memoryview原地写入
+        self._header = bytes(self.frame_start + self.frame_group_addr + self.frame_device_addr
+                             + self.frame_port + self.frame_function + self.frame_type
+                             + self.frame_reserved)
+        self._frame = self._build_frame(bytes(self.lenth * 3))
+        payload = len(self._header) + 4
+        # 帧缓冲：set_pixel/fill只改缓冲区，show()仅在有变化时发送
+        self.pixels = memoryview(self._frame)[payload:payload + self.lenth * 3]
+        self.dirty = True
+        self._set_stats = op('RGB.set', device='/dev/ttyS4')
+        self._show_stats = op('RGB.show', device='/dev/ttyS4')
+
         self.uart = periphery.Serial("/dev/ttyS4", 115200)
         self.uart.flush()
         # wait uart ready
         time.sleep(0.1)
 
+    def set_pixel(self, index, color):
+        ''' color: (r, g, b)
+        '''
+        offset = index * 3
+        color = bytes(color)
+        if self.pixels[offset:offset+3] != color:
+            self.pixels[offset:offset+3] = color
+            self.dirty = True
+
+    def fill(self, color):
+        self.set_pixels(bytes(color) * self.lenth)
+
+    def set_pixels(self, data):
+        ''' data: 长度为 lenth*3 的 bytes, 按 r, g, b 顺序
+        '''
+        if self.pixels != data:
+            self.pixels[:] = data
+            self.dirty = True
+
+    def show(self, force=False):
+        ''' 缓冲区有变化时发送, 返回是否实际发送
+        '''
+        if not (self.dirty or force):
+            return False
+        start = now_ns()
+        try:
+            self.uart.write(self._frame)
+            self.uart.flush()
+        except Exception:
+            self._show_stats.error()
+            raise
+        finally:
+            self._show_stats.observe(now_ns() - start)
+        self.dirty = False
+        return True
+
     def set(self, colors):
         ''' color: [(r, g, b), (r2, g2, b2), ...]
+        超过 lenth 的颜色直接截断 (与 jetson.RGB.set 一致)
         '''
-        frame_colors = []
-        for index, color in enumerate(colors):
-            # print(color)
-            (r,g,b) = color
-            frame_colors += [r, g, b]
-
-        self.send_frame(frame_colors)
+        start = now_ns()
+        for index, color in zip(range(self.lenth), colors):
+            self.set_pixel(index, color)
+        self.show()
+        self._set_stats.observe(now_ns() - start)
+
+    async def aset(self, colors):
+        return await run_on(('serial', '/dev/ttyS4'), self.set, colors)
+
+    def _build_frame(self, colors):
+        # 长度字段为大端16位
+        frame = bytearray(self._header)
+        frame += bytes((len(colors) >> 8, len(colors) & 0xff))
+        frame += bytes(self.frame_extend_times)
+        frame += colors
+        frame += bytes(self.frame_end)
+        return frame
 
     def send_frame(self, colors):
-        frame = []
-        frame += self.frame_start
-        frame += self.frame_group_addr
-        frame += self.frame_device_addr
-        frame += self.frame_port
-        frame += self.frame_function
-        frame += self.frame_type
-        frame += self.frame_reserved
-        frame += [len(colors)//0xff, len(colors)%0xff]
-        frame += self.frame_extend_times
-        frame += colors
-        frame += self.frame_end
-        self.uart.write(frame)
+        if len(colors) == len(self.pixels):
+            # 整条灯带: 直接写入模板并同步帧缓冲
+            self.pixels[:] = bytes(colors)
+            self.show(force=True)
+            return
+        self.uart.write(self._build_frame(bytes(colors)))
         self.uart.flush()
 
     def close(self):
-        self.set([(0,0,0)]*24)
+        self.fill((0, 0, 0))
+        self.show(force=True)
 class Ultrasound:
     '''
     最大测距理论值小于343
     '''
-    def __init__(self, trigger_pin=4, echo_pin=5, max_cm=None, timeout=1):
+    def __init__(self, trigger_pin=4, echo_pin=5, max_cm=None, timeout=1, edge=False):
+        ''' edge=True 时通过字符设备读取内核时间戳的回声边沿事件，不再忙等轮询
+        '''
         #set GPIO Pins
         self.trigger = GPIO(trigger_pin, 'out')
-        self.echo = GPIO(echo_pin, 'in')
+        self.edge = edge
+        if edge:
+            # 全局编号 = bank * 32 + offset，对应 /dev/gpiochip<bank> 的第 offset 条线
+            line = pin_map[echo_pin]
+            self.echo = periphery.GPIO('/dev/gpiochip%d' % (line // 32), line % 32, 'in', edge='both')
+        else:
+            self.echo = GPIO(echo_pin, 'in')
+        self.echo_pin = echo_pin
         self.max_cm = max_cm
         self.timeout = timeout  # 超时时间（秒）
+        self.timeouts = counter('exboard_ultrasound_timeouts_total',
+                                        'Ultrasound.read calls that timed out and returned 0',
+                                        echo_pin=echo_pin)
+
+    def _read_edge(self):
+        # 丢弃上一次测量残留的事件
+        while self.echo.poll(0):
+            self.echo.read_event()
+
+        self.trigger.write(True)
+        time.sleep(0.00001)
+        self.trigger.write(False)
+
+        deadline = time.monotonic() + self.timeout
+        rise = None
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.echo.poll(remaining):
+                if rise is not None and self.max_cm is not None:
+                    return self.max_cm
+                self.timeouts.inc()
+                return 0
+            event = self.echo.read_event()
+            if event.edge == 'rising':
+                rise = event.timestamp
+            elif rise is not None:
+                fall = event.timestamp
+                break
+
+        # 内核时间戳单位为纳秒
+        TimeElapsed = (fall - rise) / 1e9
+        if self.max_cm is not None and TimeElapsed > self.max_cm * 2 / 34300:
+            return self.max_cm
+        return int(TimeElapsed * 34300) / 2
 
     def read(self):
+        if self.edge:
+            return self._read_edge()
+
         # set Trigger to HIGH
         # GPIO.output(GPIO_TRIGGER, True)
         self.trigger.write(True)
@@ -210,6 +385,7 @@ class Ultrasound:
         while self.echo.read() == 0:
             StartTime = time.time()
             if time.time() - start_time > self.timeout:  # 检查是否超时
+                self.timeouts.inc()
                 return 0
         # save time of arrival
         while self.echo.read() == 1:
@@ -218,6 +394,7 @@ class Ultrasound:
                 if StopTime - StartTime > self.max_cm * 2 / 34300:
                     return self.max_cm
             if time.time() - start_time > self.timeout:  # 检查是否超时
+                self.timeouts.inc()
                 return 0
 
         # time difference between start and arrival
@@ -228,6 +405,9 @@ class Ultrasound:
     
         return distance
 
+    async def aread(self):
+        return await run_on(('gpio', self.echo_pin), self.read)
+
 class SoundSensor:
     def __init__(self, analog_pin=0, digital_pin=22):
 
@@ -240,6 +420,9 @@ class SoundSensor:
 
         return (not signal, value)
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
 class PhotosensitiveSensor:
     def __init__(self, analog_pin=4):
         self.adc = ADC(analog_pin)
@@ -247,6 +430,9 @@ class PhotosensitiveSensor:
     def read(self):
         return self.adc.read()
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
 class SoilMoistureSensor:
     def __init__(self, analog_pin=5):
         self.adc = ADC(analog_pin)
@@ -254,6 +440,9 @@ class SoilMoistureSensor:
     def read(self):
         return self.adc.read()
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
 class WaterDepthSensor:
     def __init__(self, analog_pin=7):
         self.adc = ADC(analog_pin)
@@ -261,6 +450,9 @@ class WaterDepthSensor:
     def read(self):
         return self.adc.read()
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
 class FlameSensor:
     def __init__(self, analog_pin=2, digital_pin=24):
 
@@ -273,6 +465,9 @@ class FlameSensor:
 
         return (not signal, value)
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
 class RotaryPotentionmeter:
     def __init__(self, analog_pin=6):
         self.adc = ADC(analog_pin)
@@ -280,6 +475,9 @@ class RotaryPotentionmeter:
     def read(self):
         return self.adc.read()
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
 class MQGasSensor:
     def __init__(self, analog_pin=2, digital_pin=23):
 
@@ -292,28 +490,67 @@ class MQGasSensor:
 
         return (not signal, value)
 
+    async def aread(self):
+        return await run_on(('i2c', 6), self.read)
+
 class Servo:
     def __init__(self, chip=0, channel=0):
         self.pwm = periphery.PWM(chip, channel)
         self.pwm.frequency =  50
+        # 周期固定, 只计算一次
+        self.period_ns = self.pwm.period_ns
+        self.duty_ns = None  # 最近一次写入的占空时间, 相同则跳过sysfs写入
+        self._write_stats = op('Servo.write', chip=chip, channel=channel)
+
+        # 保持duty_cycle文件打开, 每次更新只需一次pwrite
+        try:
+            self._duty_file = SysfsFile('%s/pwmchip%d/pwm%d/duty_cycle' % (PWM_SYSFS, chip, channel))
+        except OSError:
+            self._duty_file = None
 
         self.high_duration(1.5)
         self.pwm.enable()
 
-    def high_duration(self, ms):
-        T_ms = 1 / self.pwm.frequency * 1000
-        # print("T:", T_ms)
-        # print(ms)
-        self.pwm.duty_cycle = 1 - (ms/T_ms)
+    def duty_ns_for(self, ms):
+        # 输出经过反相, 高电平时间ms对应占空比 1 - ms/T
+        return int(self.period_ns - ms * 1000000)
 
-    def update(self, degree):
+    def degree_ms(self, degree):
         if degree > 90:
             degree = 90
         if degree < -90:
             degree = -90
         # -90 ~ 90 map to 0.5 ~ 2.5
-        ms = (degree - (-90)) * (2.5 - 0.5) / (90 - (-90)) + 0.5
-        self.high_duration(ms)
+        return (degree - (-90)) * (2.5 - 0.5) / (90 - (-90)) + 0.5
+
+    def write_duty_ns(self, duty_ns):
+        if duty_ns == self.duty_ns:
+            return False
+        start = now_ns()
+        try:
+            if self._duty_file is not None:
+                self._duty_file.write(b'%d\n' % duty_ns)
+            else:
+                self.pwm.duty_cycle_ns = duty_ns
+        except Exception:
+            self._write_stats.error()
+            raise
+        finally:
+            self._write_stats.observe(now_ns() - start)
+        self.duty_ns = duty_ns
+        return True
+
+    def high_duration(self, ms):
+        self.write_duty_ns(self.duty_ns_for(ms))
+
+    def update(self, degree):
+        self.high_duration(self.degree_ms(degree))
+
+    def close(self):
+        if self._duty_file is not None:
+            self._duty_file.close()
+            self._duty_file = None
+        self.pwm.close()
 
 class Servos:
     def __init__(self):
@@ -323,7 +560,7 @@ class Servos:
     def update_x(self, degree):
         self.servo_x.update(degree)
 
-    def update_y(self, degree):
+    def _y_degree(self, degree):
         # y 限位 0-90
         if degree > 90:
             degree = 90
@@ -331,4 +568,25 @@ class Servos:
             degree = 0
 
         # 舵机反向安装，所以需要加负数
-        self.servo_y.update(-degree)
+        return -degree
+
+    def update_y(self, degree):
+        self.servo_y.update(self._y_degree(degree))
+
+    def update(self, x, y):
+        ''' 先算好两轴的占空时间, 再连续写入, 减小两轴之间的时间差
+        '''
+        x_ns = self.servo_x.duty_ns_for(self.servo_x.degree_ms(x))
+        y_ns = self.servo_y.duty_ns_for(self.servo_y.degree_ms(self._y_degree(y)))
+        self.servo_x.write_duty_ns(x_ns)
+        self.servo_y.write_duty_ns(y_ns)
+
+    def close(self):
+        self.servo_x.close()
+        self.servo_y.close()
+
+    async def aupdate_x(self, degree):
+        return await run_on(('pwm', 0), self.update_x, degree)
+
+    async def aupdate_y(self, degree):
+        return await run_on(('pwm', 1), self.update_y, degree)
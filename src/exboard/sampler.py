@@ -0,0 +1,361 @@
+import bisect
+import threading
+import time
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class RingBuffer:
+    """
+    固定容量的环形缓冲区，预先分配存储空间，同时记录每个采样值的时间戳。
+    安装了 NumPy 时使用 ndarray，否则使用标准库 array。
+    """
+
+    def __init__(self, capacity, typecode="d"):
+        """
+        :param capacity: 最多保存的采样数
+        :param typecode: 数值类型 (array 模块的类型码，默认 'd' 双精度浮点)
+        """
+        self.capacity = capacity
+        if np is not None:
+            self._values = np.zeros(capacity, dtype=np.dtype(typecode))
+            self._times = np.zeros(capacity, dtype=np.float64)
+        else:
+            self._values = array(typecode, bytes(array(typecode).itemsize * capacity))
+            self._times = array("d", bytes(8 * capacity))
+        self._index = 0  # 下一个写入位置
+        self.count = 0  # 累计写入的采样数
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, value, timestamp=None):
+        """
+        写入一个采样值，缓冲区满时覆盖最旧的数据。
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._lock:
+            self._values[self._index] = value
+            self._times[self._index] = timestamp
+            self._index = (self._index + 1) % self.capacity
+            self.count += 1
+
+    def latest(self):
+        """
+        :return: 最新的采样值，尚无数据时返回 None
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            return self._values[self._index - 1]
+
+    def latest_time(self):
+        """
+        :return: 最新采样的时间戳 (time.monotonic)，尚无数据时返回 None
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            return self._times[self._index - 1]
+
+    def window(self, n):
+        """
+        :return: 最近 n 个采样值，按时间从旧到新排列
+        """
+        with self._lock:
+            return self._slice(self._values, n)
+
+    def times(self, n):
+        """
+        :return: 最近 n 个采样的时间戳，按时间从旧到新排列
+        """
+        with self._lock:
+            return self._slice(self._times, n)
+
+    def since(self, count):
+        """
+        :param count: 调用方已经读取到的累计采样数
+        :return: (新的累计采样数, 其后新增的 (时间戳, 值) 列表)
+        """
+        with self._lock:
+            n = min(self.count - count, self.capacity)
+            values = self._slice(self._values, n)
+            times = self._slice(self._times, n)
+            return self.count, list(zip(times, values))
+
+    def _slice(self, buf, n):
+        n = max(0, min(n, self.count, self.capacity))
+        start = (self._index - n) % self.capacity
+        if start + n <= self.capacity:
+            return buf[start:start + n]
+        head = buf[start:]
+        tail = buf[:self._index]
+        if np is not None:
+            return np.concatenate((head, tail))
+        return head + tail
+
+
+class ADCSampler:
+    """
+    在后台线程中按各通道设定的频率采样，结果写入环形缓冲区，
+    控制循环只读取内存，不在热路径上访问 I2C 总线。
+
+    用法：
+        sampler = ADCSampler()
+        sampler.add("light", PhotosensitiveSensor(), rate=50)
+        sampler.start()
+        sampler.latest("light")
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        :param capacity: 每个通道环形缓冲区的容量
+        """
+        self.capacity = capacity
+        self._channels = {}  # 名称 -> [source, period, next_due, RingBuffer, errors, key, last_error]
+        self._thread = None
+        self._running = False
+        self._new_sample = threading.Condition()
+
+    def add(self, name, source, rate=10, key=None):
+        """
+        注册一个采样通道。
+
+        :param name: 通道名称
+        :param source: 带 read() 方法的对象，例如 ADC 或其子类传感器
+        :param rate: 采样频率 (Hz)
+        :param key: 从 read() 的返回值中取出数值的函数。read() 返回的不是单个数值时必须提供，
+                    例如 SoundSensor、FlameSensor、MQGasSensor 返回 (信号, 原始值)，使用 key=lambda r: r[1]
+        :return: 该通道的 RingBuffer
+        """
+        buffer = RingBuffer(self.capacity)
+        self._channels[name] = [source, 1.0 / rate, time.monotonic(), buffer, 0, key, None]
+        return buffer
+
+    def buffer(self, name):
+        return self._channels[name][3]
+
+    def latest(self, name):
+        """
+        :return: 通道最新的采样值
+        """
+        return self._channels[name][3].latest()
+
+    def window(self, name, n):
+        """
+        :return: 通道最近 n 个采样值
+        """
+        return self._channels[name][3].window(n)
+
+    def errors(self, name):
+        """
+        :return: 通道累计读取失败的次数 (例如 I2C 瞬时错误，或 read() 的返回值不是数值)，失败的读取不写入缓冲区
+        """
+        return self._channels[name][4]
+
+    def last_error(self, name):
+        """
+        :return: 通道最近一次读取失败的异常，没有失败过时返回 None
+        """
+        return self._channels[name][6]
+
+    def stream(self, name, timeout=None):
+        """
+        生成器，逐个产出通道的新采样 (时间戳, 值)。
+
+        :param timeout: 等待新数据的超时时间 (秒)，超时后生成器结束
+        """
+        buffer = self._channels[name][3]
+        seen = buffer.count
+        while self._running:
+            with self._new_sample:
+                if buffer.count == seen:
+                    if not self._new_sample.wait(timeout) and buffer.count == seen:
+                        return
+            seen, samples = buffer.since(seen)
+            for sample in samples:
+                yield sample
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        with self._new_sample:
+            self._new_sample.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            now = time.monotonic()
+            next_due = now + 0.1
+            sampled = False
+            for channel in list(self._channels.values()):
+                source, period, due, buffer = channel[:4]
+                key = channel[5]
+                if due <= now:
+                    try:
+                        value = source.read()
+                        buffer.append(value if key is None else key(value), now)
+                        sampled = True
+                    except Exception as error:
+                        # 单次读取失败不能让采样线程退出
+                        channel[4] += 1
+                        channel[6] = error
+                    # 落后超过一个周期时直接对齐到当前时间，不补采
+                    due = max(due + period, now)
+                    channel[2] = due
+                next_due = min(next_due, due)
+            if sampled:
+                with self._new_sample:
+                    self._new_sample.notify_all()
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class MedianFilter:
+    """
+    固定窗口的流式中值滤波，附带离群值剔除。窗口大小固定，
+    每个新值的处理代价与数据流长度无关。
+    """
+
+    def __init__(self, size=5, max_jump=None):
+        """
+        :param size: 中值窗口大小
+        :param max_jump: 与当前中值相差超过该值的读数视为离群值；连续 size 次离群则认为目标确实移动，重新开始
+        """
+        self.size = size
+        self.max_jump = max_jump
+        self._window = deque()
+        self._sorted = []
+        self._rejected = 0
+        self.outliers = 0  # 累计剔除的离群值数量
+
+    def median(self):
+        if not self._sorted:
+            return None
+        n = len(self._sorted)
+        if n % 2:
+            return self._sorted[n // 2]
+        return (self._sorted[n // 2 - 1] + self._sorted[n // 2]) / 2
+
+    def update(self, value):
+        """
+        输入一个新读数。
+
+        :return: 当前滤波后的值
+        """
+        if (
+            self.max_jump is not None
+            and len(self._window) == self.size
+            and abs(value - self.median()) > self.max_jump
+        ):
+            self._rejected += 1
+            self.outliers += 1
+            if self._rejected < self.size:
+                return self.median()
+            self.reset()
+        self._rejected = 0
+        self._window.append(value)
+        bisect.insort(self._sorted, value)
+        if len(self._window) > self.size:
+            old = self._window.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+        return self.median()
+
+    def reset(self):
+        self._window.clear()
+        del self._sorted[:]
+        self._rejected = 0
+
+
+class UltrasoundRanger:
+    """
+    连续测距：后台线程按固定频率触发超声波模块，原始回声距离带时间戳写入环形缓冲区，
+    经过中值滤波和离群值剔除后，控制循环通过 distance() 非阻塞地读取结果。
+    超时（read() 返回 0）和读取异常不会被当作有效距离，原始缓冲区中记为 NaN，测距线程继续运行。
+    """
+
+    def __init__(self, ultrasound, rate=30, capacity=256, window=5, max_jump=30):
+        """
+        :param ultrasound: jetson.Ultrasound 或 rk3390.Ultrasound 实例
+        :param rate: 触发频率 (Hz)
+        :param capacity: 原始回声环形缓冲区容量
+        :param window: 中值窗口大小
+        :param max_jump: 离群值阈值 (厘米)
+        """
+        self.ultrasound = ultrasound
+        self.period = 1.0 / rate
+        self.raw = RingBuffer(capacity)
+        self.filter = MedianFilter(window, max_jump)
+        self.timeouts = 0  # 累计超时次数
+        self.errors = 0  # 累计读取异常次数 (GPIO/字符设备错误)
+        self.last_error = None
+        self._distance = None
+        self._timestamp = None
+        self._thread = None
+        self._running = False
+
+    def distance(self):
+        """
+        :return: 最新的滤波后距离 (厘米)，尚无有效读数时返回 None
+        """
+        return self._distance
+
+    def timestamp(self):
+        """
+        :return: 最新有效读数的时间戳 (time.monotonic)
+        """
+        return self._timestamp
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        due = time.monotonic()
+        while self._running:
+            now = time.monotonic()
+            try:
+                value = self.ultrasound.read()
+            except Exception as error:
+                # 单次读取失败不能让测距线程退出
+                self.raw.append(float("nan"), now)
+                self.errors += 1
+                self.last_error = error
+            else:
+                if value:
+                    self.raw.append(value, now)
+                    self._distance = self.filter.update(value)
+                    self._timestamp = now
+                else:
+                    self.raw.append(float("nan"), now)
+                    self.timeouts += 1
+            # 跟不上设定频率时不补发触发
+            due = max(due + self.period, time.monotonic())
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
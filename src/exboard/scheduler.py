@@ -0,0 +1,276 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+from .metrics import counter, op
+
+
+def bus_key(source):
+    """
+    推断传感器读取时占用的总线，同一总线的读取会被安排在一起连续执行。
+
+    :param source: 传感器对象
+    :return: 例如 ("i2c", 7)、("i2c", 6)、("gpio", 5)，与 run_on() 使用的键相同，无法推断时返回 None
+    """
+    adc = getattr(source, "adc", source)
+    if hasattr(adc, "SUBLINE"):  # jetson.ADC
+        return ("i2c", adc.SUBLINE)
+    i2c = getattr(adc, "i2c", None)
+    if i2c is not None:  # rk3390.ADC / ADCBank
+        # "/dev/i2c-6" -> 6，与 jetson 后端一样使用总线编号
+        number = getattr(i2c, "devpath", "").rpartition("-")[2]
+        return ("i2c", int(number) if number.isdigit() else id(i2c))
+    echo_pin = getattr(source, "echo_pin", None)  # rk3390.Ultrasound
+    if echo_pin is None:
+        echo_pin = getattr(getattr(source, "echo", None), "channel", None)  # jetson.Ultrasound
+    if echo_pin is not None:
+        return ("gpio", echo_pin)
+    return None
+
+
+class Task:
+    """
+    一个已注册的周期读取任务及其统计。
+    """
+
+    def __init__(self, name, read, rate, priority, bus, callback, queue):
+        self.name = name
+        self.read = read
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.priority = priority
+        self.bus = bus
+        self.callback = callback
+        self.queue = queue
+        self.due = None  # 下一次读取的计划时间 (time.monotonic)
+        self.active = True
+        self.runs = 0
+        self.missed = 0  # 读取完成时已超过下一周期的次数
+        self.errors = 0
+        self.dropped = 0  # 队列已满而丢弃的结果数
+        self.max_lateness = 0.0  # 最大开始延迟 (秒)
+        self.last_value = None
+        self.last_time = None
+        self.last_error = None
+        self._read_stats = op("Scheduler.read", task=name)
+        self._missed = counter(
+            "exboard_scheduler_missed_deadlines_total",
+            "Scheduled sensor reads that finished after their next period started",
+            task=name,
+        )
+
+    def as_dict(self):
+        return {
+            "rate": self.rate,
+            "priority": self.priority,
+            "bus": self.bus,
+            "runs": self.runs,
+            "missed": self.missed,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "max_lateness": self.max_lateness,
+            "last_value": self.last_value,
+            "last_time": self.last_time,
+        }
+
+
+class Scheduler:
+    """
+    统一的多频率轮询调度器：各传感器以目标频率和优先级注册，由一个后台线程按截止时间堆执行，
+    同时到期的读取按总线分组连续执行，结果通过回调或队列交付。
+
+    读取完成时已经超过下一周期的开始时间记为一次错过截止时间，之后直接对齐到当前时间，不补读。
+
+    用法：
+        scheduler = Scheduler()
+        scheduler.add("sound", SoundSensor(), rate=100, callback=print)
+        scheduler.add("distance", Ultrasound(), rate=20, priority=1, queue=q)
+        scheduler.start()
+        scheduler.stats()
+    """
+
+    def __init__(self, group_window=0.001, on_missed=None):
+        """
+        :param group_window: 同一总线上在该时间 (秒) 内到期的读取会提前并入当前批次
+        :param on_missed: 错过截止时间时调用 on_missed(name, lateness)，lateness 为超出的时间 (秒)
+        """
+        self.group_window = group_window
+        self.on_missed = on_missed
+        self._tasks = {}  # 名称 -> Task
+        self._heap = []  # (due, -priority, 序号, Task)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def add(self, name, source, rate=10, priority=0, bus=None, callback=None, queue=None):
+        """
+        注册一个周期读取任务，调度器运行中也可以添加。
+
+        :param name: 任务名称
+        :param source: 带 read() 方法的传感器对象，或无参数的可调用对象
+        :param rate: 读取频率 (Hz)
+        :param priority: 优先级，数值越大越先执行
+        :param bus: 总线键，None 时由 bus_key() 推断
+        :param callback: 每次读取后调用 callback(name, timestamp, value)
+        :param queue: 每次读取后放入 (name, timestamp, value)，队列已满时丢弃该结果
+        :return: Task
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        read = getattr(source, "read", source)
+        if bus is None:
+            bus = bus_key(source)
+        if bus is None:
+            bus = ("task", name)  # 单独成组
+        task = Task(name, read, rate, priority, bus, callback, queue)
+        with self._cond:
+            if name in self._tasks:
+                self._tasks[name].active = False
+            self._tasks[name] = task
+            task.due = time.monotonic()
+            self._push(task)
+            self._cond.notify()
+        return task
+
+    def remove(self, name):
+        with self._cond:
+            task = self._tasks.pop(name)
+            task.active = False
+
+    def task(self, name):
+        return self._tasks[name]
+
+    def latest(self, name):
+        """
+        :return: 任务最近一次读取的值
+        """
+        return self._tasks[name].last_value
+
+    def stats(self):
+        """
+        :return: {名称: {"rate", "priority", "bus", "runs", "missed", "errors", "dropped", "max_lateness", ...}}
+        """
+        return {name: task.as_dict() for name, task in list(self._tasks.items())}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _push(self, task):
+        heapq.heappush(self._heap, (task.due, -task.priority, next(self._seq), task))
+
+    def _next_batch(self):
+        # 等待到最早的截止时间，取出所有已到期的任务，并把同一总线上即将到期的任务一起取出
+        with self._cond:
+            while self._running:
+                while self._heap and not self._heap[0][3].active:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                break
+            else:
+                return []
+
+            now = time.monotonic()
+            batch = []
+            buses = set()
+            while self._heap and self._heap[0][0] <= now:
+                task = heapq.heappop(self._heap)[3]
+                if task.active:
+                    batch.append(task)
+                    buses.add(task.bus)
+            if self.group_window:
+                horizon = now + self.group_window
+                early = []
+                while self._heap and self._heap[0][0] <= horizon:
+                    entry = heapq.heappop(self._heap)
+                    if entry[3].active and entry[3].bus in buses:
+                        batch.append(entry[3])
+                    elif entry[3].active:
+                        early.append(entry)
+                for entry in early:
+                    heapq.heappush(self._heap, entry)
+            return batch
+
+    @staticmethod
+    def _order(batch):
+        # 按总线分组，组的顺序由组内最高优先级和最早截止时间决定
+        groups = {}
+        for task in batch:
+            groups.setdefault(task.bus, []).append(task)
+        ordered = []
+        for tasks in groups.values():
+            tasks.sort(key=lambda task: (-task.priority, task.due))
+        for tasks in sorted(groups.values(), key=lambda tasks: (-tasks[0].priority, tasks[0].due)):
+            ordered.extend(tasks)
+        return ordered
+
+    def _run(self):
+        while self._running:
+            for task in self._order(self._next_batch()):
+                if not task.active:
+                    continue
+                self._execute(task)
+                with self._cond:
+                    if task.active:
+                        self._push(task)
+
+    def _execute(self, task):
+        start = time.monotonic()
+        task.max_lateness = max(task.max_lateness, start - task.due)
+        try:
+            value = task._read_stats.call(task.read)
+        except Exception as error:
+            task.errors += 1
+            task.last_error = error
+            value = None
+        else:
+            task.runs += 1
+            task.last_value = value
+            task.last_time = start
+            if task.queue is not None:
+                try:
+                    task.queue.put_nowait((task.name, start, value))
+                except queue.Full:
+                    task.dropped += 1
+            if task.callback is not None:
+                try:
+                    task.callback(task.name, start, value)
+                except Exception as error:
+                    # 回调异常不能让调度线程退出
+                    task.errors += 1
+                    task.last_error = error
+
+        finished = time.monotonic()
+        deadline = task.due + task.period
+        if finished > deadline:
+            task.missed += 1
+            task._missed.inc()
+            if self.on_missed is not None:
+                try:
+                    self.on_missed(task.name, finished - deadline)
+                except Exception as error:
+                    # 与回调一样，不能让调度线程退出
+                    task.errors += 1
+                    task.last_error = error
+        # 落后超过一个周期时直接对齐到当前时间，不补读
+        task.due = max(deadline, finished)
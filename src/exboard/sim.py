@@ -0,0 +1,1628 @@
+"""
+不依赖硬件的扩展板模拟器，可在普通 Linux 上运行 jetson.py / rk3390.py 的全部代码。
+
+模拟的硬件：
+    - 0x24 扩展板控制器：ADC 寄存器 (8 通道 x 3 种功能码) 和 RGB 彩灯 (I2C 帧与 UART 帧)
+    - 0x28 MFRC522：寄存器文件、FIFO、CRC 协处理器，以及场内的虚拟 MIFARE 卡
+    - GPIO：输出/输入电平、边沿回调和字符设备边沿事件，可按脚本在触发后产生超声波回声脉冲
+    - PWM：临时目录中的 sysfs 文件 (period / duty_cycle / enable / polarity)，包括 rk3390.Servo 保持打开的 duty_cycle
+    - VISCA 摄像机：运行在伪终端 (pty) 另一端的云台，返回 ACK / 完成 / 错误应答
+
+每次总线访问可以附加固定延迟，模拟真实硬件的事务耗时；同时按类型统计事务数、字节数和系统调用次数。
+
+用法：
+    EXBOARD_BACKEND=sim python app.py               # 导入时安装，使用 jetson 的接口
+    EXBOARD_BACKEND=sim EXBOARD_SIM_BOARD=rk3390 ...  # 使用 rk3390 的接口
+    EXBOARD_SIM_LATENCY="i2c=0.0002,serial=0.002"    # 每次事务的延迟 (秒)
+
+    from exboard import sim
+    sim.simulator.place_card(sim.VirtualCard([0x12, 0x34, 0x56, 0x78]))
+    sim.simulator.echo(trigger_pin=4, echo_pin=5, distance=50)
+
+    with sim.Simulator() as simulator:              # 未选择 sim 后端时显式安装，退出时恢复
+        ...
+"""
+
+import collections
+import errno
+import fcntl
+import heapq
+import importlib
+import os
+import select
+import struct
+import tempfile
+import termios
+import threading
+import time
+import tty
+
+# 统计和延迟的类别
+KINDS = ("i2c", "gpio", "pwm", "serial")
+
+SPEED_OF_SOUND = 34300  # cm/s
+ECHO_DELAY = 0.0005  # 触发结束到回声上升沿的时间 (秒)
+
+
+def _delay(seconds):
+    """
+    等待 seconds 秒。大部分时间 sleep，最后一小段让出 GIL 并自旋，避免 sleep 的调度误差。
+    """
+    if seconds <= 0:
+        return
+    end = time.perf_counter() + seconds
+    if seconds > 0.0002:
+        time.sleep(seconds - 0.0002)
+    while time.perf_counter() < end:
+        time.sleep(0)
+
+
+def parse_latency(text):
+    """
+    解析延迟设置："0.0002" 表示所有类型，"i2c=0.0002,serial=0.002" 分别设置。
+
+    :return: 秒数、{类型: 秒数} 或 None (空字符串)
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if "=" not in text:
+        return float(text)
+    latency = {}
+    for item in text.split(","):
+        kind, seconds = item.split("=")
+        latency[kind.strip()] = float(seconds)
+    return latency
+
+
+def _crc_a(data):
+    crc = 0x6363
+    for byte in data:
+        byte ^= crc & 0xFF
+        byte = (byte ^ (byte << 4)) & 0xFF
+        crc = (crc >> 8) ^ (byte << 8) ^ (byte << 3) ^ (byte >> 4)
+    return bytes((crc & 0xFF, crc >> 8))
+
+
+class Counter:
+    """
+    一类访问的累计统计。
+    """
+
+    __slots__ = ("transactions", "bytes", "syscalls")
+
+    def __init__(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.syscalls = 0
+
+    def as_dict(self):
+        return {"transactions": self.transactions, "bytes": self.bytes, "syscalls": self.syscalls}
+
+
+class _Timeline:
+    """
+    在后台线程中按时间顺序执行回调，用于产生 GPIO 边沿。
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def at(self, when, func, *args):
+        """
+        :param when: time.monotonic() 时间
+        """
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (when, self._seq, func, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                when, _, func, args = self._heap[0]
+                remaining = when - time.monotonic()
+                if remaining > 0.0002:
+                    # 新加入更早的事件时会被唤醒
+                    self._cond.wait(remaining - 0.0002)
+                    continue
+                heapq.heappop(self._heap)
+            while time.monotonic() < when:
+                time.sleep(0)
+            func(*args)
+
+
+# ---------------------------------------------------------------------------
+# I2C 设备
+# ---------------------------------------------------------------------------
+
+
+class ExpansionBoard:
+    """
+    0x24 扩展板控制器。
+
+    寄存器按 16 位小端字编址：0x10+n 为通道 n 的原始值 (0~4095)，0x20+n 为电压 (mV)，
+    0x30+n 为电压比 (千分比)；读取时寄存器地址自动递增。
+    写入 [200] + 72 字节颜色 + [99] 更新彩灯；rk3390 通过 UART 发送 DD 55 EE 开头的帧。
+    """
+
+    ADC_BASE = 0x10
+    CHANNELS = 8
+    LENGTH = 24
+    VREF_MV = 3300
+    FULL_SCALE = 4095
+
+    def __init__(self):
+        self.adc = [0] * self.CHANNELS  # 整数或无参可调用对象
+        self.leds = bytearray(self.LENGTH * 3)
+        self.frames = 0  # 收到的完整彩灯帧数
+        self._pointer = 0
+        self._uart = bytearray()
+
+    def set_adc(self, channel, value):
+        """
+        :param value: 原始值 0~4095，或每次读取时调用的函数 (例如随时间变化的波形)
+        """
+        self.adc[channel] = value
+
+    def _raw(self, channel):
+        value = self.adc[channel]
+        if callable(value):
+            value = value()
+        return max(0, min(int(value), self.FULL_SCALE))
+
+    def _register(self, register):
+        function, channel = divmod(register - self.ADC_BASE, 16)
+        if not 0 <= channel < self.CHANNELS or function not in (0, 1, 2):
+            return 0
+        raw = self._raw(channel)
+        if function == 1:
+            return raw * self.VREF_MV // self.FULL_SCALE
+        if function == 2:
+            return raw * 1000 // self.FULL_SCALE
+        return raw
+
+    def i2c_write(self, data):
+        if len(data) == self.LENGTH * 3 + 2 and data[0] == 200 and data[-1] == 99:
+            self.leds[:] = data[1:-1]
+            self.frames += 1
+        elif data:
+            self._pointer = data[0]
+
+    def i2c_read(self, length):
+        out = bytearray()
+        register = self._pointer
+        while len(out) < length:
+            out += struct.pack("<H", self._register(register))
+            register += 1
+        return bytes(out[:length])
+
+    def uart_write(self, data):
+        """
+        解析 rk3390 的 UART 彩灯帧：12 字节帧头、2 字节大端长度、2 字节扩展次数、颜色、AA BB。
+        """
+        self._uart += data
+        while True:
+            start = self._uart.find(b"\xdd\x55\xee")
+            if start < 0:
+                del self._uart[:-2]
+                return
+            del self._uart[:start]
+            if len(self._uart) < 16:
+                return
+            length = (self._uart[12] << 8) | self._uart[13]
+            end = 16 + length
+            if len(self._uart) < end + 2:
+                return
+            if self._uart[end:end + 2] == b"\xaa\xbb":
+                colors = self._uart[16:end]
+                self.leds[: len(colors)] = colors[: len(self.leds)]
+                self.frames += 1
+            del self._uart[: end + 2]
+
+
+class VirtualCard:
+    """
+    一张虚拟 MIFARE Classic 卡。
+
+    卡片状态按 ISO/IEC 14443-3 变化：IDLE -> (REQA) READY -> (防冲突/选卡) ACTIVE -> (HALT) HALT。
+    与真实卡片一样，READY/ACTIVE 状态下收到 REQA 会回到 IDLE 且不应答。
+    """
+
+    DEFAULT_KEY = bytes([0xFF] * 6)
+    ACCESS_BITS = bytes([0xFF, 0x07, 0x80, 0x69])
+
+    def __init__(self, uid, card="1K", key=DEFAULT_KEY, data=None):
+        """
+        :param uid: 4、7 或 10 字节卡号
+        :param card: "1K" 或 "4K"
+        :param key: 所有扇区的密钥 A/B
+        :param data: {blockAddr: bytes} 初始数据
+        """
+        self.uid = bytes(uid)
+        if len(self.uid) not in (4, 7, 10):
+            raise ValueError("uid 必须为 4、7 或 10 字节")
+        self.card = card
+        self.sak = 0x18 if card == "4K" else 0x08
+        self.atqa = {4: 0x0004, 7: 0x0044, 10: 0x0084}[len(self.uid)]
+        self.memory = bytearray(16 * (256 if card == "4K" else 64))
+        block0 = bytearray(self.uid)
+        if len(self.uid) == 4:
+            block0.append(self.uid[0] ^ self.uid[1] ^ self.uid[2] ^ self.uid[3])
+        block0 += bytes((self.sak, self.atqa & 0xFF, self.atqa >> 8))
+        self.memory[0:len(block0)] = block0
+        for block in range(len(self.memory) // 16):
+            if block == self.trailer(block):
+                self.memory[block * 16:block * 16 + 16] = bytes(key) + self.ACCESS_BITS + bytes(key)
+        for block, value in (data or {}).items():
+            self.memory[block * 16:block * 16 + len(value)] = bytes(value)
+        self.reset()
+
+    def reset(self):
+        """
+        模拟卡片离开再进入射频场 (重新上电)。
+        """
+        self.state = "idle"
+        self.level = 0  # 当前防冲突级联级别
+        self.sector = None  # 已认证的扇区尾块
+        self.pending_write = None
+
+    @staticmethod
+    def trailer(block):
+        if block < 128:
+            return block // 4 * 4 + 3
+        return (block - 128) // 16 * 16 + 143
+
+    def cascade(self, level):
+        """
+        :return: 级联级别 level 的 5 字节 (卡号或级联标记 0x88 + BCC)
+        """
+        levels = len(self.uid) // 3  # 4 -> 1, 7 -> 2, 10 -> 3
+        if level == levels - 1:
+            part = self.uid[level * 3:level * 3 + 4]
+        else:
+            part = bytes([0x88]) + self.uid[level * 3:level * 3 + 3]
+        return part + bytes([part[0] ^ part[1] ^ part[2] ^ part[3]])
+
+    def complete(self, level):
+        return level == len(self.uid) // 3 - 1
+
+    def block(self, block):
+        return bytes(self.memory[block * 16:block * 16 + 16])
+
+
+class MFRC522Chip:
+    """
+    0x28 MFRC522 的寄存器文件。多字节 I2C 访问不递增寄存器地址 (与芯片一致)，
+    因此块读写 FIFODATAREG 时所有字节都进出 FIFO。
+
+    Transceive 在写入 StartSend 时立即完成，MFAuthent 在写入命令时立即完成。
+    IRQ 引脚电平由 ComIrqReg & ComIEnReg (以及 DivIrqReg & DivIEnReg) 决定，IRqInv 置位时低电平有效；
+    电平变化时调用 irq_listener(level)。
+    """
+
+    COMMANDREG = 0x01
+    COMIENREG = 0x02
+    DIVIENREG = 0x03
+    COMIRQREG = 0x04
+    DIVIRQREG = 0x05
+    ERRORREG = 0x06
+    STATUS2REG = 0x08
+    FIFODATAREG = 0x09
+    FIFOLEVELREG = 0x0A
+    CONTROLREG = 0x0C
+    BITFRAMINGREG = 0x0D
+    COLLREG = 0x0E
+    CRCRESULTREGMSB = 0x21
+    CRCRESULTREGLSB = 0x22
+    VERSIONREG = 0x37
+
+    IDLE = 0x00
+    CALCCRC = 0x03
+    TRANSCEIVE = 0x0C
+    MFAUTHENT = 0x0E
+    SOFTRESET = 0x0F
+
+    RESET_VALUES = {
+        0x01: 0x20,
+        0x02: 0x80,
+        0x04: 0x14,
+        0x0C: 0x10,
+        0x0E: 0xA0,
+        0x11: 0x3F,
+        0x14: 0x80,
+        0x21: 0xFF,
+        0x22: 0xFF,
+        0x37: 0x92,
+    }
+
+    FIFO_SIZE = 64
+    ACK = 0x0A
+    NAK = 0x04
+
+    def __init__(self):
+        self.cards = []  # 射频场内的 VirtualCard
+        self.fifo = collections.deque()
+        self._pointer = 0
+        self.irq_listener = None  # fn(level)，IRQ 引脚电平变化时调用
+        self.reset()
+        self._irq = self.irq_level()
+
+    def reset(self):
+        self.regs = bytearray(64)
+        for register, value in self.RESET_VALUES.items():
+            self.regs[register] = value
+        self.fifo.clear()
+
+    def irq_level(self):
+        """
+        :return: IRQ 引脚当前电平
+        """
+        active = (self.regs[self.COMIRQREG] & self.regs[self.COMIENREG] & 0x7F) or (
+            self.regs[self.DIVIRQREG] & self.regs[self.DIVIENREG] & 0x14
+        )
+        if self.regs[self.COMIENREG] & 0x80:  # IRqInv
+            return not active
+        return bool(active)
+
+    def _update_irq(self):
+        level = self.irq_level()
+        if level != self._irq:
+            self._irq = level
+            if self.irq_listener is not None:
+                self.irq_listener(level)
+
+    def i2c_write(self, data):
+        self._pointer = data[0] & 0x3F
+        for value in data[1:]:
+            self.write(self._pointer, value)
+
+    def i2c_read(self, length):
+        return bytes(self.read(self._pointer) for _ in range(length))
+
+    def read(self, register):
+        if register == self.FIFODATAREG:
+            return self.fifo.popleft() if self.fifo else 0
+        if register == self.FIFOLEVELREG:
+            return len(self.fifo)
+        return self.regs[register]
+
+    def write(self, register, value):
+        if register == self.FIFODATAREG:
+            if len(self.fifo) >= self.FIFO_SIZE:
+                self.regs[self.ERRORREG] |= 0x10  # BufferOvfl
+            else:
+                self.fifo.append(value)
+        elif register == self.FIFOLEVELREG:
+            if value & 0x80:  # FlushBuffer
+                self.fifo.clear()
+                self.regs[self.ERRORREG] &= ~0x10
+        elif register in (self.COMIRQREG, self.DIVIRQREG):
+            # Set1 为 1 时置位，为 0 时清除被标记的位
+            if value & 0x80:
+                self.regs[register] |= value & 0x7F
+            else:
+                self.regs[register] &= ~value & 0x7F
+        elif register == self.COMMANDREG:
+            self._command(value & 0x0F)
+        elif register == self.BITFRAMINGREG:
+            self.regs[register] = value
+            if value & 0x80 and self.regs[self.COMMANDREG] & 0x0F == self.TRANSCEIVE:
+                self._transceive()
+        elif register != self.VERSIONREG:
+            self.regs[register] = value
+        self._update_irq()
+
+    def _command(self, command):
+        if command == self.SOFTRESET:
+            self.reset()
+            return
+        self.regs[self.COMMANDREG] = (self.regs[self.COMMANDREG] & 0xF0) | command
+        if command == self.CALCCRC:
+            crc = _crc_a(bytes(self.fifo))
+            self.fifo.clear()
+            self.regs[self.CRCRESULTREGLSB] = crc[0]
+            self.regs[self.CRCRESULTREGMSB] = crc[1]
+            self.regs[self.DIVIRQREG] |= 0x04  # CRCIRq
+        elif command == self.MFAUTHENT:
+            self._authenticate(bytes(self.fifo))
+            self.fifo.clear()
+            self.regs[self.COMMANDREG] &= 0xF0
+
+    def _active_card(self):
+        for card in self.cards:
+            if card.state == "active":
+                return card
+        return None
+
+    def _authenticate(self, data):
+        card = self._active_card()
+        if card is not None and len(data) >= 12 and data[0] in (0x60, 0x61):
+            block = data[1]
+            if block * 16 < len(card.memory):
+                trailer = card.trailer(block)
+                stored = card.block(trailer)
+                key = stored[0:6] if data[0] == 0x60 else stored[10:16]
+                if data[2:8] == key:
+                    card.sector = trailer
+                    self.regs[self.STATUS2REG] |= 0x08  # MFCrypto1On
+                    self.regs[self.COMIRQREG] |= 0x10  # IdleIRq
+                    return
+            # 认证失败的卡片不再应答，回到 IDLE
+            card.reset()
+        self.regs[self.COMIRQREG] |= 0x01  # TimerIRq
+
+    def _transceive(self):
+        frame = bytes(self.fifo)
+        self.fifo.clear()
+        framing = self.regs[self.BITFRAMINGREG]
+        self.regs[self.ERRORREG] = 0
+        self.regs[self.COLLREG] |= 0x20  # CollPosNotValid
+        reply = self._field(frame, framing & 0x07)
+        if reply is None:
+            self.regs[self.COMIRQREG] |= 0x01  # TimerIRq
+            return
+        data, last_bits, collision = reply
+        self.fifo.extend(data)
+        self.regs[self.CONTROLREG] = (self.regs[self.CONTROLREG] & 0xF8) | last_bits
+        if collision is not None:
+            self.regs[self.ERRORREG] |= 0x08  # ColErr
+            self.regs[self.COLLREG] = (self.regs[self.COLLREG] & 0xC0) | (collision & 0x1F)
+        self.regs[self.COMIRQREG] |= 0x60  # TxIRq | RxIRq
+
+    def _field(self, frame, tx_last_bits):
+        """
+        射频场内的卡片处理一帧数据。
+
+        :return: (应答字节, 最后一字节的有效位数, 冲突位置或 None)，没有卡片应答时返回 None
+        """
+        if not frame:
+            return None
+        if len(frame) == 1 and tx_last_bits == 7 and frame[0] in (0x26, 0x52):
+            return self._request(wakeup=frame[0] == 0x52)
+        if frame[0] in (0x93, 0x95, 0x97):
+            level = (frame[0] - 0x93) // 2
+            if len(frame) == 9 and frame[1] == 0x70:
+                return self._select(level, frame)
+            return self._anticollision(level, frame, tx_last_bits)
+        card = self._active_card()
+        if card is None or len(frame) < 3 or _crc_a(frame[:-2]) != frame[-2:]:
+            return None
+        payload = frame[:-2]
+        if card.pending_write is not None:
+            block, card.pending_write = card.pending_write, None
+            if len(payload) != 16:
+                return (bytes([self.NAK]), 4, None)
+            card.memory[block * 16:block * 16 + 16] = payload
+            return (bytes([self.ACK]), 4, None)
+        if payload[0] == 0x50 and len(payload) == 2:
+            card.reset()
+            card.state = "halt"
+            return None
+        if payload[0] in (0x30, 0xA0) and len(payload) == 2:
+            block = payload[1]
+            if (
+                card.sector is None
+                or block * 16 >= len(card.memory)
+                or card.trailer(block) != card.sector
+                or (payload[0] == 0xA0 and block == 0)
+            ):
+                card.reset()
+                return (bytes([self.NAK]), 4, None)
+            if payload[0] == 0x30:
+                data = card.block(block)
+                return (data + _crc_a(data), 0, None)
+            card.pending_write = block
+            return (bytes([self.ACK]), 4, None)
+        return None
+
+    def _request(self, wakeup):
+        responders = []
+        for card in self.cards:
+            if card.state == "idle" or (wakeup and card.state == "halt"):
+                card.reset()
+                card.state = "ready"
+                responders.append(card)
+            elif card.state != "halt":
+                card.reset()
+        if not responders:
+            return None
+        atqa = responders[0].atqa
+        collision = None
+        atqas = {card.atqa for card in responders}
+        if len(atqas) > 1:
+            # 不同的 ATQA 同时应答：第一个不一致的位即冲突位，冲突位及之后的位清零
+            end = next(bit for bit in range(16) if len({(value >> bit) & 1 for value in atqas}) > 1)
+            atqa &= (1 << end) - 1
+            collision = end + 1
+        return (bytes((atqa & 0xFF, atqa >> 8)), 0, collision)
+
+    def _anticollision(self, level, frame, tx_last_bits):
+        if len(frame) < 2:
+            return None
+        nvb = frame[1]
+        known = ((nvb >> 4) - 2) * 8 + (nvb & 0x0F)
+        if not 0 <= known < 40:
+            return None
+        sent = int.from_bytes(frame[2:], "little") & ((1 << known) - 1)
+        values = [
+            int.from_bytes(card.cascade(level), "little")
+            for card in self.cards
+            if card.state == "ready" and card.level == level
+        ]
+        values = [value for value in values if value & ((1 << known) - 1) == sent]
+        if not values:
+            return None
+        # 第一个不一致的位即冲突位，冲突位及之后的位清零
+        end = 40
+        for bit in range(known, 40):
+            if len({(value >> bit) & 1 for value in values}) > 1:
+                end = bit
+                break
+        received = values[0] & ((1 << end) - 1) & ~((1 << known) - 1)
+        first = known // 8
+        data = (received >> (first * 8)).to_bytes(5 - first, "little")
+        collision = None
+        if end < 40:
+            collision = end + 1 if end < 32 else 0x20
+        return (data, 0, collision)
+
+    def _select(self, level, frame):
+        if _crc_a(frame[:7]) != frame[7:9]:
+            return None
+        selected = None
+        for card in self.cards:
+            if card.state != "ready" or card.level != level:
+                continue
+            if card.cascade(level) == frame[2:7] and selected is None:
+                selected = card
+            else:
+                card.reset()
+        if selected is None:
+            return None
+        if selected.complete(level):
+            selected.state = "active"
+            sak = selected.sak
+        else:
+            selected.level += 1
+            sak = 0x04  # 卡号尚未完整
+        return (bytes([sak]) + _crc_a(bytes([sak])), 0, None)
+
+
+class I2CSegment:
+    """
+    一条 I2C 总线上的设备。
+    """
+
+    def __init__(self):
+        self.devices = {}  # 地址 -> 设备
+        self.lock = threading.Lock()
+
+    def attach(self, address, device):
+        self.devices[address] = device
+
+    def device(self, address):
+        device = self.devices.get(address)
+        if device is None:
+            raise OSError(errno.EREMOTEIO, os.strerror(errno.EREMOTEIO))
+        return device
+
+
+# ---------------------------------------------------------------------------
+# GPIO
+# ---------------------------------------------------------------------------
+
+
+class SimLine:
+    """
+    扩展板上的一个数字 IO (按扩展板 BCM 编号)。回声脉冲按时间计算电平，无需后台线程。
+    """
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = "in"
+        self.value = False  # 输出或外部设置的电平
+        self.pulses = collections.deque()  # [(上升沿时间, 下降沿时间)]
+        self.watchers = []  # fn(edge, timestamp_ns)，edge 为 'rising' / 'falling'
+
+    def level(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        pulses = self.pulses
+        while pulses and pulses[0][1] <= now:
+            pulses.popleft()
+        if pulses and pulses[0][0] <= now:
+            return True
+        return self.value
+
+    def notify(self, edge, when):
+        timestamp = int(when * 1e9)
+        for watcher in list(self.watchers):
+            watcher(edge, timestamp)
+
+
+class _JetsonGPIOModule:
+    """
+    Jetson.GPIO 的替身。
+    """
+
+    BOARD = 10
+    BCM = 11
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, sim):
+        self._sim = sim
+        self._mode = None
+        self._events = {}  # 引脚 -> watcher
+
+    def setwarnings(self, state):
+        pass
+
+    def setmode(self, mode):
+        self._mode = mode
+
+    def getmode(self):
+        return self._mode
+
+    def setup(self, channel, direction, initial=None, pull_up_down=None):
+        line = self._sim.line(channel)
+        line.direction = "out" if direction == self.OUT else "in"
+        if initial is not None:
+            line.value = bool(initial)
+
+    def output(self, channel, value):
+        self._sim._gpio_write(channel, bool(value))
+
+    def input(self, channel):
+        return self.HIGH if self._sim._gpio_read(channel) else self.LOW
+
+    def add_event_detect(self, channel, edge, callback=None, bouncetime=None):
+        wanted = {self.RISING: ("rising",), self.FALLING: ("falling",)}.get(
+            edge, ("rising", "falling")
+        )
+
+        def watcher(kind, timestamp):
+            if kind in wanted and callback is not None:
+                callback(channel)
+
+        self.remove_event_detect(channel)
+        self._events[channel] = watcher
+        self._sim.line(channel).watchers.append(watcher)
+
+    def remove_event_detect(self, channel):
+        watcher = self._events.pop(channel, None)
+        if watcher is not None:
+            self._sim.line(channel).watchers.remove(watcher)
+
+    def cleanup(self, channel=None):
+        channels = list(self._events) if channel is None else [channel]
+        for channel in channels:
+            self.remove_event_detect(channel)
+
+
+# ---------------------------------------------------------------------------
+# smbus2 / pyserial / python-periphery 替身
+# ---------------------------------------------------------------------------
+
+
+class _I2CMsg:
+    """
+    smbus2.i2c_msg 的替身。
+    """
+
+    def __init__(self, addr, read, buf):
+        self.addr = addr
+        self.flags = 1 if read else 0
+        self.buf = buf
+        self.len = len(buf)
+
+    @classmethod
+    def write(cls, address, buf):
+        return cls(address, False, bytearray(buf))
+
+    @classmethod
+    def read(cls, address, length):
+        return cls(address, True, bytearray(length))
+
+    def __iter__(self):
+        return iter(self.buf)
+
+    def __bytes__(self):
+        return bytes(self.buf)
+
+    def __len__(self):
+        return self.len
+
+
+class _SMBus:
+    """
+    smbus2.SMBus 的替身，每个方法对应一次 ioctl。
+    """
+
+    sim = None
+
+    def __init__(self, bus=None, force=False):
+        self.bus = bus
+        self.segment = self.sim.i2c_bus(bus)
+
+    def _transfer(self, *msgs):
+        return self.sim._i2c(self.segment, msgs)
+
+    def read_byte_data(self, i2c_addr, register, force=None):
+        return self._transfer((i2c_addr, False, [register]), (i2c_addr, True, 1))[0][0]
+
+    def write_byte_data(self, i2c_addr, register, value, force=None):
+        self._transfer((i2c_addr, False, [register, value]))
+
+    def read_word_data(self, i2c_addr, register, force=None):
+        data = self._transfer((i2c_addr, False, [register]), (i2c_addr, True, 2))[0]
+        return data[0] | (data[1] << 8)
+
+    def read_i2c_block_data(self, i2c_addr, register, length, force=None):
+        return list(self._transfer((i2c_addr, False, [register]), (i2c_addr, True, length))[0])
+
+    def write_i2c_block_data(self, i2c_addr, register, data, force=None):
+        self._transfer((i2c_addr, False, [register] + list(data)))
+
+    def i2c_rdwr(self, *i2c_msgs):
+        results = self._transfer(
+            *[(msg.addr, bool(msg.flags & 1), msg.len if msg.flags & 1 else msg.buf) for msg in i2c_msgs]
+        )
+        reads = (msg for msg in i2c_msgs if msg.flags & 1)
+        for msg, data in zip(reads, results):
+            msg.buf[:] = data
+
+    def close(self):
+        self.segment = None
+
+
+class SerialException(IOError):
+    pass
+
+
+class _PortInfo:
+    def __init__(self, device, description):
+        self.device = device
+        self.description = description
+
+    def __str__(self):
+        return f"{self.device} - {self.description}"
+
+
+class _Serial:
+    """
+    pyserial serial.Serial 的替身，读写伪终端的从端。
+    """
+
+    sim = None
+
+    def __init__(self, port=None, baudrate=9600, timeout=None, **kwargs):
+        path = self.sim._serial_path(port)
+        if path is None:
+            raise SerialException(
+                errno.ENOENT, f"could not open port {port}: [Errno 2] No such file or directory"
+            )
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self._fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        self.sim._count("serial", 0, syscalls=1, transactions=0)
+
+    def _fileno(self):
+        fd = self._fd
+        if fd is None:
+            raise SerialException("Attempting to use a port that is not open")
+        return fd
+
+    @property
+    def is_open(self):
+        return self._fd is not None
+
+    @property
+    def in_waiting(self):
+        buf = fcntl.ioctl(self._fileno(), termios.FIONREAD, b"\0\0\0\0")
+        self.sim._count("serial", 0, syscalls=1, transactions=0)
+        return struct.unpack("I", buf)[0]
+
+    def write(self, data):
+        fd = self._fileno()
+        data = bytes(data)
+        view = memoryview(data)
+        syscalls = 0
+        try:
+            while view:
+                select.select([], [fd], [])
+                written = os.write(fd, view)
+                syscalls += 2
+                view = view[written:]
+        except OSError as e:
+            raise SerialException(f"write failed: {e}")
+        self.sim._count("serial", len(data), syscalls=syscalls)
+        return len(data)
+
+    def read(self, size=1):
+        fd = self._fileno()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        data = bytearray()
+        syscalls = 0
+        try:
+            while len(data) < size:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                readable, _, _ = select.select([fd], [], [], remaining)
+                syscalls += 1
+                if not readable:
+                    break
+                data += os.read(fd, size - len(data))
+                syscalls += 1
+        except (OSError, ValueError) as e:
+            raise SerialException(f"read failed: {e}")
+        finally:
+            self.sim._count("serial", len(data), syscalls=syscalls, transactions=0)
+        return bytes(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        termios.tcflush(self._fileno(), termios.TCIFLUSH)
+
+    def close(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+
+class _ListPorts:
+    def __init__(self, sim):
+        self._sim = sim
+
+    def comports(self):
+        return [_PortInfo(port, "Simulated VISCA camera") for port in self._sim.serial_ports]
+
+
+class _EdgeEvent(collections.namedtuple("EdgeEvent", ["edge", "timestamp"])):
+    pass
+
+
+class _PeripheryGPIO:
+    """
+    periphery.GPIO 的替身：GPIO(line, direction) 为 sysfs 方式，
+    GPIO(path, offset, direction, edge=...) 为字符设备方式。
+    """
+
+    sim = None
+
+    def __init__(self, *args, edge="none", **kwargs):
+        if len(args) >= 3:
+            path, offset, direction = args[:3]
+            line = int(path.rsplit("gpiochip", 1)[1]) * 32 + offset
+        else:
+            line, direction = args[:2]
+        self.line = line
+        self.pin = self.sim._pin_for_line(line)
+        self.direction = direction
+        self.edge = edge
+        self._line = self.sim.line(self.pin)
+        self._line.direction = "out" if direction in ("out", "low", "high") else "in"
+        if direction == "high":
+            self._line.value = True
+        elif direction == "low":
+            self._line.value = False
+        self._events = collections.deque()
+        self._cond = threading.Condition()
+        if edge != "none":
+            self._line.watchers.append(self._on_edge)
+
+    def _on_edge(self, kind, timestamp):
+        if self.edge in (kind, "both"):
+            with self._cond:
+                self._events.append(_EdgeEvent(kind, timestamp))
+                self._cond.notify()
+
+    def read(self):
+        return self.sim._gpio_read(self.pin)
+
+    def write(self, value):
+        self.sim._gpio_write(self.pin, bool(value))
+
+    def poll(self, timeout=None):
+        with self._cond:
+            self.sim._count("gpio", 0)
+            return self._cond.wait_for(lambda: self._events, timeout)
+
+    def read_event(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._events)
+            self.sim._count("gpio", 16)
+            return self._events.popleft()
+
+    def close(self):
+        if self._on_edge in self._line.watchers:
+            self._line.watchers.remove(self._on_edge)
+
+
+class _PeripheryI2C:
+    """
+    periphery.I2C 的替身。
+    """
+
+    sim = None
+
+    class Message:
+        def __init__(self, data, read=False, flags=0):
+            self.data = data
+            self.read = read
+            self.flags = flags
+
+    def __init__(self, devpath):
+        self.devpath = devpath
+        self.segment = self.sim.i2c_bus(int(devpath.rsplit("-", 1)[1]))
+
+    def transfer(self, address, messages):
+        results = self.sim._i2c(
+            self.segment,
+            [(address, msg.read, len(msg.data) if msg.read else msg.data) for msg in messages],
+        )
+        reads = (msg for msg in messages if msg.read)
+        for msg, data in zip(reads, results):
+            # 与 periphery 一致，返回数据保持原来的类型
+            if isinstance(msg.data, bytearray):
+                msg.data[:] = data
+            elif isinstance(msg.data, bytes):
+                msg.data = bytes(data)
+            else:
+                msg.data = list(data)
+
+    def close(self):
+        self.segment = None
+
+
+class _PeripherySerial:
+    """
+    periphery.Serial 的替身，rk3390 的 /dev/ttyS4 连接扩展板的彩灯 UART。
+    """
+
+    sim = None
+
+    def __init__(self, devpath, baudrate, **kwargs):
+        self.devpath = devpath
+        self.baudrate = baudrate
+
+    def write(self, data):
+        data = bytes(data)
+        self.sim._delay("serial")
+        self.sim.board.uart_write(data)
+        self.sim._count("serial", len(data))
+        return len(data)
+
+    def flush(self):
+        self.sim._count("serial", 0, transactions=0)
+
+    def read(self, length, timeout=None):
+        return b""
+
+    def input_waiting(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class _PeripheryPWM:
+    """
+    periphery.PWM 的替身，读写模拟器临时目录中的 sysfs 文件。
+    """
+
+    sim = None
+
+    def __init__(self, chip, channel):
+        self.chip = chip
+        self.channel = channel
+        self._path = self.sim.pwm_path(chip, channel)
+
+    def _read(self, name):
+        self.sim._delay("pwm")
+        with open(os.path.join(self._path, name)) as f:
+            value = f.read().strip()
+        self.sim._count("pwm", len(value) + 1, syscalls=3)
+        return value
+
+    def _write(self, name, value):
+        self.sim._delay("pwm")
+        value = "%s\n" % value
+        with open(os.path.join(self._path, name), "w") as f:
+            f.write(value)
+        self.sim._count("pwm", len(value), syscalls=3)
+
+    @property
+    def period_ns(self):
+        return int(self._read("period"))
+
+    @period_ns.setter
+    def period_ns(self, value):
+        self._write("period", int(value))
+
+    @property
+    def duty_cycle_ns(self):
+        return int(self._read("duty_cycle"))
+
+    @duty_cycle_ns.setter
+    def duty_cycle_ns(self, value):
+        if int(value) > self.period_ns:
+            # 与内核一致，占空时间不能超过周期
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL))
+        self._write("duty_cycle", int(value))
+
+    @property
+    def period(self):
+        return self.period_ns / 1e9
+
+    @period.setter
+    def period(self, value):
+        self.period_ns = round(value * 1e9)
+
+    @property
+    def frequency(self):
+        return 1e9 / self.period_ns
+
+    @frequency.setter
+    def frequency(self, value):
+        self.period_ns = round(1e9 / value)
+
+    @property
+    def duty_cycle(self):
+        return self.duty_cycle_ns / self.period_ns
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        self.duty_cycle_ns = round(value * self.period_ns)
+
+    @property
+    def enabled(self):
+        return self._read("enable") == "1"
+
+    @enabled.setter
+    def enabled(self, value):
+        self._write("enable", 1 if value else 0)
+
+    @property
+    def polarity(self):
+        return self._read("polarity")
+
+    @polarity.setter
+    def polarity(self, value):
+        self._write("polarity", value)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def close(self):
+        pass
+
+
+class _SysfsFile:
+    """
+    rk3390.SysfsFile 的替身，写入模拟器临时目录中的 sysfs 文件并计入 pwm 统计。
+    """
+
+    sim = None
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_WRONLY)
+
+    def write(self, data):
+        self.sim._delay("pwm")
+        os.pwrite(self.fd, data, 0)
+        self.sim._count("pwm", len(data))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Namespace:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+def _bind(cls, sim):
+    return type(cls.__name__, (cls,), {"sim": sim})
+
+
+# ---------------------------------------------------------------------------
+# VISCA 摄像机
+# ---------------------------------------------------------------------------
+
+
+class ViscaCamera:
+    """
+    运行在伪终端主端的 VISCA 云台摄像机 (地址 1)。
+
+    命令收到后 latency 秒返回 ACK (90 4s FF)，再过 move_time 秒返回完成 (90 5s FF)；
+    两个 socket 都在执行时返回缓冲区已满错误 (90 60 03 FF)。
+    支持绝对/相对位置、home、reset 和云台位置查询 (81 09 06 12 FF)。
+    """
+
+    def __init__(self, latency=0.0, move_time=0.0):
+        self.latency = latency
+        self.move_time = move_time
+        self.pan = 0  # 步长，每度 25 步
+        self.tilt = 0
+        self.commands = collections.deque(maxlen=1024)  # 最近收到的命令
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._sockets = {1: None, 2: None}  # socket -> 完成时间
+        self._pending = []  # [(发送时间, 序号, 应答)]
+        self._seq = 0
+        self._buffer = bytearray()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._running = False
+        self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _reply(self, when, frame):
+        self._seq += 1
+        heapq.heappush(self._pending, (when, self._seq, bytes(frame)))
+
+    def _run(self):
+        while self._running:
+            now = time.monotonic()
+            while self._pending and self._pending[0][0] <= now:
+                os.write(self._master, heapq.heappop(self._pending)[2])
+            timeout = 0.05
+            if self._pending:
+                timeout = min(timeout, self._pending[0][0] - now)
+            readable, _, _ = select.select([self._master], [], [], max(0.0, timeout))
+            if not readable:
+                continue
+            try:
+                self._buffer += os.read(self._master, 1024)
+            except OSError:
+                continue
+            while True:
+                end = self._buffer.find(0xFF)
+                if end < 0:
+                    break
+                command = bytes(self._buffer[: end + 1])
+                del self._buffer[: end + 1]
+                self._handle(command, time.monotonic())
+
+    @staticmethod
+    def _steps(nibbles):
+        value = 0
+        for nibble in nibbles:
+            value = (value << 4) | (nibble & 0x0F)
+        return value - 0x10000 if value & 0x8000 else value
+
+    @staticmethod
+    def _nibbles(value):
+        value &= 0xFFFF
+        return bytes(((value >> 12) & 0xF, (value >> 8) & 0xF, (value >> 4) & 0xF, value & 0xF))
+
+    def _handle(self, command, now):
+        self.commands.append(command)
+        ready = now + self.latency
+        if len(command) > 16 or len(command) < 3:
+            self._reply(ready, b"\x90\x60\x01\xff")
+            return
+        body = command[1:-1]
+        if body[:1] == b"\x09":
+            if body == b"\x09\x06\x12":
+                self._reply(ready, b"\x90\x50" + self._nibbles(self.pan) + self._nibbles(self.tilt) + b"\xff")
+            else:
+                self._reply(ready, b"\x90\x60\x02\xff")
+            return
+        if body[:2] != b"\x01\x06" or len(body) < 3:
+            self._reply(ready, b"\x90\x60\x02\xff")
+            return
+        kind = body[2]
+        if kind in (0x02, 0x03) and len(body) == 13:
+            pan = self._steps(body[5:9])
+            tilt = self._steps(body[9:13])
+            if kind == 0x03:
+                pan += self.pan
+                tilt += self.tilt
+            self.pan, self.tilt = pan, tilt
+        elif kind in (0x04, 0x05) and len(body) == 3:
+            self.pan = self.tilt = 0
+        elif not (kind == 0x01 and len(body) == 7):
+            self._reply(ready, b"\x90\x60\x02\xff")
+            return
+        for socket, done in self._sockets.items():
+            if done is None or done <= now:
+                break
+        else:
+            self._reply(ready, b"\x90\x60\x03\xff")
+            return
+        done = ready + self.move_time
+        self._sockets[socket] = done
+        self._reply(ready, bytes((0x90, 0x40 | socket, 0xFF)))
+        self._reply(done, bytes((0x90, 0x50 | socket, 0xFF)))
+
+
+# ---------------------------------------------------------------------------
+# 模拟器
+# ---------------------------------------------------------------------------
+
+
+class Simulator:
+    """
+    一块模拟的扩展板。install() 把 jetson.py / rk3390.py 的硬件依赖替换为模拟器，
+    两个后端共享同一组设备：I2C 总线 6 和 7 都挂着 0x24 控制器和 0x28 MFRC522。
+    """
+
+    def __init__(self, latency=None, camera_port="/dev/ttyUSB0", move_time=0.0):
+        """
+        :param latency: 每次事务附加的延迟 (秒)，可为单个值或 {"i2c": ..., "gpio": ..., "pwm": ..., "serial": ...}
+        :param camera_port: VISCA 摄像机对应的串口名
+        :param move_time: 摄像机从 ACK 到完成应答的时间 (秒)
+        """
+        self.latency = dict.fromkeys(KINDS, 0.0)
+        self.set_latency(latency)
+        self.stats = {kind: Counter() for kind in KINDS}
+        self.board = ExpansionBoard()
+        self.reader = MFRC522Chip()
+        segment = I2CSegment()
+        segment.attach(0x24, self.board)
+        segment.attach(0x28, self.reader)
+        self.buses = {6: segment, 7: segment}
+        self.lines = {}
+        self.timeline = _Timeline()
+        self._echo = {}  # 触发引脚 -> (回声引脚, 距离序列)
+        self._lock = threading.Lock()
+        self._line_pins = None
+        self.camera_port = camera_port
+        self.move_time = move_time
+        self._camera = None
+        self._pwm_dir = None
+        self._saved = None  # install() 之前的绑定
+        self._installs = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        根据环境变量 EXBOARD_SIM_LATENCY 创建模拟器，格式见 parse_latency()。
+        """
+        return cls(parse_latency(os.environ.get("EXBOARD_SIM_LATENCY", "")))
+
+    def set_latency(self, latency=None, **kinds):
+        """
+        设置每次事务的延迟，例如 set_latency(0.0001) 或 set_latency(i2c=0.0002)。
+        """
+        if isinstance(latency, (int, float)):
+            latency = dict.fromkeys(KINDS, latency)
+        for kind, seconds in dict(latency or {}, **kinds).items():
+            if kind not in self.latency:
+                raise ValueError(f"未知的类型 {kind!r}, 可选: {', '.join(KINDS)}")
+            self.latency[kind] = float(seconds)
+        if getattr(self, "_camera", None) is not None:
+            self._camera.latency = self.latency["serial"]
+
+    def snapshot(self):
+        """
+        :return: {类型: {"transactions": ..., "bytes": ..., "syscalls": ...}}
+        """
+        return {kind: counter.as_dict() for kind, counter in self.stats.items()}
+
+    def reset_stats(self):
+        for counter in self.stats.values():
+            counter.transactions = counter.bytes = counter.syscalls = 0
+
+    def _count(self, kind, nbytes, syscalls=1, transactions=1):
+        with self._lock:
+            counter = self.stats[kind]
+            counter.transactions += transactions
+            counter.bytes += nbytes
+            counter.syscalls += syscalls
+
+    def _delay(self, kind):
+        _delay(self.latency[kind])
+
+    # I2C
+
+    def i2c_bus(self, number):
+        segment = self.buses.get(number)
+        if segment is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), f"/dev/i2c-{number}")
+        return segment
+
+    def _i2c(self, segment, msgs):
+        """
+        在总线上执行一次组合事务 (一次 ioctl)。
+
+        :param msgs: [(地址, 是否读取, 读取长度或写入数据)]
+        :return: 每个读取消息收到的 bytes
+        """
+        results = []
+        nbytes = 0
+        with segment.lock:
+            self._delay("i2c")
+            for address, read, payload in msgs:
+                device = segment.device(address)
+                if read:
+                    data = device.i2c_read(payload)
+                    results.append(data)
+                    nbytes += payload
+                else:
+                    device.i2c_write(bytes(payload))
+                    nbytes += len(payload)
+        self._count("i2c", nbytes)
+        return results
+
+    def set_adc(self, channel, value):
+        """
+        设置模拟通道的原始值 (0~4095) 或取值函数。
+        """
+        self.board.set_adc(channel, value)
+
+    @property
+    def leds(self):
+        """
+        彩灯当前的颜色数据 (r, g, b 依次排列)。
+        """
+        return bytes(self.board.leds)
+
+    def place_card(self, card):
+        """
+        把虚拟卡放入读卡器的射频场。
+        """
+        card.reset()
+        self.reader.cards.append(card)
+        return card
+
+    def remove_card(self, card):
+        self.reader.cards.remove(card)
+
+    def wire_reader_irq(self, pin):
+        """
+        把 MFRC522 的 IRQ 输出接到扩展板引脚 pin，供 MFRC522(..., irqPin=pin) 使用。
+        """
+        self.reader.irq_listener = lambda level: self.set_input(pin, level)
+        self.set_input(pin, self.reader.irq_level())
+
+    # GPIO
+
+    def line(self, pin):
+        line = self.lines.get(pin)
+        if line is None:
+            line = self.lines[pin] = SimLine(pin)
+        return line
+
+    def _pin_for_line(self, line):
+        # rk3390 的 CPU IO 编号换算回扩展板引脚，未映射的编号原样使用
+        if self._line_pins is None:
+            from .rk3390 import pin_map
+
+            self._line_pins = {cpu: pin for pin, cpu in pin_map.items()}
+        return self._line_pins.get(line, line)
+
+    def set_input(self, pin, value):
+        """
+        设置输入引脚的外部电平，并产生对应的边沿事件。
+        """
+        line = self.line(pin)
+        value = bool(value)
+        if line.value != value:
+            line.value = value
+            line.notify("rising" if value else "falling", time.monotonic())
+
+    def echo(self, trigger_pin, echo_pin, distance):
+        """
+        为超声波模块编写回声脚本：每次触发引脚由高变低后，回声引脚输出一个对应距离的高电平脉冲。
+
+        :param distance: 距离 (cm)。可为固定值、序列 (用完后不再有回声) 或无参函数；
+                         取值为 None 时本次没有回声
+        """
+        if callable(distance):
+            source = distance
+        elif isinstance(distance, (int, float)) or distance is None:
+            source = lambda: distance
+        else:
+            values = iter(distance)
+            source = lambda: next(values, None)
+        self._echo[trigger_pin] = (echo_pin, source)
+
+    def _gpio_read(self, pin):
+        self._delay("gpio")
+        self._count("gpio", 1)
+        return self.line(pin).level()
+
+    def _gpio_write(self, pin, value):
+        self._delay("gpio")
+        self._count("gpio", 1)
+        line = self.line(pin)
+        previous, line.value = line.value, value
+        if previous and not value and pin in self._echo:
+            self._trigger(pin)
+
+    def _trigger(self, pin):
+        echo_pin, source = self._echo[pin]
+        distance = source()
+        if distance is None:
+            return
+        rise = time.monotonic() + ECHO_DELAY
+        fall = rise + distance * 2 / SPEED_OF_SOUND
+        line = self.line(echo_pin)
+        line.pulses.append((rise, fall))
+        if line.watchers:
+            # 只有注册了边沿回调/事件时才需要后台线程，轮询时按时间计算电平
+            self.timeline.at(rise, line.notify, "rising", rise)
+            self.timeline.at(fall, line.notify, "falling", fall)
+
+    # 串口
+
+    @property
+    def camera(self):
+        """
+        VISCA 摄像机，第一次使用时创建伪终端。
+        """
+        if self._camera is None:
+            self._camera = ViscaCamera(self.latency["serial"], self.move_time)
+        return self._camera
+
+    @property
+    def serial_ports(self):
+        return [self.camera_port]
+
+    def _serial_path(self, port):
+        if port == self.camera_port or (self._camera is not None and port == self._camera.port):
+            return self.camera.port
+        return None
+
+    # PWM
+
+    def pwm_path(self, chip, channel):
+        """
+        创建并返回 PWM 通道的 sysfs 目录。
+        """
+        path = os.path.join(self.pwm_root, "pwmchip%d" % chip, "pwm%d" % channel)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+            for name, value in (("period", 0), ("duty_cycle", 0), ("enable", 0), ("polarity", "normal")):
+                with open(os.path.join(path, name), "w") as f:
+                    f.write("%s\n" % value)
+        return path
+
+    @property
+    def pwm_root(self):
+        if self._pwm_dir is None:
+            self._pwm_dir = tempfile.TemporaryDirectory(prefix="exboard-pwm-")
+        return self._pwm_dir.name
+
+    def pwm_duty_ns(self, chip, channel=0):
+        """
+        读取 sysfs 中 PWM 通道当前的占空时间。
+        """
+        with open(os.path.join(self.pwm_path(chip, channel), "duty_cycle")) as f:
+            return int(f.read())
+
+    # 安装
+
+    def modules(self):
+        """
+        :return: {模块名: 替身}，供 LazyModule.bind() 使用
+        """
+        from .jetson import MFRC522
+
+        return {
+            "Jetson.GPIO": _JetsonGPIOModule(self),
+            "smbus2": _Namespace(SMBus=_bind(_SMBus, self), i2c_msg=_I2CMsg),
+            "serial": _Namespace(Serial=_bind(_Serial, self), SerialException=SerialException),
+            "serial.tools.list_ports": _ListPorts(self),
+            "periphery": _Namespace(
+                GPIO=_bind(_PeripheryGPIO, self),
+                I2C=_bind(_PeripheryI2C, self),
+                Serial=_bind(_PeripherySerial, self),
+                PWM=_bind(_PeripheryPWM, self),
+                EdgeEvent=_EdgeEvent,
+            ),
+            # rk3390 的 RC522 原本使用 mfrc522_i2c，jetson.MFRC522 接口相同
+            "mfrc522_i2c": _Namespace(MFRC522=MFRC522),
+        }
+
+    def install(self):
+        """
+        让 jetson.py 和 rk3390.py 的硬件访问都进入本模拟器，uninstall() 恢复原来的绑定。
+        可以嵌套调用，与 uninstall() 成对使用；也可以作为上下文管理器：with Simulator() as simulator: ...
+
+        安装期间创建的对象 (已打开的总线、串口等) 在 uninstall() 之后仍然使用模拟器。
+        """
+        from . import _lazy, jetson, rk3390
+
+        self._installs += 1
+        if self._saved is not None:
+            return self
+        modules = self.modules()
+        saved = []
+        for backend in (jetson, rk3390):
+            for value in vars(backend).values():
+                if isinstance(value, _lazy.LazyModule) and value._name in modules:
+                    saved.append((value, value._module))
+                    value.bind(modules[value._name])
+        self._saved = (saved, rk3390.PWM_SYSFS, rk3390.SysfsFile)
+        rk3390.PWM_SYSFS = self.pwm_root
+        rk3390.SysfsFile = _bind(_SysfsFile, self)
+        return self
+
+    def uninstall(self):
+        """
+        恢复 install() 之前的绑定，未安装时不做任何事。
+        """
+        from . import rk3390
+
+        if self._saved is None:
+            return
+        self._installs -= 1
+        if self._installs > 0:
+            return
+        saved, rk3390.PWM_SYSFS, rk3390.SysfsFile = self._saved
+        for proxy, module in reversed(saved):
+            proxy._module = module
+        self._saved = None
+
+    @property
+    def installed(self):
+        return self._saved is not None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def close(self):
+        self._installs = min(self._installs, 1)
+        self.uninstall()
+        if self._camera is not None:
+            self._camera.close()
+            self._camera = None
+        if self._pwm_dir is not None:
+            self._pwm_dir.cleanup()
+            self._pwm_dir = None
+
+
+# 默认的模拟器。只有 EXBOARD_BACKEND=sim 时导入即安装，否则需要显式调用 simulator.install()
+# EXBOARD_SIM_BOARD 选择导出 jetson 还是 rk3390 的接口
+simulator = Simulator.from_env()
+if os.environ.get("EXBOARD_BACKEND") == "sim":
+    simulator.install()
+BOARD = os.environ.get("EXBOARD_SIM_BOARD", "jetson")
+if BOARD not in ("jetson", "rk3390"):
+    raise ValueError(f"EXBOARD_SIM_BOARD={BOARD!r} 无效, 可选: jetson, rk3390")
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    backend = importlib.import_module("." + BOARD, __package__)
+    try:
+        return getattr(backend, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
+def __dir__():
+    backend = importlib.import_module("." + BOARD, __package__)
+    return sorted(set(globals()) | set(dir(backend)))
@@ -0,0 +1,131 @@
+import math
+import threading
+import time
+
+
+def _pair(value):
+    if isinstance(value, (tuple, list)):
+        return tuple(value)
+    return (value, value)
+
+
+class TrajectoryPlanner:
+    """
+    两轴云台的轨迹规划：给定目标角度后，按最大速度和最大加速度生成平滑轨迹，
+    在后台线程中以固定控制频率把 (x, y) 一起下发给 servos.update(x, y)，
+    每个控制周期只发送一次组合更新。
+
+    适用于 jetson.Servos (VISCA) 和 rk3390.Servos (PWM)。
+
+    用法：
+        planner = TrajectoryPlanner(Servos(), rate=50)
+        planner.start()
+        planner.set_target(30, 10)
+    """
+
+    def __init__(self, servos, rate=50, max_velocity=90.0, max_acceleration=360.0, start=(0, 0)):
+        """
+        :param servos: 带 update(x, y) 方法的云台对象
+        :param rate: 控制频率 (Hz)
+        :param max_velocity: 最大角速度 (度/秒)，可为单个值或 (x, y)
+        :param max_acceleration: 最大角加速度 (度/秒²)，可为单个值或 (x, y)
+        :param start: 初始角度 (x, y)
+        """
+        self.servos = servos
+        self.rate = rate
+        self.max_velocity = _pair(max_velocity)
+        self.max_acceleration = _pair(max_acceleration)
+        self._position = list(start)
+        self._velocity = [0.0, 0.0]
+        self._target = list(start)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    def set_target(self, x, y):
+        """
+        设置新的目标角度，轨迹从当前位置和速度平滑过渡。
+        """
+        with self._lock:
+            self._target = [x, y]
+
+    def position(self):
+        """
+        :return: 当前下发的角度 (x, y)
+        """
+        with self._lock:
+            return tuple(self._position)
+
+    def settled(self):
+        """
+        :return: 是否已到达目标并停止
+        """
+        with self._lock:
+            return self._position == self._target and self._velocity == [0.0, 0.0]
+
+    def step(self, dt):
+        """
+        推进一个控制周期。
+
+        :param dt: 周期长度 (秒)
+        :return: 新的角度 (x, y)，已到达目标且静止时返回 None
+        """
+        with self._lock:
+            if self._position == self._target and self._velocity == [0.0, 0.0]:
+                return None
+            for axis in (0, 1):
+                self._step_axis(axis, dt)
+            return tuple(self._position)
+
+    def _step_axis(self, axis, dt):
+        position = self._position[axis]
+        velocity = self._velocity[axis]
+        target = self._target[axis]
+        v_max = self.max_velocity[axis]
+        a_max = self.max_acceleration[axis]
+
+        distance = target - position
+        dv_max = a_max * dt
+        arrive = distance / dt
+        if abs(arrive) <= min(v_max, dv_max) and abs(arrive - velocity) <= dv_max:
+            # 本周期内可以不超限地落在目标上。速度保留为这一步的实际速度，
+            # 下一周期再减到 0，这样紧接着重新设定目标时加速度也不超限
+            self._position[axis] = target
+            self._velocity[axis] = arrive
+            return
+
+        # 仍能在目标处停下的最大速度。按离散控制周期计算：每周期速度最多减少 a_max*dt，
+        # 位置用更新后的速度推进，从速度 v 停下需要 v²/(2*a_max) + v*dt/2 的距离
+        v_desired = math.sqrt(dv_max * dv_max / 4 + 2 * a_max * abs(distance)) - dv_max / 2
+        v_desired = math.copysign(v_desired, distance)
+        v_desired = max(-v_max, min(v_desired, v_max))
+        velocity += max(-dv_max, min(v_desired - velocity, dv_max))
+        # 新目标在制动距离以内时会先越过目标再折返，不会瞬间停住
+        self._position[axis] = position + velocity * dt
+        self._velocity[axis] = velocity
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        period = 1.0 / self.rate
+        due = time.monotonic()
+        while self._running:
+            point = self.step(period)
+            if point is not None:
+                self.servos.update(*point)
+            # 跟不上控制频率时不补发
+            due = max(due + period, time.monotonic())
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
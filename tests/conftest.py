@@ -0,0 +1,24 @@
+import pytest
+
+from exboard import jetson, sim
+
+
+@pytest.fixture
+def simulator():
+    """
+    每个测试使用独立的模拟器，结束后恢复原来的硬件绑定。
+    """
+    simulator = sim.Simulator()
+    with simulator:
+        yield simulator
+    simulator.close()
+
+
+@pytest.fixture
+def rc522(simulator):
+    """
+    接在模拟器上的 jetson.RC522，结束时释放共享总线，下一个测试重新打开。
+    """
+    reader = jetson.RC522()
+    yield reader
+    reader.close()
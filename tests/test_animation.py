@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from exboard import animation, jetson
+from exboard.animation import GAMMA_TABLE, AnimationEngine
+
+COUNT = 8
+FPS = 30
+
+
+def _pixels(frame):
+    return [tuple(frame[i:i + 3]) for i in range(0, len(frame), 3)]
+
+
+def test_fade_ends_on_end_color_and_holds():
+    effect = animation.fade(COUNT, FPS, (0, 0, 0), (255, 128, 0), duration=0.5)
+    assert len(effect.frames) == int(0.5 * FPS) + 1
+    assert effect.frame(0) == bytes(3 * COUNT)
+    end = bytes(GAMMA_TABLE[c] for c in (255, 128, 0)) * COUNT
+    assert effect.frames[-1] == end
+    # 不循环，停在最后一帧
+    assert effect.frame(len(effect.frames) + 100) == end
+
+
+def test_chase_moves_a_lit_segment_around_the_ring():
+    effect = animation.chase(COUNT, FPS, (0, 0, 255), width=2, speed=COUNT * 2)
+    assert len(effect.frames) == FPS // 2
+    heads = []
+    for frame in effect.frames:
+        lit = [i for i, p in enumerate(_pixels(frame)) if p == (0, 0, 255)]
+        assert len(lit) == 2
+        assert all(p == (0, 0, 0) for p in _pixels(frame) if p != (0, 0, 255))
+        heads.append(lit)
+    # 每帧向前移动，一个循环覆盖整个灯环
+    assert {i for lit in heads for i in lit} == set(range(COUNT))
+    assert effect.frame(len(effect.frames)) == effect.frames[0]
+
+
+def test_breathe_goes_dark_to_full_brightness():
+    effect = animation.breathe(COUNT, FPS, (0, 255, 0), period=2.0)
+    assert len(effect.frames) == 2 * FPS
+    greens = [frame[1] for frame in effect.frames]
+    assert greens[0] == 0
+    assert greens[len(greens) // 2] == 255
+    assert all(len(frame) == COUNT * 3 for frame in effect.frames)
+
+
+def test_gradient_rotates_the_colour_wheel():
+    effect = animation.gradient(COUNT, FPS, period=1.0)
+    assert len(effect.frames) == FPS
+    assert all(len(frame) == COUNT * 3 for frame in effect.frames)
+    assert effect.frames[0] != effect.frames[FPS // 2]
+
+
+@pytest.fixture
+def engine(simulator):
+    rgb = jetson.RGB()
+    engine = AnimationEngine(rgb, fps=100)
+    yield engine
+    engine.stop()
+    rgb.close()
+
+
+def _wait(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_engine_plays_effect_to_the_leds(engine, simulator):
+    assert engine.count == jetson.RGB.LENGTH
+    effect = engine.fade((0, 0, 0), (255, 0, 0), duration=0.1)
+    end = effect.frames[-1]
+    engine.play(effect)
+    engine.start()
+    _wait(lambda: bytes(simulator.board.leds) == end)
+    shown = engine.shown
+    frames = simulator.board.frames
+    assert shown > 1
+    # 停在最后一帧后内容不再变化，不再发送
+    time.sleep(0.05)
+    assert engine.shown == shown
+    assert simulator.board.frames == frames
+
+
+def test_engine_switches_effects(engine, simulator):
+    engine.start()
+    engine.play(engine.fade((0, 0, 0), (0, 0, 255), duration=0))
+    _wait(lambda: bytes(simulator.board.leds[:3]) == bytes((0, 0, 255)))
+    engine.play(engine.fade((0, 0, 0), (0, 255, 0), duration=0))
+    _wait(lambda: bytes(simulator.board.leds[:3]) == bytes((0, 255, 0)))
+
+
+def test_engine_drops_frames_when_the_bus_is_slow(engine, simulator):
+    simulator.set_latency(i2c=0.03)
+    # 每一帧内容都不同
+    engine.play(engine.gradient(period=1.0))
+    engine.start()
+    time.sleep(0.3)
+    engine.stop()
+    # 总线每帧至少 30 ms，100 fps 下每发送一帧就有约 2 帧过期，直接丢弃而不是排队补发
+    assert 0 < engine.shown <= 0.3 / 0.03 + 1
+    assert engine.dropped >= engine.shown
+    assert simulator.board.frames == engine.shown
+    assert engine.stats() == {"fps": engine.achieved_fps, "shown": engine.shown, "dropped": engine.dropped}
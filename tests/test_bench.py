@@ -0,0 +1,89 @@
+import copy
+import json
+
+import pytest
+
+from exboard import bench
+
+
+@pytest.fixture(scope="module")
+def report():
+    return bench.run(iterations=5, warmup=1, operations=["ADC", "RGB", "RC522", "Servos"])
+
+
+def _result(report, backend, operation):
+    return next(r for r in report["results"] if r["backend"] == backend and r["operation"] == operation)
+
+
+def test_every_operation_runs_without_errors(report):
+    names = {(r["backend"], r["operation"]) for r in report["results"]}
+    assert ("jetson", "Servos.move_to_absolute_position") in names
+    assert ("rk3390", "Servos.update") in names
+    assert not any("Ultrasound" in operation for _, operation in names)
+    for result in report["results"]:
+        assert result["errors"] == 0
+        assert result["iterations"] == 5
+        assert result["latency_us"]["p50"] <= result["latency_us"]["p99"]
+
+
+@pytest.mark.parametrize("backend", ["jetson", "rk3390"])
+def test_bus_costs_are_deterministic(report, backend):
+    assert _result(report, backend, "ADC.read")["by_kind"] == {
+        "i2c": {"transactions": 1.0, "bytes": 3.0, "syscalls": 1.0}
+    }
+    # 两个后端的 MFRC522 寄存器访问相同
+    assert _result(report, backend, "RC522.scan")["per_call"]["transactions"] == 32.0
+    assert _result(report, backend, "RC522.read")["per_call"]["transactions"] == 41.0
+
+
+def test_rgb_and_servo_bus_costs(report):
+    # [200] + 24 * 3 + [99]
+    assert _result(report, "jetson", "RGB.set")["by_kind"]["i2c"]["bytes"] == 74.0
+    assert _result(report, "rk3390", "RGB.set")["by_kind"] == {
+        "serial": {"transactions": 1.0, "bytes": 90.0, "syscalls": 2.0}
+    }
+    assert _result(report, "rk3390", "Servos.update")["by_kind"] == {
+        "pwm": {"transactions": 1.0, "bytes": 9.0, "syscalls": 1.0}
+    }
+    assert _result(report, "jetson", "Servos.move_to_absolute_position")["per_call"]["transactions"] == 1.0
+
+
+def test_compare_flags_bus_regressions(report):
+    new = copy.deepcopy(report)
+    _result(new, "jetson", "ADC.read")["by_kind"]["i2c"]["transactions"] = 2.0
+    rows = bench.compare(report, new)
+    regressed = [row[:3] for row in rows if row[-1]]
+    assert ("jetson", "ADC.read", "i2c.transactions") in regressed
+    assert all(key != "i2c.transactions" or operation == "ADC.read" for _, operation, key in regressed)
+    assert not any(row[-1] for row in bench.compare(report, report))
+
+
+def test_compare_tolerates_serial_jitter(report):
+    new = copy.deepcopy(report)
+    serial = _result(new, "jetson", "Servos.move_to_absolute_position")["by_kind"]["serial"]
+    serial["syscalls"] *= 1.2
+    rows = bench.compare(report, new)
+    assert not any(row[-1] for row in rows if row[2] == "serial.syscalls")
+    serial["syscalls"] *= 1.2
+    rows = bench.compare(report, new)
+    assert any(row[-1] for row in rows if row[2] == "serial.syscalls")
+
+
+def test_main_compare_exit_code(report, tmp_path, capsys):
+    base = tmp_path / "base.json"
+    new = tmp_path / "new.json"
+    base.write_text(json.dumps(report))
+    new.write_text(json.dumps(report))
+    assert bench.main(["--compare", str(base), str(new)]) == 0
+    worse = copy.deepcopy(report)
+    _result(worse, "rk3390", "Servos.update")["by_kind"]["pwm"]["bytes"] = 18.0
+    new.write_text(json.dumps(worse))
+    assert bench.main(["--compare", str(base), str(new)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_main_writes_json(capsys):
+    assert bench.main(["--backend", "rk3390", "--iterations", "2", "--warmup", "0",
+                       "--operation", "ADC", "--json", "-"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert [(r["backend"], r["operation"]) for r in result["results"]] == [("rk3390", "ADC.read")]
@@ -0,0 +1,28 @@
+import pytest
+
+from exboard import jetson
+
+# ISO/IEC 14443-3 附录 B 的 CRC_A 示例，以及 HALT 命令帧
+VECTORS = [
+    ([0x00, 0x00], [0xA0, 0x1E]),
+    ([0x12, 0x34], [0x26, 0xCF]),
+    ([0x50, 0x00], [0x57, 0xCD]),
+]
+
+
+@pytest.fixture
+def reader(simulator):
+    reader = jetson.MFRC522(7, 0x28, hostCRC=False)
+    yield reader
+    reader.close()
+
+
+@pytest.mark.parametrize("data, crc", VECTORS)
+def test_host_crc_matches_standard(data, crc):
+    assert jetson.MFRC522.calculateCRC_A(data) == crc
+
+
+@pytest.mark.parametrize("data, crc", VECTORS)
+def test_host_crc_matches_reader(reader, data, crc):
+    assert reader._MFRC522__calculateReaderCRC(data) == crc
+    assert jetson.MFRC522.calculateCRC_A(data) == reader._MFRC522__calculateReaderCRC(data)
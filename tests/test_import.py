@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def _run(code, backend="sim", **extra):
+    env = dict(os.environ, EXBOARD_BACKEND=backend, PYTHONPATH=SRC, **extra)
+    return subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60
+    )
+
+
+@pytest.mark.parametrize("module", ["jetson", "rk3390", "scheduler", "sampler", "sim"])
+def test_submodule_imports_first_under_sim(module):
+    # 不先导入 exboard 包本身，直接导入子模块
+    result = _run(f"import exboard.{module}")
+    assert result.returncode == 0, result.stderr
+
+
+def test_package_attribute_does_not_shadow_submodule():
+    result = _run("import exboard; from exboard import metrics; print(metrics.__name__)")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "exboard.metrics"
+
+
+@pytest.mark.parametrize("board", ["jetson", "rk3390"])
+def test_star_import_exports_only_driver_classes(board):
+    # 模拟器后端导出所模拟的板子的驱动接口
+    code = (
+        "import exboard, types\n"
+        "names = {}\n"
+        "exec('from exboard import *', names)\n"
+        "names.pop('__builtins__')\n"
+        "assert not any(isinstance(v, types.ModuleType) for v in names.values()), names\n"
+        "print(' '.join(sorted(names)))\n"
+    )
+    result = _run(code, EXBOARD_SIM_BOARD=board)
+    assert result.returncode == 0, result.stderr
+    names = set(result.stdout.split())
+    assert {"ADC", "RC522", "RGB", "Ultrasound", "Servos"} <= names
+    assert not names & {"os", "time", "Counter", "Simulator", "simulator", "LazyModule", "run_on"}
@@ -0,0 +1,121 @@
+import re
+
+import pytest
+
+from exboard import jetson, metrics
+from exboard.metrics import BUCKETS, ERROR_METRIC, OP_METRIC, Registry
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\\n]|\\.)*",?)*\})? (\S+)$')
+
+
+def _samples(text):
+    """解析 Prometheus 文本格式，检查每一行的语法"""
+    assert text.endswith("\n")
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert re.match(r"^# (HELP|TYPE) [a-zA-Z_:][a-zA-Z0-9_:]* \S", line), line
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        float(match.group(3))
+        samples.append((match.group(1), match.group(2) or "", match.group(3)))
+    return samples
+
+
+def _failing():
+    raise OSError("nak")
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    stats = registry.op("ADC.read", bus=7)
+    stats.observe(5_000)  # 5 us
+    stats.observe(2_000_000)  # 2 ms
+    with pytest.raises(OSError):
+        stats.call(_failing)
+    text = registry.prometheus()
+    samples = _samples(text)
+
+    assert text.splitlines()[:2] == [
+        f"# HELP {OP_METRIC} Latency of exboard low-level operations",
+        f"# TYPE {OP_METRIC} histogram",
+    ]
+    buckets = [(labels, int(value)) for name, labels, value in samples if name == OP_METRIC + "_bucket"]
+    assert len(buckets) == len(BUCKETS) + 1
+    assert buckets[0][0] == '{bus="7",op="ADC.read",le="1e-05"}'
+    assert buckets[-1][0] == '{bus="7",op="ADC.read",le="+Inf"}'
+    counts = [value for _, value in buckets]
+    # 累计计数单调不减，+Inf 等于 _count
+    assert counts == sorted(counts)
+    assert counts[0] >= 1 and counts[BUCKETS.index(0.0025)] >= 2 and counts[-1] == 3
+    assert (OP_METRIC + "_count", '{bus="7",op="ADC.read"}', "3") in samples
+    total = next(float(value) for name, _, value in samples if name == OP_METRIC + "_sum")
+    assert total == pytest.approx(stats.sum) and total >= 0.002005
+    assert (ERROR_METRIC, '{bus="7",op="ADC.read"}', "1") in samples
+    assert f"# TYPE {ERROR_METRIC} counter" in text
+
+
+def test_counter_exposition_and_escaping():
+    registry = Registry()
+    registry.counter("exboard_test_total", help="Test events", path='a"b\\c\nd').inc(2)
+    registry.counter("exboard_test_total", path="x").inc()
+    text = registry.prometheus()
+    samples = _samples(text)
+    assert "# HELP exboard_test_total Test events" in text
+    assert "# TYPE exboard_test_total counter" in text
+    assert ("exboard_test_total", '{path="a\\"b\\\\c\\nd"}', "2") in samples
+    assert ("exboard_test_total", '{path="x"}', "1") in samples
+    # 没有操作直方图时不输出直方图的 HELP/TYPE
+    assert OP_METRIC not in text
+
+
+def test_empty_registry():
+    assert Registry().prometheus() == "\n"
+
+
+def test_same_labels_share_stats():
+    registry = Registry()
+    assert registry.op("RGB.show", bus=7, addr="0x24") is registry.op("RGB.show", addr="0x24", bus="7")
+    assert registry.counter("c", a=1) is registry.counter("c", a="1")
+
+
+def test_quantile_interpolates_within_buckets():
+    registry = Registry()
+    stats = registry.op("GPIO.read")
+    assert stats.quantile(0.5) is None
+    for _ in range(100):
+        stats.observe(1_500_000)  # 1.5 ms，落在 (1 ms, 2.5 ms] 桶
+    assert 0.001 < stats.quantile(0.5) <= 0.0025
+    assert stats.quantile(0.99) == pytest.approx(0.001 + 0.0015 * 0.99)
+    stats.observe(10 * 10 ** 9)  # 超出最大上界
+    assert stats.quantile(1.0) == BUCKETS[-1]
+
+
+def test_query_and_reset():
+    registry = Registry()
+    registry.op("ADC.read", bus=7, channel=0).observe(1000)
+    registry.op("ADC.read", bus=7, channel=1).observe(1000)
+    registry.op("RGB.show", bus=7).observe(1000)
+    assert len(registry.query(op="ADC.read")) == 2
+    [result] = registry.query(op="ADC.read", channel=1)
+    assert result["labels"] == {"bus": "7", "channel": "1", "op": "ADC.read"}
+    assert result["count"] == 1 and result["errors"] == 0
+    assert len(registry.query(bus=7)) == 3
+    registry.reset()
+    assert all(r["count"] == 0 and r["mean"] is None for r in registry.query())
+
+
+def test_driver_records_operations(simulator):
+    labels = {"addr": hex(jetson.ADC.SUBPIN), "bus": str(jetson.ADC.SUBLINE), "channel": "3", "op": "ADC.read"}
+    adc = jetson.ADC(3)
+    try:
+        [before] = metrics.query(**labels)
+        for _ in range(4):
+            adc.read()
+        [after] = metrics.query(**labels)
+    finally:
+        adc.close()
+    assert after["labels"] == labels
+    assert after["count"] - before["count"] == 4
+    assert 'op="ADC.read"' in metrics.prometheus()
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from exboard import jetson, sim
+
+UID = [0x12, 0x34, 0x56, 0x78]
+IRQ_PIN = 17
+BLOCK = 4
+
+RxIRq = 0x20
+TimerIRq = 0x01
+LoAlertIRq = 0x04
+IRqInv = 0x80
+Set1 = 0x80
+
+
+@pytest.fixture(params=[None, IRQ_PIN], ids=["polling", "irq-pin"])
+def reader(request, simulator):
+    if request.param is not None:
+        simulator.wire_reader_irq(request.param)
+    reader = jetson.MFRC522(7, 0x28, irqPin=request.param)
+    yield reader
+    reader.close()
+
+
+@pytest.fixture
+def irq_reader(simulator):
+    simulator.wire_reader_irq(IRQ_PIN)
+    reader = jetson.MFRC522(7, 0x28, irqPin=IRQ_PIN)
+    yield reader
+    reader.close()
+
+
+def _select(reader, card):
+    card.reset()
+    assert reader.scan()[0] == reader.MIFARE_OK
+    status, uid, bits = reader.identify()
+    assert status == reader.MIFARE_OK
+    assert reader.select(uid)[0] == reader.MIFARE_OK
+    return uid
+
+
+def test_read_block(reader, simulator):
+    card = simulator.place_card(sim.VirtualCard(UID, data={BLOCK: b"irq"}))
+    uid = _select(reader, card)
+    status, data, bits = reader.authenticate(reader.MIFARE_AUTHKEY1, BLOCK, reader.MIFARE_KEY, uid)
+    assert status == reader.MIFARE_OK
+    status, data, bits = reader.read(BLOCK)
+    assert status == reader.MIFARE_OK
+    assert bytes(data[:3]) == b"irq"
+
+
+def test_failed_authentication_ends_on_timer_irq(reader, simulator):
+    card = simulator.place_card(sim.VirtualCard(UID, key=bytes(6)))
+    uid = _select(reader, card)
+    start = time.monotonic()
+    status, data, bits = reader.authenticate(reader.MIFARE_AUTHKEY1, BLOCK, reader.MIFARE_KEY, uid)
+    assert status == reader.MIFARE_NOTAGERR
+    # TimerIRq drives the IRQ line, the wait does not run into IRQ_TIMEOUT
+    assert time.monotonic() - start < reader.IRQ_TIMEOUT / 2
+
+
+def test_wait_returns_when_line_is_already_low(irq_reader, simulator):
+    write = irq_reader._MFRC522__MFRC522_write
+    write(irq_reader.COMIENREG, IRqInv | RxIRq | LoAlertIRq)
+    write(irq_reader.COMIRQREG, 0x7F)
+    # LoAlertIRq pulls the line low first, RxIRq then gives no new edge
+    write(irq_reader.COMIRQREG, Set1 | LoAlertIRq)
+    assert simulator.line(IRQ_PIN).value is False
+    irq_reader._MFRC522__irqEvent.clear()
+    write(irq_reader.COMIRQREG, Set1 | RxIRq)
+
+    start = time.monotonic()
+    comIRqReg, completed = irq_reader._MFRC522__waitForIRq(RxIRq)
+    assert completed
+    assert comIRqReg & RxIRq
+    assert time.monotonic() - start < irq_reader.IRQ_TIMEOUT / 2
+
+
+def test_timeout_checks_awaited_bits(simulator, monkeypatch):
+    # IRQ wired to a different pin, so the reader never sees an edge
+    simulator.wire_reader_irq(IRQ_PIN + 1)
+    simulator.set_input(IRQ_PIN, True)
+    reader = jetson.MFRC522(7, 0x28, irqPin=IRQ_PIN)
+    try:
+        monkeypatch.setattr(reader, "IRQ_TIMEOUT", 0.01)
+        write = reader._MFRC522__MFRC522_write
+        write(reader.COMIRQREG, 0x7F)
+        write(reader.COMIRQREG, Set1 | RxIRq)
+        comIRqReg, completed = reader._MFRC522__waitForIRq(RxIRq)
+        assert completed
+        comIRqReg, completed = reader._MFRC522__waitForIRq(TimerIRq)
+        assert not completed
+    finally:
+        reader.close()
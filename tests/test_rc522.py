@@ -0,0 +1,159 @@
+import pytest
+
+from exboard import jetson, sim
+
+BLOCK = 4
+UIDS = [
+    [0x12, 0x34, 0x56, 0x78],
+    [0x04, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66],
+    [0x08, 0x21, 0x32, 0x43, 0x54, 0x65, 0x76, 0x87, 0x98, 0xA9],
+]
+
+
+def _block(buffer, block):
+    offset = jetson.MFRC522.MIFARE_1K_DATABLOCK.index(block) * 16
+    return bytes(buffer[offset:offset + 16])
+
+
+@pytest.fixture
+def cards(simulator):
+    return [
+        simulator.place_card(sim.VirtualCard(uid, data={BLOCK: b"card %d" % len(uid)}))
+        for uid in UIDS
+    ]
+
+
+def test_inventory_returns_complete_uids(rc522, cards):
+    found = rc522.inventory()
+    assert sorted(uid for uid, sak in found) == sorted(UIDS)
+    assert all(sak == 0x08 for uid, sak in found)
+
+
+def test_inventory_uids_work_with_read_dump_and_write_many(rc522, cards):
+    for uid, sak in rc522.inventory():
+        expected = b"card %d" % len(uid)
+        assert bytes(rc522.read(uid, BLOCK)[:len(expected)]) == expected
+        assert _block(rc522.dump(uid), BLOCK).startswith(expected)
+        result = rc522.write_many(uid, {BLOCK + 1: b"written"}, verify=True)
+        assert result == {BLOCK + 1: jetson.MFRC522.MIFARE_OK}
+
+
+def test_scan_uid_still_selects_on_cascade_level_1(rc522, simulator):
+    simulator.place_card(sim.VirtualCard(UIDS[0], data={BLOCK: b"scan"}))
+    tag_type, uid = rc522.scan()
+    assert uid == UIDS[0] + [0x12 ^ 0x34 ^ 0x56 ^ 0x78]
+    assert bytes(rc522.read(uid, BLOCK)[:4]) == b"scan"
+
+
+def test_select_uid_rejects_invalid_length(rc522, cards):
+    status, sak = rc522.MFRC522Reader.selectUID([1, 2, 3])
+    assert status == jetson.MFRC522.MIFARE_ERR
+
+
+def test_write_many_rejects_trailer_and_manufacturer_blocks(rc522, simulator):
+    card = simulator.place_card(sim.VirtualCard(UIDS[0]))
+    trailer = bytes(card.block(3))
+    with pytest.raises(ValueError):
+        rc522.write_many(UIDS[0], {3: b"\x00"})
+    with pytest.raises(ValueError):
+        rc522.write_many(UIDS[0], {0: bytes(16)})
+    with pytest.raises(ValueError):
+        rc522.write_many(UIDS[0], {3: b"\x00"}, allow_trailers=True)
+    assert bytes(card.block(3)) == trailer
+    assert rc522.dump(UIDS[0]) is not None
+
+
+def test_write_many_writes_full_trailer_when_allowed(rc522, simulator):
+    card = simulator.place_card(sim.VirtualCard(UIDS[0]))
+    trailer = bytes([0xFF] * 6) + sim.VirtualCard.ACCESS_BITS + bytes([0xFF] * 6)
+    result = rc522.write_many(UIDS[0], {3: trailer}, allow_trailers=True)
+    assert result == {3: jetson.MFRC522.MIFARE_OK}
+    assert bytes(card.block(3)) == trailer
+    assert rc522.dump(UIDS[0]) is not None
+
+
+def test_write_reports_nak(rc522, simulator):
+    card = simulator.place_card(sim.VirtualCard(UIDS[0]))
+    block0 = bytes(card.block(0))
+    result = rc522.write_many(UIDS[0], {0: bytes(16)}, allow_manufacturer=True)
+    assert result == {0: jetson.MFRC522.MIFARE_ERR}
+    assert bytes(card.block(0)) == block0
+
+
+COLLIDING = [
+    [0x12, 0x34, 0x57, 0x78],
+    [0x12, 0x34, 0x56, 0x78],
+]
+
+
+def test_anticollision_reports_collision_with_partial_bits(rc522, simulator):
+    for uid in COLLIDING:
+        simulator.place_card(sim.VirtualCard(uid))
+    reader = rc522.MFRC522Reader
+    status, backData, backBits = reader.scan()
+    assert status == reader.MIFARE_OK
+    reader._MFRC522__MFRC522_write(reader.BITFRAMINGREG, 0x00)
+    status, backData, backBits = reader._MFRC522__transceiveCard(reader.MIFARE_ANTICOLCL1)
+    assert status == reader.MIFARE_COLLERR
+    # 两张卡在第 17 位 (第 3 字节最低位) 不同，之前的位有效，之后的位清零
+    assert backData[:3] == [0x12, 0x34, 0x00]
+    assert reader._MFRC522__MFRC522_read(reader.COLLREG) & 0x1F == 17
+
+
+def test_two_card_collision_resolves_to_both_cards(rc522, simulator):
+    for uid in COLLIDING:
+        simulator.place_card(sim.VirtualCard(uid, data={BLOCK: bytes(uid)}))
+    reader = rc522.MFRC522Reader
+    reader.scan()
+    status, uid, sak = reader.selectCascade()
+    # 冲突位按 1 的分支继续
+    assert (status, uid) == (reader.MIFARE_OK, COLLIDING[0])
+    found = [uid for uid, sak in rc522.inventory()]
+    assert sorted(found) == sorted(COLLIDING)
+    for uid in found:
+        assert bytes(rc522.read(uid, BLOCK)[:4]) == bytes(uid)
+
+
+def test_scan_with_different_atqa_finds_a_card(rc522, simulator):
+    simulator.place_card(sim.VirtualCard(UIDS[0]))
+    simulator.place_card(sim.VirtualCard(UIDS[1]))
+    status, backData, backBits = rc522.MFRC522Reader.scan()
+    assert (status, backBits) == (jetson.MFRC522.MIFARE_OK, 0x10)
+
+
+def _interleaved_dump(rc522, uid, between):
+    blocks = {}
+    for i, (block, data) in enumerate(rc522.iter_blocks(uid)):
+        blocks[block] = data
+        if i == 0:  # 产出时整个扇区 0 已经读完
+            between()
+    return blocks
+
+
+def _card_data(uid):
+    return {block: bytes(uid[:4]) + bytes([block]) for block in (4, 5, 8)}
+
+
+def test_iter_blocks_reselects_after_another_card_was_read(rc522, simulator):
+    first, second = UIDS[0], [0x21, 0x43, 0x65, 0x87]
+    for uid in (first, second):
+        simulator.place_card(sim.VirtualCard(uid, data=_card_data(uid)))
+    blocks = _interleaved_dump(rc522, first, lambda: rc522.read(second, 4))
+    assert blocks[4] == bytes(first) + b"\x04" + bytes(11)
+    assert blocks[8] == bytes(first) + b"\x08" + bytes(11)
+
+
+def test_iter_blocks_reselects_scan_uid_left_active_by_another_read(rc522, simulator):
+    simulator.place_card(sim.VirtualCard(UIDS[0], data=_card_data(UIDS[0])))
+    tag_type, uid = rc522.scan()
+    # 另一次读取让卡片停留在选中状态并认证了另一个扇区
+    blocks = _interleaved_dump(rc522, uid, lambda: rc522.read(uid, 8))
+    assert blocks[4] == bytes(UIDS[0]) + b"\x04" + bytes(11)
+    assert blocks[8] == bytes(UIDS[0]) + b"\x08" + bytes(11)
+
+
+def test_iter_blocks_does_not_reselect_without_interleaving(rc522, cards, monkeypatch):
+    calls = []
+    monkeypatch.setattr(rc522, "_reselect", lambda uid: calls.append(uid))
+    assert all(data is not None for block, data in rc522.iter_blocks(UIDS[0]))
+    assert calls == []
@@ -0,0 +1,88 @@
+import pytest
+
+from exboard import jetson, rk3390
+
+RED, GREEN, BLUE = (255, 0, 0), (0, 255, 0), (0, 0, 255)
+
+
+@pytest.fixture
+def jetson_rgb(simulator):
+    rgb = jetson.RGB()
+    yield rgb
+    rgb.close()
+
+
+@pytest.fixture
+def rk3390_rgb(simulator):
+    rgb = rk3390.RGB()
+    yield rgb
+    rgb.close()
+
+
+def test_jetson_frame_layout(jetson_rgb, simulator):
+    jetson_rgb.set([RED, GREEN, BLUE])
+    frame = bytes(jetson_rgb._frame)
+    assert len(frame) == jetson.RGB.LENGTH * 3 + 2
+    assert frame[0] == 200 and frame[-1] == 99
+    assert frame[1:10] == bytes(RED + GREEN + BLUE)
+    assert frame[10:-1] == bytes(jetson.RGB.LENGTH * 3 - 9)
+    assert bytes(simulator.board.leds) == frame[1:-1]
+
+
+def test_jetson_set_truncates_and_pads(jetson_rgb, simulator):
+    jetson_rgb.set([RED] * (jetson.RGB.LENGTH + 5))
+    assert bytes(simulator.board.leds) == bytes(RED) * jetson.RGB.LENGTH
+    # 平铺的列表和不足的部分补 0
+    jetson_rgb.set([0, 0, 255])
+    assert bytes(simulator.board.leds) == bytes(BLUE) + bytes(jetson.RGB.LENGTH * 3 - 3)
+
+
+def test_jetson_show_skips_unchanged_frames(jetson_rgb, simulator):
+    jetson_rgb.set([GREEN])
+    frames = simulator.board.frames
+    jetson_rgb.set([GREEN])
+    assert simulator.board.frames == frames
+    jetson_rgb.set_pixel(1, RED)
+    assert jetson_rgb.show()
+    assert not jetson_rgb.show()
+    assert simulator.board.frames == frames + 1
+
+
+def test_rk3390_frame_layout(rk3390_rgb, simulator):
+    rk3390_rgb.set([RED, GREEN, BLUE])
+    frame = bytes(rk3390_rgb._frame)
+    length = rk3390_rgb.lenth * 3
+    header = bytes([0xDD, 0x55, 0xEE, 0x00, 0x00, 0x00, 0x01, 0x00, 0x99, 0x01, 0x00, 0x00])
+    assert frame[:12] == header
+    assert frame[12:14] == bytes((length >> 8, length & 0xFF))
+    assert frame[14:16] == bytes([0x00, 0x01])
+    assert frame[16:25] == bytes(RED + GREEN + BLUE)
+    assert frame[-2:] == bytes([0xAA, 0xBB])
+    assert len(frame) == 16 + length + 2
+    assert bytes(simulator.board.leds) == frame[16:-2]
+
+
+def test_rk3390_set_truncates_like_jetson(rk3390_rgb, simulator):
+    rk3390_rgb.set([RED] * (rk3390_rgb.lenth + 5))
+    assert bytes(simulator.board.leds) == bytes(RED) * rk3390_rgb.lenth
+    # 颜色较少时只更新前面的彩灯
+    rk3390_rgb.set([BLUE])
+    assert bytes(simulator.board.leds) == bytes(BLUE) + bytes(RED) * (rk3390_rgb.lenth - 1)
+
+
+def test_rk3390_show_skips_unchanged_frames(rk3390_rgb, simulator):
+    rk3390_rgb.set([GREEN])
+    frames = simulator.board.frames
+    rk3390_rgb.set([GREEN])
+    assert simulator.board.frames == frames
+    rk3390_rgb.fill(BLUE)
+    assert rk3390_rgb.show()
+    assert simulator.board.frames == frames + 1
+
+
+def test_rk3390_partial_send_frame(rk3390_rgb, simulator):
+    rk3390_rgb.fill((0, 0, 0))
+    rk3390_rgb.show(force=True)
+    rk3390_rgb.send_frame(bytes(RED + GREEN))
+    assert bytes(simulator.board.leds[:6]) == bytes(RED + GREEN)
+    assert bytes(simulator.board.leds[6:]) == bytes(rk3390_rgb.lenth * 3 - 6)
@@ -0,0 +1,118 @@
+import time
+
+from exboard import jetson, sampler
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def read(self):
+        self.value += 1
+        return self.value
+
+
+class Flaky(Counter):
+    def read(self):
+        value = super().read()
+        if value % 2:
+            raise OSError("I2C transfer failed")
+        return value
+
+
+def test_ring_buffer_wraparound():
+    buffer = sampler.RingBuffer(4)
+    assert buffer.latest() is None and len(buffer) == 0
+    for i in range(6):
+        buffer.append(i, timestamp=100 + i)
+    assert len(buffer) == 4
+    assert buffer.count == 6
+    assert buffer.latest() == 5
+    assert buffer.latest_time() == 105
+    assert list(buffer.window(4)) == [2, 3, 4, 5]
+    assert list(buffer.window(10)) == [2, 3, 4, 5]
+    assert list(buffer.window(2)) == [4, 5]
+    assert list(buffer.times(3)) == [103, 104, 105]
+
+
+def test_ring_buffer_since():
+    buffer = sampler.RingBuffer(4)
+    for i in range(3):
+        buffer.append(i, timestamp=i)
+    count, samples = buffer.since(0)
+    assert (count, samples) == (3, [(0, 0), (1, 1), (2, 2)])
+    buffer.append(3, timestamp=3)
+    assert buffer.since(count) == (4, [(3, 3)])
+    assert buffer.since(4) == (4, [])
+    # 读取方落后超过容量时只返回仍在缓冲区中的采样
+    for i in range(4, 10):
+        buffer.append(i, timestamp=i)
+    count, samples = buffer.since(4)
+    assert count == 10
+    assert samples == [(6, 6), (7, 7), (8, 8), (9, 9)]
+
+
+def test_sampler_counts_errors_per_channel():
+    adc = sampler.ADCSampler(capacity=64)
+    adc.add("good", Counter(), rate=200)
+    adc.add("flaky", Flaky(), rate=200)
+    adc.start()
+    try:
+        _wait_for(lambda: adc.errors("flaky") >= 3 and len(adc.buffer("flaky")) >= 3)
+    finally:
+        adc.stop()
+    assert adc.errors("good") == 0
+    assert adc.last_error("good") is None
+    assert isinstance(adc.last_error("flaky"), OSError)
+    assert all(value % 2 == 0 for value in adc.window("flaky", 64))
+
+
+def test_sampler_stream_yields_new_samples():
+    adc = sampler.ADCSampler()
+    adc.add("counter", Counter(), rate=200)
+    adc.start()
+    try:
+        samples = []
+        for timestamp, value in adc.stream("counter", timeout=1):
+            samples.append(value)
+            if len(samples) == 3:
+                break
+    finally:
+        adc.stop()
+    # stream() 只产出调用之后的新采样，且不漏采样
+    first = samples[0]
+    assert samples == [first, first + 1, first + 2]
+
+
+def test_sampler_stream_ends_on_timeout():
+    adc = sampler.ADCSampler()
+    adc.add("idle", Counter(), rate=0.01)
+    adc.start()
+    try:
+        _wait_for(lambda: adc.latest("idle") == 1)
+        start = time.monotonic()
+        assert list(adc.stream("idle", timeout=0.05)) == []
+        assert time.monotonic() - start < 1
+    finally:
+        adc.stop()
+
+
+def test_sampler_key_extracts_value_from_tuple_sensors(simulator):
+    adc = sampler.ADCSampler()
+    adc.add("raw", jetson.SoundSensor(), rate=200)
+    adc.add("sound", jetson.SoundSensor(), rate=200, key=lambda result: result[1])
+    adc.start()
+    try:
+        _wait_for(lambda: len(adc.buffer("sound")) >= 2 and adc.errors("raw") >= 2)
+    finally:
+        adc.stop()
+    assert adc.errors("sound") == 0
+    assert len(adc.buffer("raw")) == 0
+    assert isinstance(adc.last_error("raw"), TypeError)
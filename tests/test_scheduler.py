@@ -0,0 +1,59 @@
+import queue
+import time
+
+from exboard import jetson, rk3390, scheduler
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_bus_key_uses_bus_number_on_both_backends(simulator):
+    assert scheduler.bus_key(jetson.ADC(0)) == ("i2c", jetson.ADC.SUBLINE)
+    assert scheduler.bus_key(rk3390.ADC(0)) == ("i2c", 6)
+    assert scheduler.bus_key(rk3390.ADCBank()) == ("i2c", 6)
+
+
+def test_bus_key_unknown_source():
+    assert scheduler.bus_key(lambda: 0) is None
+
+
+def test_on_missed_exception_keeps_worker_running():
+    def on_missed(name, lateness):
+        raise RuntimeError("on_missed failed")
+
+    def slow_read():
+        time.sleep(0.02)
+        return 1
+
+    runner = scheduler.Scheduler(on_missed=on_missed)
+    task = runner.add("slow", slow_read, rate=100)
+    runner.start()
+    try:
+        _wait_for(lambda: task.runs >= 3)
+        assert runner._thread.is_alive()
+    finally:
+        runner.stop()
+    assert task.missed >= 2
+    assert task.errors == task.missed
+    assert isinstance(task.last_error, RuntimeError)
+
+
+def test_callback_and_queue_receive_values():
+    received = []
+    results = queue.Queue()
+    runner = scheduler.Scheduler()
+    task = runner.add("value", lambda: 42, rate=200, queue=results,
+                      callback=lambda name, timestamp, value: received.append((name, value)))
+    runner.start()
+    try:
+        _wait_for(lambda: task.runs >= 2)
+    finally:
+        runner.stop()
+    assert received[0] == ("value", 42)
+    name, timestamp, value = results.get_nowait()
+    assert (name, value) == ("value", 42)
+    assert runner.latest("value") == 42
@@ -0,0 +1,37 @@
+import pytest
+
+from exboard import rk3390
+
+
+@pytest.fixture
+def servos(simulator):
+    servos = rk3390.Servos()
+    yield servos
+    servos.close()
+
+
+def _duty_ns(servo, degree):
+    return servo.duty_ns_for(servo.degree_ms(degree))
+
+
+def test_update_writes_both_axes(servos, simulator):
+    servos.update(30, 45)
+    assert simulator.pwm_duty_ns(0) == _duty_ns(servos.servo_x, 30)
+    # y 轴反向安装
+    assert simulator.pwm_duty_ns(1) == _duty_ns(servos.servo_y, -45)
+
+
+def test_unchanged_duty_is_not_written(servos, simulator):
+    servos.update(10, 20)
+    writes = simulator.stats["pwm"].transactions
+    servos.update(10, 20)
+    servos.update_x(10)
+    assert simulator.stats["pwm"].transactions == writes
+    servos.update(11, 20)
+    assert simulator.stats["pwm"].transactions == writes + 1
+
+
+def test_update_clamps_to_limits(servos, simulator):
+    servos.update(120, -10)
+    assert simulator.pwm_duty_ns(0) == _duty_ns(servos.servo_x, 90)
+    assert simulator.pwm_duty_ns(1) == _duty_ns(servos.servo_y, 0)
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from exboard import rk3390
+from exboard.trajectory import TrajectoryPlanner
+
+DT = 0.02
+
+
+class Recorder:
+    def __init__(self):
+        self.points = []
+
+    def update(self, x, y):
+        self.points.append((x, y))
+
+
+def _run(planner, steps=10000):
+    points = []
+    for _ in range(steps):
+        point = planner.step(DT)
+        if point is None:
+            return points
+        points.append(point)
+    raise AssertionError("trajectory did not settle")
+
+
+def _check_limits(points, max_velocity, max_acceleration):
+    """从静止出发、最终静止，逐周期检查每个轴的速度和加速度"""
+    for axis in (0, 1):
+        positions = [p[axis] for p in points]
+        velocities = [0.0] + [(b - a) / DT for a, b in zip(positions, positions[1:])] + [0.0]
+        assert max(abs(v) for v in velocities) <= max_velocity[axis] + 1e-6
+        accelerations = [(b - a) / DT for a, b in zip(velocities, velocities[1:])]
+        assert max(abs(a) for a in accelerations) <= max_acceleration[axis] + 1e-6
+
+
+@pytest.mark.parametrize("target", [(60, -30), (-45, 80), (0.5, 0.25), (0.001, 0)])
+def test_trajectory_reaches_endpoint_within_limits(target):
+    planner = TrajectoryPlanner(Recorder(), max_velocity=(90, 45), max_acceleration=(360, 180))
+    planner.set_target(*target)
+    points = [planner.position()] + _run(planner)
+    assert points[-1] == target
+    assert planner.settled()
+    _check_limits(points, (90, 45), (360, 180))
+
+
+def test_trajectory_retarget_keeps_limits():
+    planner = TrajectoryPlanner(Recorder(), max_velocity=90, max_acceleration=360)
+    planner.set_target(90, 0)
+    points = [planner.position()] + [planner.step(DT) for _ in range(20)]
+    # 反向目标，以及制动距离以内的目标 (需要越过后折返)
+    planner.set_target(-90, 0)
+    points += [planner.step(DT) for _ in range(20)]
+    planner.set_target(points[-1][0] - 1, 0)
+    points += _run(planner)
+    assert points[-1] == planner.position()
+    assert planner.settled()
+    assert min(p[0] for p in points) < points[-1][0]
+    _check_limits(points, (90, 90), (360, 360))
+
+
+def test_trajectory_retarget_right_after_arrival():
+    planner = TrajectoryPlanner(Recorder(), max_velocity=90, max_acceleration=360)
+    planner.set_target(10, 0)
+    points = [planner.position()]
+    while planner.position() != (10, 0):
+        points.append(planner.step(DT))
+    planner.set_target(-10, 0)
+    points += _run(planner)
+    assert points[-1] == (-10, 0)
+    _check_limits(points, (90, 90), (360, 360))
+
+
+def test_settled_planner_does_not_step():
+    planner = TrajectoryPlanner(Recorder(), start=(5, 5))
+    assert planner.settled()
+    assert planner.step(DT) is None
+
+
+def test_planner_streams_combined_updates(simulator):
+    servos = rk3390.Servos()
+    planner = TrajectoryPlanner(servos, rate=200, max_velocity=900, max_acceleration=9000)
+    planner.start()
+    try:
+        planner.set_target(20, 40)
+        deadline = time.monotonic() + 2
+        while not planner.settled():
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+    finally:
+        planner.stop()
+        servos.close()
+    assert simulator.pwm_duty_ns(0) == servos.servo_x.duty_ns_for(servos.servo_x.degree_ms(20))
+    assert simulator.pwm_duty_ns(1) == servos.servo_y.duty_ns_for(servos.servo_y.degree_ms(-40))
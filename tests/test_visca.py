@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from exboard import jetson, sim
+
+
+@pytest.fixture
+def servos(simulator):
+    servos = jetson.Servos(simulator.camera_port)
+    yield servos
+    servos.close()
+
+
+def test_absolute_position_waits_for_completion(servos, simulator):
+    reply = servos.move_to_absolute_position(Y=10, Z=5, wait="completion", timeout=1)
+    assert reply[1] & 0xF0 == 0x40 and reply[-2] & 0xF0 == 0x50
+    assert (simulator.camera.pan, simulator.camera.tilt) == (10 * 25, 5 * 25)  # 每度 25 步
+
+
+def test_absolute_position_completion_timeout(servos, simulator):
+    simulator.move_time = 5  # 完成应答在超时之后才到
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        servos.move_to_absolute_position(Y=10, Z=0, wait="completion", timeout=0.1)
+    assert time.monotonic() - start < 1
+
+
+def test_reply_parser_joins_frames_split_across_reads():
+    parser = jetson.ViscaReplyParser()
+    assert parser.feed(b"\x90\x41") == []
+    assert parser.feed(b"\xff\x90") == [("ack", 1, b"\x90\x41\xff")]
+    assert parser.feed(b"\x51\xff\x90\x60\x03\xff") == [
+        ("completion", 1, b"\x90\x51\xff"),
+        ("error", 0, b"\x90\x60\x03\xff"),
+    ]
+
+
+def test_reply_parser_skips_noise_and_keeps_inquiry_payload():
+    parser = jetson.ViscaReplyParser()
+    replies = parser.feed(b"\x00\x12\xff\x90\x50\x01\x02\x03\x04\x00\x00\x00\x05\xff")
+    assert replies == [("completion", 0, b"\x90\x50\x01\x02\x03\x04\x00\x00\x00\x05\xff")]
+
+
+def test_error_reply_raises_in_waiter(servos):
+    request = servos.post_visca_command("8101060999FF")  # 摄像机不支持的命令
+    with pytest.raises(jetson.ViscaError) as error:
+        request.ack.result(1)
+    assert error.value.code == 0x02
+
+
+def test_pending_absolute_positions_are_coalesced():
+    with sim.Simulator(latency={"serial": 0.05}) as simulator:
+        servos = jetson.Servos(simulator.camera_port)
+        try:
+            encode = servos.encode_command
+            first = servos.post_visca_command(encode("absolute_position", 10, 10, 1, 0))
+            deadline = time.monotonic() + 1
+            while servos._queue and time.monotonic() < deadline:  # 写线程取走第一条命令
+                time.sleep(0.001)
+            # 第一条命令等待 ACK 期间，后面的绝对位置命令在队列中互相取代
+            home = servos.post_visca_command(encode("home"))
+            stale = [
+                servos.post_visca_command(encode("absolute_position", 10, 10, y, 0))
+                for y in (2, 3)
+            ]
+            last = servos.post_visca_command(encode("absolute_position", 10, 10, 4, 0))
+            last.completion.result(2)
+            first.completion.result(2)
+            assert all(request.superseded for request in stale)
+            assert all(request.completion.result(0) is None for request in stale)
+            assert not (first.superseded or home.superseded or last.superseded)
+            sent = list(simulator.camera.commands)
+            assert sent == [first.command, home.command, last.command]
+            assert simulator.camera.pan == 4 * 25
+        finally:
+            servos.close()